@@ -0,0 +1,17 @@
+import pytest
+from corpus import make_corpus, FORMAT_IDS
+from src.user_format_handlers.DateParser import DateParser
+from src.user_format_handlers.date_formats import USER_DATE_FORMAT_TO_RE_COMPILE, USER_SEASON_FORMAT_OPTIONS
+
+
+@pytest.mark.parametrize("user_date_format", list(USER_DATE_FORMAT_TO_RE_COMPILE), ids=FORMAT_IDS)
+def bench_get_folder_date(benchmark, user_date_format):
+    datetime_date_format = USER_SEASON_FORMAT_OPTIONS[user_date_format]
+    re_compile_date_format = USER_DATE_FORMAT_TO_RE_COMPILE[user_date_format]
+    names = [name for name in make_corpus(user_date_format) if name.startswith("Отчет_")]
+
+    def parse_all():
+        return [DateParser.get_folder_date(datetime_date_format, re_compile_date_format, name) for name in names]
+
+    dates = benchmark(parse_all)
+    assert all(date is not None for date in dates)
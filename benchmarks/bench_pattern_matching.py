@@ -0,0 +1,33 @@
+import pytest
+from corpus import make_corpus, make_mask, FORMAT_IDS
+from src.user_format_handlers.date_formats import USER_DATE_FORMAT_TO_RE_COMPILE
+from src.user_format_handlers.work_with_user_format import PatternReplacer, FileNameValidator, NameMatcher
+
+USER_DATE_FORMATS = list(USER_DATE_FORMAT_TO_RE_COMPILE)
+
+
+@pytest.mark.parametrize("user_date_format", USER_DATE_FORMATS, ids=FORMAT_IDS)
+def bench_replace_pattern(benchmark, user_date_format):
+    re_compile_date_format = USER_DATE_FORMAT_TO_RE_COMPILE[user_date_format]
+    mask = make_mask(user_date_format)
+    benchmark(PatternReplacer, user_date_format, re_compile_date_format, mask)
+
+
+@pytest.mark.parametrize("user_date_format", USER_DATE_FORMATS, ids=FORMAT_IDS)
+def bench_check_pattern(benchmark, user_date_format):
+    validator = FileNameValidator(PatternReplacer(user_date_format, USER_DATE_FORMAT_TO_RE_COMPILE[user_date_format],
+                                                  make_mask(user_date_format)))
+    names = make_corpus(user_date_format)
+
+    matched = benchmark(lambda: sum(validator.check_pattern(name) for name in names))
+    assert matched > len(names) // 2
+
+
+def bench_combined_matcher(benchmark):
+    """Одна папка и маски всех форматов даты: объединённая проверка вместо проверки каждой маски"""
+    matcher = NameMatcher([PatternReplacer(user_date_format, USER_DATE_FORMAT_TO_RE_COMPILE[user_date_format],
+                                           make_mask(user_date_format)) for user_date_format in USER_DATE_FORMATS])
+    names = [name for user_date_format in USER_DATE_FORMATS for name in make_corpus(user_date_format, size=500)]
+
+    matched = benchmark(lambda: sum(matcher.match(name) for name in names))
+    assert matched > len(names) // 2
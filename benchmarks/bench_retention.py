@@ -0,0 +1,29 @@
+import datetime
+import pytest
+from corpus import make_corpus
+from src.utils.StoragePeriodFunction import CurrentDayWithOffset, CurrentMonthWithOffset, CurrentYearWithOffset
+from src.utils.DateSource import DateFromName
+from src.user_format_handlers.date_formats import USER_DATE_FORMAT_TO_RE_COMPILE, USER_SEASON_FORMAT_OPTIONS
+
+CURRENT_DATE = datetime.datetime(2024, 10, 31, 12, 0)
+USER_DATE_FORMAT = "ДД.ММ.ГГГГ"
+
+
+@pytest.mark.parametrize("storage_period_cls, offset", [(CurrentDayWithOffset, 30), (CurrentMonthWithOffset, 6),
+                                                        (CurrentYearWithOffset, 1)])
+def bench_process(benchmark, storage_period_cls, offset):
+    handler = storage_period_cls(DateFromName, offset, USER_SEASON_FORMAT_OPTIONS[USER_DATE_FORMAT],
+                                 USER_DATE_FORMAT_TO_RE_COMPILE[USER_DATE_FORMAT])
+    paths = ["C:\\Отчеты\\" + name for name in make_corpus(USER_DATE_FORMAT) if name.startswith("Отчет_")]
+
+    expired = benchmark(handler.process, paths, CURRENT_DATE)
+    assert 0 < len(expired) < len(paths)
+
+
+@pytest.mark.parametrize("storage_period_cls, offset", [(CurrentDayWithOffset, 30), (CurrentMonthWithOffset, 6),
+                                                        (CurrentYearWithOffset, 1)])
+def bench_expired_mask(benchmark, storage_period_cls, offset):
+    handler = storage_period_cls(DateFromName, offset, None, None)
+    folder_dates = [CURRENT_DATE - datetime.timedelta(hours=hours) for hours in range(0, 3 * 365 * 24, 5)]
+
+    benchmark(handler.expired_mask, folder_dates, CURRENT_DATE)
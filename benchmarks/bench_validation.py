@@ -0,0 +1,18 @@
+from corpus import make_table_rows
+from src.validators.check_Input_table import CheckInputTable
+
+
+def bench_check_validation(benchmark):
+    rows = make_table_rows(1000)
+
+    problems = benchmark(CheckInputTable(rows).check_validation)
+    assert problems
+
+
+def bench_check_validation_cached(benchmark, tmp_path):
+    rows = make_table_rows(1000)
+    cache_path = str(tmp_path / "validation_cache.json")
+    CheckInputTable(rows, cache_path=cache_path).check_validation()
+
+    problems = benchmark(CheckInputTable(rows, cache_path=cache_path).check_validation)
+    assert problems
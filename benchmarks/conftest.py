@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Запуск из корня репозитория или из папки benchmarks: пакет src должен импортироваться в обоих случаях
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
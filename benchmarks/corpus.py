@@ -0,0 +1,61 @@
+import random
+import datetime
+from typing import List, Tuple
+from src.user_format_handlers.date_formats import USER_DATE_FORMAT_TO_RE_COMPILE, USER_SEASON_FORMAT_OPTIONS
+
+# Количество имён в корпусе для каждого формата даты
+CORPUS_SIZE = 5000
+# Доля имён, которые не подходят под маску (посторонние файлы в папке)
+NOISE_SHARE = 0.1
+# Период, на который распределены даты: ежедневные архивы за несколько лет
+DATE_RANGE_DAYS = 3 * 365
+START_DATE = datetime.datetime(2022, 1, 1)
+
+RUSSIAN_MONTHS = ["Январь", "Февраль", "Март", "Апрель", "Май", "Июнь", "Июль", "Август", "Сентябрь", "Октябрь",
+                  "Ноябрь", "Декабрь"]
+PROCESS_NAMES = ["МП", "Выгрузка", "Сверка", "Реестр", "Акт"]
+# Имена замеров: формат datetime вместо пользовательского формата на кириллице
+FORMAT_IDS = [USER_SEASON_FORMAT_OPTIONS[user_date_format] for user_date_format in USER_DATE_FORMAT_TO_RE_COMPILE]
+
+
+def format_date(user_date_format: str, date: datetime.datetime) -> str:
+    """Записывает дату в пользовательском формате ("ДДММГГГГ" -> "01052024")"""
+    if user_date_format == "ММ.Месяц":
+        return f"{date.month:02d}.{RUSSIAN_MONTHS[date.month - 1]}"
+    return date.strftime(USER_SEASON_FORMAT_OPTIONS[user_date_format])
+
+
+def make_mask(user_date_format: str) -> str:
+    """Маска из настроечной таблицы для формата даты"""
+    return "Отчет_*_{" + user_date_format + "}.xlsx"
+
+
+def make_corpus(user_date_format: str, size: int = CORPUS_SIZE, seed: int = 0) -> List[str]:
+    """
+    Генерирует имена файлов для формата даты: "Отчет_<процесс>_<дата>.xlsx".
+    Даты повторяются, как в ежедневных архивах; часть имён не подходит под маску.
+    """
+    rnd = random.Random(seed)
+    names = []
+    for index in range(size):
+        date = START_DATE + datetime.timedelta(days=rnd.randrange(DATE_RANGE_DAYS), minutes=rnd.randrange(24 * 60))
+        if rnd.random() < NOISE_SHARE:
+            names.append(f"Черновик_{index}.docx")
+        else:
+            names.append(f"Отчет_{rnd.choice(PROCESS_NAMES)}_{format_date(user_date_format, date)}.xlsx")
+    return names
+
+
+def make_table_rows(size: int, seed: int = 0) -> List[Tuple]:
+    """Генерирует строки настроечной таблицы (часть строк с ошибками)"""
+    rnd = random.Random(seed)
+    user_date_formats = list(USER_DATE_FORMAT_TO_RE_COMPILE)
+    intervals = ["1 д", "30 д", "2 м", "1 г", "1 неделя"]
+    date_sources = ["Дата из имени", "Дата создания", "Дата изменения", "Дата"]
+    rows = []
+    for index in range(size):
+        rows.append((f"RPA-{index}", "Процесс", "Аналитик",
+                     rnd.choice(["C:\\Отчеты\\Папка", "\\\\server\\share\\Отчеты", "Отчеты"]),
+                     make_mask(rnd.choice(user_date_formats)), rnd.choice(intervals), rnd.choice(date_sources),
+                     rnd.choice(["Активен", "Не активен", "Выключен"])))
+    return rows
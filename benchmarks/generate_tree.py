@@ -0,0 +1,130 @@
+"""
+Генератор синтетических деревьев папок и настроечной таблицы для проверки скрипта на больших объёмах.
+
+    python benchmarks/generate_tree.py C:\\Temp\\scale --depth 3 --fan-out 10 --files-per-dir 50
+
+Для каждого формата даты создаётся отдельная папка правила с деревом глубины depth, в каждой папке которого
+files_per_dir файлов "Отчет_<процесс><номер>_<дата>.xlsx". Даты распределяются за days дней до текущей даты.
+"""
+import os
+import sys
+import random
+import argparse
+import datetime
+from typing import List, NamedTuple, Optional
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import format_date, make_mask, PROCESS_NAMES  # noqa: E402
+from src.user_format_handlers.date_formats import USER_DATE_FORMAT_TO_RE_COMPILE  # noqa: E402
+
+TABLE_HEADERS = ["Номер задачи в JIRA", "Название процесса", "Аналитик", "Путь к папке, которую нужно очищать",
+                 "Маска", "Интервал хранения", "Источник даты", "Статус", "Комментарий", "Дата добавления"]
+DISTRIBUTIONS = ["uniform", "recent"]
+
+
+class TreeSpec(NamedTuple):
+    """Параметры синтетического дерева"""
+    depth: int = 2  # Количество уровней вложенных папок
+    fan_out: int = 5  # Количество вложенных папок в каждой папке
+    files_per_dir: int = 20  # Количество файлов в каждой папке
+    formats: List[str] = ["ДДММГГГГ", "ГГГГ-ММ-ДД", "ДД.ММ.ГГГГ"]  # Форматы дат (по папке правила на формат)
+    distribution: str = "uniform"  # uniform - равномерно, recent - большинство дат близко к текущей
+    days: int = 365  # Период, за который распределяются даты
+    interval: str = "30 д"  # Срок хранения в строках таблицы
+    set_mtime: bool = False  # Устанавливать дату изменения файлов равной дате из имени
+    seed: int = 0
+
+
+class GeneratedTree(NamedTuple):
+    """Результат генерации"""
+    root: str
+    table_path: str
+    rule_paths: List[str]
+    entries: int  # Количество созданных файлов и папок
+
+
+def random_date(rnd: random.Random, spec: TreeSpec, current_date: datetime.datetime) -> datetime.datetime:
+    if spec.distribution == "recent":
+        days_back = min(int(rnd.expovariate(4 / spec.days)), spec.days - 1)
+    else:
+        days_back = rnd.randrange(spec.days)
+    return current_date - datetime.timedelta(days=days_back, minutes=rnd.randrange(24 * 60))
+
+
+def generate_tree(root: str, spec: TreeSpec, current_date: Optional[datetime.datetime] = None) -> GeneratedTree:
+    """
+    Создаёт дерево папок и настроечную таблицу (settings.xlsx в корне).
+
+    :param root: Папка, в которой создаётся дерево.
+    :param spec: Параметры дерева.
+    :param current_date: Дата, от которой отсчитываются даты файлов (по умолчанию текущая).
+    """
+    current_date = current_date or datetime.datetime.now()
+    rnd = random.Random(spec.seed)
+    rule_paths = []
+    entries = 0
+    for format_index, user_date_format in enumerate(spec.formats):
+        rule_path = os.path.join(root, f"rule_{format_index}")
+        rule_paths.append(rule_path)
+        stack = [(rule_path, 0)]
+        while stack:
+            dir_path, level = stack.pop()
+            os.makedirs(dir_path, exist_ok=True)
+            entries += 1
+            for file_index in range(spec.files_per_dir):
+                date = random_date(rnd, spec, current_date)
+                file_path = os.path.join(dir_path, f"Отчет_{PROCESS_NAMES[file_index % len(PROCESS_NAMES)]}"
+                                                   f"{file_index}_{format_date(user_date_format, date)}.xlsx")
+                open(file_path, "wb").close()
+                if spec.set_mtime:
+                    os.utime(file_path, (date.timestamp(), date.timestamp()))
+            entries += spec.files_per_dir
+            if level < spec.depth:
+                stack.extend((os.path.join(dir_path, f"sub_{index}"), level + 1) for index in range(spec.fan_out))
+
+    table_path = os.path.join(root, "settings.xlsx")
+    write_table(table_path, spec, rule_paths)
+    return GeneratedTree(root=root, table_path=table_path, rule_paths=rule_paths, entries=entries)
+
+
+def write_table(table_path: str, spec: TreeSpec, rule_paths: List[str]) -> None:
+    """Записывает настроечную таблицу: по строке на папку правила"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Лист1")
+    ws.append(TABLE_HEADERS)
+    for index, (user_date_format, rule_path) in enumerate(zip(spec.formats, rule_paths), start=1):
+        ws.append([f"SCALE-{index}", "Нагрузочный тест", "Аналитик", rule_path, make_mask(user_date_format),
+                   spec.interval, "Дата изменения" if spec.set_mtime else "Дата из имени", "Активен", "", ""])
+    wb.save(table_path)
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    """Добавляет параметры TreeSpec в аргументы командной строки"""
+    defaults = TreeSpec()
+    parser.add_argument("--depth", type=int, default=defaults.depth)
+    parser.add_argument("--fan-out", type=int, default=defaults.fan_out)
+    parser.add_argument("--files-per-dir", type=int, default=defaults.files_per_dir)
+    parser.add_argument("--formats", nargs="+", default=defaults.formats, choices=list(USER_DATE_FORMAT_TO_RE_COMPILE))
+    parser.add_argument("--distribution", default=defaults.distribution, choices=DISTRIBUTIONS)
+    parser.add_argument("--days", type=int, default=defaults.days)
+    parser.add_argument("--interval", default=defaults.interval)
+    parser.add_argument("--set-mtime", action="store_true")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_args(args: argparse.Namespace) -> TreeSpec:
+    return TreeSpec(depth=args.depth, fan_out=args.fan_out, files_per_dir=args.files_per_dir, formats=args.formats,
+                    distribution=args.distribution, days=args.days, interval=args.interval,
+                    set_mtime=args.set_mtime, seed=args.seed)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Генерация синтетического дерева папок")
+    arg_parser.add_argument("root", help="Папка, в которой создаётся дерево")
+    add_spec_arguments(arg_parser)
+    arguments = arg_parser.parse_args()
+    tree = generate_tree(arguments.root, spec_from_args(arguments))
+    print(f"Создано элементов: {tree.entries}, таблица: {tree.table_path}")
@@ -0,0 +1,54 @@
+"""
+Запуск микробенчмарков (pytest-benchmark).
+
+    python benchmarks/run_benchmarks.py --save-baseline   # сохранить базовые замеры
+    python benchmarks/run_benchmarks.py                   # сравнить с последними базовыми замерами
+
+При сравнении запуск завершается с ошибкой, если показатель любого замера (по умолчанию минимум - он меньше всего
+зависит от фоновой нагрузки) вырос больше порога (по умолчанию 15%).
+"""
+import os
+import sys
+import glob
+import argparse
+import subprocess
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+STORAGE_DIR = os.path.join(BENCHMARKS_DIR, ".benchmarks")
+BASELINE_NAME = "baseline"
+DEFAULT_THRESHOLD = 15  # Допустимое замедление, %
+
+
+def find_baseline_id():
+    """Возвращает номер последних сохранённых базовых замеров (или None)"""
+    baselines = sorted(glob.glob(os.path.join(STORAGE_DIR, "*", f"*_{BASELINE_NAME}.json")),
+                       key=lambda path: os.path.basename(path))
+    return os.path.basename(baselines[-1]).split("_")[0] if baselines else None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Микробенчмарки горячих участков")
+    parser.add_argument("--save-baseline", action="store_true", help="Сохранить результаты как базовые")
+    parser.add_argument("--threshold", type=int, default=int(os.environ.get("BENCH_THRESHOLD", DEFAULT_THRESHOLD)),
+                        help="Допустимое замедление относительно базовых замеров, %%")
+    parser.add_argument("--stat", default="min", choices=["min", "median", "mean"],
+                        help="Показатель, по которому сравниваются замеры")
+    parser.add_argument("-k", dest="keyword", help="Запустить только замеры, подходящие под выражение")
+    args = parser.parse_args(argv)
+
+    command = [sys.executable, "-m", "pytest", BENCHMARKS_DIR, "-q", f"--benchmark-storage=file://{STORAGE_DIR}"]
+    if args.keyword:
+        command += ["-k", args.keyword]
+    if args.save_baseline:
+        command.append(f"--benchmark-save={BASELINE_NAME}")
+    else:
+        baseline_id = find_baseline_id()
+        if baseline_id is None:
+            print("Базовые замеры не найдены. Сохраните их: run_benchmarks.py --save-baseline")
+            return 1
+        command += [f"--benchmark-compare={baseline_id}", f"--benchmark-compare-fail={args.stat}:{args.threshold}%"]
+    return subprocess.call(command, cwd=os.path.dirname(BENCHMARKS_DIR))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
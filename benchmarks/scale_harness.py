@@ -0,0 +1,171 @@
+"""
+Нагрузочный прогон полного сценария main.py на синтетическом дереве.
+
+    python benchmarks/scale_harness.py --depth 4 --fan-out 10 --files-per-dir 100 --config-option bulk_delete=true
+
+Генерирует дерево и настроечную таблицу (generate_tree.py), создаёт config.json и запускает main.main()
+в отдельном процессе. Отправка письма заменена заглушкой, которая сохраняет параметры письма в email.json.
+Результат (JSON): время выполнения, пиковое потребление памяти, скорость обхода и удаления.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, Optional
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from generate_tree import generate_tree, add_spec_arguments, spec_from_args  # noqa: E402
+
+
+class StubEmailSender:
+    """Заглушка отправки письма: параметры письма записываются в файл рядом с отчётами"""
+
+    output_path = "email.json"
+
+    def __init__(self, smtp_server: str = "") -> None:
+        self.smtp_server = smtp_server
+
+    def send_email(self, sender_email: str, recipient_emails: list, subject: str, message: str,
+                   attachment_path: Optional[str] = None) -> str:
+        with open(self.output_path, "w", encoding="utf-8") as output:
+            json.dump({"smtp_server": self.smtp_server, "sender": sender_email, "recipients": recipient_emails,
+                       "subject": subject, "attachment": attachment_path}, output, ensure_ascii=False)
+        return "Письмо сохранено"
+
+
+def harness_folder_path_validator():
+    """
+    Проверка пути к папке для синтетических деревьев: кроме путей Windows допускается любой абсолютный путь
+    (дерево создаётся во временной папке, в том числе вне Windows). Подставляется только в процессе прогона.
+    """
+    from src.validators.check_Input_table import FolderPathValidator
+
+    class HarnessFolderPathValidator(FolderPathValidator):
+        def validate(self, value: str) -> bool:
+            return os.path.isabs(value) or super().validate(value)
+
+    return HarnessFolderPathValidator()
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Пиковое потребление памяти текущим процессом (None, если недоступно)"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset
+        except (ImportError, AttributeError):
+            return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def count_entries(paths) -> int:
+    """Количество файлов и папок в деревьях (включая корневые папки)"""
+    total = 0
+    for path in paths:
+        for _root, dirs, files in os.walk(path):
+            total += len(dirs) + len(files)
+        total += os.path.isdir(path)
+    return total
+
+
+def run_child(config_path: str, email_path: str) -> None:
+    """Выполняется в отдельном процессе: полный запуск main.py с заглушкой письма"""
+    os.chdir(ROOT_DIR)
+    import main
+    from src.validators import check_Input_table
+    StubEmailSender.output_path = email_path
+    main.EmailSender = StubEmailSender
+    check_Input_table.VALIDATION_PLAN = tuple(
+        (column_number, harness_folder_path_validator() if column_number == 4 else validator)
+        for column_number, validator in check_Input_table.VALIDATION_PLAN)
+    main.main(["--config", config_path])
+    print(json.dumps({"peak_rss_bytes": peak_rss_bytes()}))
+
+
+def parse_option(value: str):
+    key, _, raw = value.partition("=")
+    return key, json.loads(raw)
+
+
+def run_harness(args: argparse.Namespace) -> Dict:
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="scale_")
+    tree_root = os.path.join(work_dir, "tree")
+    report_dir = os.path.join(work_dir, "report")
+    os.makedirs(tree_root, exist_ok=True)
+    os.makedirs(report_dir, exist_ok=True)
+    try:
+        started = time.perf_counter()
+        tree = generate_tree(tree_root, spec_from_args(args))
+        generation_seconds = time.perf_counter() - started
+
+        config = {"table_path": tree.table_path, "attached_file_path": report_dir, "subject": "Нагрузочный тест",
+                  "message": "Отчёт нагрузочного теста", "mail_recipient": ["scale@example.com"],
+                  "mail_sender": "scale@example.com"}
+        config.update(dict(args.config_option))
+        config_path = os.path.join(work_dir, "config.json")
+        with open(config_path, "w", encoding="utf-8") as config_file:
+            json.dump(config, config_file, ensure_ascii=False)
+
+        entries_before = count_entries(tree.rule_paths)
+        email_path = os.path.join(work_dir, "email.json")
+        started = time.perf_counter()
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", config_path, email_path],
+                               capture_output=True, text=True, encoding="utf-8")
+        wall_seconds = time.perf_counter() - started
+        if child.returncode != 0:
+            raise RuntimeError(f"Запуск завершился с ошибкой:\n{child.stderr}")
+        child_result = json.loads(child.stdout.strip().splitlines()[-1])
+        deleted = entries_before - count_entries(tree.rule_paths)
+
+        return {
+            "entries": tree.entries,
+            "deleted": deleted,
+            "generation_seconds": round(generation_seconds, 3),
+            "wall_seconds": round(wall_seconds, 3),
+            "peak_rss_bytes": child_result["peak_rss_bytes"],
+            "entries_scanned_per_second": round(tree.entries / wall_seconds, 1),
+            "deletes_per_second": round(deleted / wall_seconds, 1),
+            "email_sent": os.path.exists(email_path),
+            "config_options": dict(args.config_option),
+        }
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main(argv=None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "--child":
+        run_child(argv[1], argv[2])
+        return
+
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон main.py на синтетическом дереве")
+    add_spec_arguments(parser)
+    parser.add_argument("--config-option", action="append", type=parse_option, default=[], metavar="KEY=JSON",
+                        help="Параметр config.json (например, bulk_delete=true). Можно указать несколько раз")
+    parser.add_argument("--work-dir", help="Рабочая папка (по умолчанию временная)")
+    parser.add_argument("--keep", action="store_true", help="Не удалять рабочую папку после прогона")
+    parser.add_argument("--output", help="Файл для сохранения результата (JSON)")
+    args = parser.parse_args(argv)
+
+    result = run_harness(args)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(result, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,123 +1,255 @@
-import sys
+import os
+import time
+import signal
+import argparse
+from typing import Optional
 from src.excel.ExcelSheet import ExcelSheet
-from src.folders.FolderOperations import *
-from src.folders.check_folder import checking_folder
-from src.utils.exceptions import InvalidDate
+from src.rules.RuleExecutor import RuleExecutor, compile_rules
+from src.rules.CleanupDaemon import CleanupDaemon
+from src.rules.ShardCoordinator import ShardCoordinator
 from src.utils.json_reader import json_reader
-from src.utils.selecting_handlers import cls_definition, selecting_date_source
-from src.validators.check_Input_table import CheckInputTable
-from src.user_format_handlers.DateParser import USER_SEASON_FORMAT_OPTIONS
+from src.validators.check_Input_table import CheckInputTable, VALIDATION_CACHE_FILENAME
 from src.excel.ExelReporter import *
+from src.excel.StreamingReporter import StreamingReporter
+from src.excel.ReportSpool import close_report_spools
 from src.email.EmailSender import *
 from src.logger.logger_settings import setup_logger
 from src.folders.FolderCreator import *
+from src.folders.DeletionPlan import DeletionPlanWriter
+from src.folders.DeletionJournal import DeletionJournal, journal_report_rows, JOURNAL_FILENAME
+from src.utils.RunMetrics import RunMetrics
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Удаление файлов и папок с истёкшим сроком хранения")
+    parser.add_argument("--config", default="config/config.json", help="Путь к файлу настроек (config.json)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--plan", metavar="PATH",
+                      help="Только сформировать план удаления (сжатый JSONL) без удаления файлов")
+    mode.add_argument("--apply", metavar="PATH",
+                      help="Выполнить удаление по ранее сформированному плану без повторного обхода папок")
+    mode.add_argument("--daemon", action="store_true",
+                      help="Режим постоянной работы: строки выполняются по расписанию, таблица перечитывается "
+                           "только при изменении")
+    mode.add_argument("--journal-report", metavar="PATH",
+                      help="Сформировать и отправить отчёт по журналу удаления (например, прерванного запуска)")
+    parser.add_argument("--run-id", help="Идентификатор запуска, общий для серверов, выполняющих части строк; "
+                                         "журнал удаления продолжается только для того же идентификатора "
+                                         "(по умолчанию - дата запуска)")
+    return parser.parse_args(argv)
+
+
+def send_report(config_params, reporter_list, report_path: str, run_metrics: Optional[RunMetrics] = None) -> None:
+    """Формирует отчёт и отправляет его на почту"""
+    send_email(config_params, generate_report(config_params, reporter_list, report_path, run_metrics))
+
+
+def generate_report(config_params, reporter_list, report_path: str, run_metrics: Optional[RunMetrics] = None,
+                    build: bool = True) -> str:
+    """
+    Формирует (дополняет) дневной отчёт и возвращает путь к нему.
+
+    :param build: При потоковом отчёте собрать xlsx-файл. Если False, строки только дописываются в журнал отчёта,
+                  файл собирается позже (finalize_report).
+    """
+    started = time.perf_counter()
+    # Экземпляр класса для формирования отчёта. При потоковой обработке отчёт также формируется потоково:
+    # иначе весь xlsx загружается в память (load_workbook) и память растёт с количеством элементов
+    streaming = config_params.streaming_report or config_params.streaming_pipeline
+    reporter = StreamingReporter(report_path) if streaming else Reporter(report_path)
+    if streaming:
+        reporter.generate_report(reporter_list, build=build)
+    else:
+        reporter.generate_report(reporter_list)
+    close_report_spools(reporter_list)
+    if run_metrics is not None:
+        run_metrics.report_seconds = time.perf_counter() - started
+    return reporter.filename
+
+
+def finalize_report(config_params, report_filename: str) -> None:
+    """Собирает xlsx-файл потокового отчёта, строки которого дописывались в журнал (generate_report, build=False)"""
+    if config_params.streaming_report or config_params.streaming_pipeline:
+        StreamingReporter(os.path.dirname(report_filename), filename=report_filename).build_workbook()
+
+
+def send_email(config_params, attachment_path: str) -> None:
+    """Отправляет отчёт на почту"""
+    try:
+        email_sender = EmailSender(smtp_server="mail.center.rt.ru")
+        email_sender.send_email(
+            sender_email=config_params.mail_sender,
+            recipient_emails=config_params.mail_recipients,
+            subject=config_params.subject,
+            message=config_params.message,
+            attachment_path=attachment_path
+        )
+    except Exception as e:
+        logger.error("Ошибка отправки письма: %s", e)
 
-if __name__ == '__main__':
-    current_time = datetime.datetime.now()
 
-    config_params = json_reader('config/config.json')  # Считывание данных с json
-    logger = setup_logger(config_params)  # Загрузка настроек логирования
-    logger.info("Скрипт запущен")
+def save_run_metrics(config_params, run_metrics: RunMetrics, report_path: str) -> None:
+    """Сохраняет итоги запуска (JSON рядом с отчётом) и файл показателей в формате Prometheus"""
+    try:
+        if config_params.run_summary:
+            run_metrics.write_summary(os.path.join(
+                report_path, f"Итоги_запуска_{run_metrics.started.strftime('%d.%m_%H-%M-%S')}.json"))
+        if config_params.metrics_textfile:
+            run_metrics.write_textfile(config_params.metrics_textfile)
+    except OSError as e:
+        logger.error("Не удалось сохранить показатели запуска: %s", e)
+
+
+def run_daemon(config_params) -> None:
+    """
+    Режим постоянной работы. Результаты каждого запуска по расписанию дописываются в дневной отчёт,
+    письмо с отчётом за день отправляется при первом запуске следующего дня (и при остановке).
+    Потоковый отчёт собирается в xlsx один раз, перед отправкой: иначе каждый запуск пересобирал бы
+    все строки отчёта за день.
+    """
+    pending_report = {}  # Дневной отчёт, ещё не отправленный на почту: {"path": ..., "date": ...}
+
+    def report(reporter_list, current_time: datetime.datetime, run_metrics: Optional[RunMetrics]) -> None:
+        if pending_report and pending_report["date"] != current_time.date():
+            finalize_report(config_params, pending_report["path"])
+            send_email(config_params, pending_report["path"])
+            pending_report.clear()
+        path_provider = PathProvider(config_params.attached_file_path, DateProvider(current_time))
+        FolderCreator().create_folder(path_provider.get_year_path())
+        FolderCreator().create_folder(path_provider.get_month_path())
+        pending_report.update(path=generate_report(config_params, reporter_list, path_provider.get_month_path(),
+                                                   run_metrics, build=False), date=current_time.date())
+        if run_metrics is not None:
+            run_metrics.success = True
+            save_run_metrics(config_params, run_metrics, path_provider.get_month_path())
+
+    daemon = CleanupDaemon(config_params, report)
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: daemon.stop())
+    try:
+        daemon.run_forever()
+    except KeyboardInterrupt:
+        logger.info("Режим постоянной работы прерван")
+    finally:
+        daemon.close()
+        if pending_report:
+            finalize_report(config_params, pending_report["path"])
+            send_email(config_params, pending_report["path"])
+
+
+def run(args: argparse.Namespace, config_params, current_time: datetime.datetime, report_path: str,
+        run_metrics: Optional[RunMetrics] = None) -> bool:
+    """
+    Проверка таблицы, выполнение строк (или плана удаления), отчёт и отправка письма.
+
+    :return: True, если запуск выполнен (False - таблица содержит ошибки).
+    """
+    if args.apply:
+        # Удаление по готовому плану: таблица не читается, папки повторно не обходятся
+        rule_executor = RuleExecutor(config_params, run_metrics=run_metrics)
+        try:
+            reporter_list = rule_executor.apply_plan(args.apply, current_time)
+        finally:
+            rule_executor.close()
+        send_report(config_params, reporter_list, report_path, run_metrics)
+        return True
 
-    # Создание папок и подпапок для отчётов ( Год/Месяц )
-    path_provider = PathProvider(config_params.attached_file_path, DateProvider(current_time))
-    FolderCreator().create_folder(path_provider.get_year_path())
-    FolderCreator().create_folder(path_provider.get_month_path())
+    if args.journal_report:
+        # Отчёт по результатам удаления, записанным в журнал
+        send_report(config_params, journal_report_rows(args.journal_report), report_path, run_metrics)
+        return True
 
     reporter_list = []  # Список для формирование отчёта
 
     exel_table = ExcelSheet(filename=config_params.table_path, min_row=2)  # Класс для работы с Exel-таблицей
     exel_rows = exel_table.get_data()  # Получение всех строк из таблицы в виде словаря
 
-    check = CheckInputTable(exel_rows).check_validation()  # Проверка валидности таблицы
+    # Проверка валидности таблицы (строки, не изменившиеся с прошлого запуска, берутся из сохранённых результатов)
+    validation_cache_path = os.path.join(config_params.attached_file_path, VALIDATION_CACHE_FILENAME) \
+        if config_params.validation_cache else None
+    check = CheckInputTable(exel_rows, cache_path=validation_cache_path).check_validation()
 
     exel_table.highlight_cells(check)  # Закрашивание ячеек ( проблемные - в красный, остальные - в белый )
 
     if bool(check):
         logger.info("Скрипт остановил свою работу из-за проблем в таблице ")
-        sys.exit()
+        return False
 
-    for row in exel_rows:  # Обход всех строк из Exel-таблицы
-        folder_path, regex_pattern, interval = row[3], row[4].strip(), row[5]
-        date_modification = row[6].lower()
-        task_number, process_name, analyst = row[0], row[1], row[2]
+    if args.plan:
+        # Поиск и отбор по сроку хранения без удаления: результат записывается в план
+        plan_writer = DeletionPlanWriter(args.plan)
+        rule_executor = RuleExecutor(config_params, plan_writer=plan_writer, run_metrics=run_metrics)
+        try:
+            rule_executor.run(exel_rows, current_time)
+        finally:
+            rule_executor.close()
+            plan_writer.close()
+        return True
+
+    journal = None
+    if config_params.shard_processes > 0 or config_params.shard_lock_dir:
+        # Строки делятся на части по серверам/дискам и выполняются в нескольких процессах (или на нескольких серверах)
+        coordinator = ShardCoordinator(config_params, run_metrics)
+        try:
+            shard_results = coordinator.run(compile_rules(exel_rows), current_time, args.run_id)
+        finally:
+            coordinator.close()
+        if shard_results is None:
+            logger.info("Части строк выполнены, отчёт формирует другой сервер")
+            return True
+        reporter_list.extend(shard_results)
+    else:
+        # Параллельное выполнение строк таблицы, результаты собираются в порядке строк.
+        # С журналом удаления прерванный запуск продолжается с места остановки
+        if config_params.deletion_journal:
+            # Продолжается только прерванный запуск с тем же идентификатором (по умолчанию - той же даты)
+            journal = DeletionJournal(os.path.join(config_params.attached_file_path, JOURNAL_FILENAME),
+                                      config_params.journal_batch_size,
+                                      run_id=args.run_id or current_time.strftime("%Y-%m-%d"))
+        rule_executor = RuleExecutor(config_params, run_metrics=run_metrics, journal=journal)
+        try:
+            reporter_list.extend(rule_executor.run(exel_rows, current_time))
+        finally:
+            rule_executor.close()
+            if journal is not None:
+                journal.close()
 
-        logger.debug("Данные строки: Номер задачи: %s, Имя процесса: %s, Аналитик : %s",
-                     task_number, process_name, analyst)
+    send_report(config_params, reporter_list, report_path, run_metrics)
+    if journal is not None:
+        journal.finish()
+    return True
 
-        logger.debug("Данные строки: Путь:%s, Пользовательский формат:%s, Получение даты:%s, Интервал :%s",
-                     folder_path, regex_pattern, date_modification, interval)
 
-        # Проверка папки ( её наличие и доступ к ней )
-        checking_folder_result = checking_folder(folder_path)
-        if checking_folder_result:
-            reporter_list.append([task_number, process_name, analyst, folder_path, checking_folder_result,
-                                  current_time.strftime("%d-%m-%Y %H:%M:%S"),
-                                  current_time.strftime("%d-%m-%Y %H:%M:%S")])
-            logger.error("Проблема с папкой:%s, ", checking_folder_result['Нет файлов на удаление'].comment)
-            continue
+def main(argv=None) -> None:
+    """Запуск скрипта с сохранением показателей запуска (если они включены в настройках)"""
+    args = parse_args(argv)
+    current_time = datetime.datetime.now()
 
-        if row[7].strip().lower() == "не активен":
-            continue
+    config_params = json_reader(args.config)  # Считывание данных с json
+    setup_logger(config_params)  # Загрузка настроек логирования
+    logger.info("Скрипт запущен")
 
-        # Определение типа ( файл/папка )
-        is_file = (lambda mask: bool(os.path.splitext(mask)[1]) and re.match(r'^[a-zA-Z]+$',
-                                                                             os.path.splitext(mask)[1][
-                                                                             1:]) is not None)(regex_pattern)
+    if args.daemon:
+        run_daemon(config_params)
+        return
 
-        try:
-            # Получение нужных форматов и их представление в datetime и re.compile()
-            user_date_format, re_compile_date_format = UserDateFormatDetector.get_user_and_re_compile_date_format(
-                regex_pattern)
-            datetime_date_format = USER_SEASON_FORMAT_OPTIONS.get(user_date_format, None)
-            logger.debug("Формат времени для модуля datetime: %s", datetime_date_format)
-
-
-        except InvalidDate as e:
-            logger.error("Ошибка в формате %s", e)
-            continue
-
-        # Классы для очистки и загрузки данных(файлов/папок), подходящие под пользовательский формат
-        cleaner = FolderCleaner()
-        content_loader = RecursiveFolderContentLoader(folder_path, regex_pattern, user_date_format,
-                                                      re_compile_date_format, is_file)
-        # Экземпляр класса для работы с текущей папкой
-        current_folder = Folder(folder_path, content_loader=content_loader, cleaner=cleaner)
-        folder_contents = current_folder.load_contents()  # Получение всех подходящих файлов/папок
-
-        # Определение класса для обработки условия хранения
-        storage_period_handler = cls_definition(storage_period=interval,
-                                                date_source=selecting_date_source(date_modification),
-                                                datetime_date_format=datetime_date_format,
-                                                re_compile_date_format=re_compile_date_format)
-
-        if storage_period_handler:
-            # Список папок/файлов на удаление
-            remove_files = storage_period_handler.process(folder_contents, current_time)
-            logger.debug("Файлы на удаление: %s", remove_files)
-
-            time_end = datetime.datetime.now()
-            current_folder.add_files_to_delete(remove_files)
-            report_dict = current_folder.clean()
-            # Данные для формирования отчёта
-            reporter_list.append([task_number, process_name, analyst, folder_path, report_dict,
-                                  current_time.strftime("%d-%m-%Y %H:%M:%S"),
-                                  time_end.strftime("%d-%m-%Y %H:%M:%S"),
-                                  ])
-            logger.debug("Данные для формирование отчёта: %s", reporter_list)
-
-    # Экземпляр класса для формирования отчёта
-    reporter = Reporter(path_provider.get_month_path())
-    reporter.generate_report(reporter_list)
+    # Создание папок и подпапок для отчётов ( Год/Месяц )
+    path_provider = PathProvider(config_params.attached_file_path, DateProvider(current_time))
+    FolderCreator().create_folder(path_provider.get_year_path())
+    FolderCreator().create_folder(path_provider.get_month_path())
 
+    run_metrics = RunMetrics(current_time) if config_params.run_summary or config_params.metrics_textfile else None
     try:
-        email_sender = EmailSender(smtp_server="mail.center.rt.ru")
-        email_sender.send_email(
-            sender_email=config_params.mail_sender,
-            recipient_emails=config_params.mail_recipients,
-            subject=config_params.subject,
-            message=config_params.message,
-            attachment_path=reporter.filename
-        )
-    except Exception as e:
-        logger.error("Ошибка отправки письма: %s", e)
+        success = run(args, config_params, current_time, path_provider.get_month_path(), run_metrics)
+        if run_metrics is not None:
+            run_metrics.success = success
+    finally:
+        if run_metrics is not None:
+            save_run_metrics(config_params, run_metrics, path_provider.get_month_path())
+
+
+if __name__ == '__main__':
+    main()
@@ -17,16 +17,22 @@ class ExcelSheet:
         self.filename = filename
         self.min_row = min_row
         self.__sheet_data = []
+        self.__highlighted_cells: Dict[int, List[int]] = {}
+        self.__max_row = 0
+        self.__max_column = 0
         self.load_workbook()
 
     def load_workbook(self) -> None:
         """
-        Загружает рабочую книгу и устанавливает активный лист.
+        Загружает рабочую книгу в режиме только для чтения (потоковое чтение, файл закрывается сразу после чтения).
         """
         try:
-            self.wb = load_workbook(filename=self.filename)
-            self.sheet = self.wb.active
-            self.load_data()
+            wb = load_workbook(filename=self.filename, read_only=True)
+            try:
+                self.sheet = wb.active
+                self.load_data()
+            finally:
+                wb.close()
         except FileNotFoundError:
             logger.error("Файл не найден: %s", self.filename)
         except PermissionError:
@@ -34,10 +40,23 @@ class ExcelSheet:
 
     def load_data(self) -> None:
         """
-        Загружает данные из файла Excel.
+        Загружает данные из файла Excel и запоминает ячейки, уже закрашенные в красный цвет.
         """
+        self.__sheet_data = []
+        self.__highlighted_cells = {}
+        for row_number, row in enumerate(self.sheet.iter_rows(min_row=self.min_row), start=self.min_row):
+            self.__sheet_data.append(tuple(cell.value for cell in row))
+            self.__max_row = row_number
+            self.__max_column = max(self.__max_column, len(row))
+            for col, cell in enumerate(row, start=1):
+                if self.is_red(cell):
+                    self.__highlighted_cells.setdefault(row_number, []).append(col)
 
-        self.__sheet_data = [row for row in self.sheet.iter_rows(min_row=self.min_row, values_only=True)]
+    @staticmethod
+    def is_red(cell) -> bool:
+        """Проверяет, закрашена ли ячейка в красный цвет"""
+        fill = getattr(cell, "fill", None)
+        return fill is not None and fill.fill_type == "solid" and str(fill.start_color.rgb)[-6:] == "FF0000"
 
     def get_data(self) -> List:
         """
@@ -57,12 +76,23 @@ class ExcelSheet:
             cells_to_highlight (Dict[int, List[int]]): Словарь, где ключ - номер строки (начиная с 1),
                                                        значение - список номеров столбцов (начиная с 1).
         """
+        if self.__normalize(cells_to_highlight) == self.__normalize(self.__highlighted_cells):
+            # Закрашенные ячейки не изменились с прошлого запуска: файл не перезаписывается
+            logger.debug("Закрашенные ячейки таблицы не изменились")
+            return
+
+        try:
+            wb = load_workbook(filename=self.filename)
+        except (FileNotFoundError, PermissionError):
+            logger.error("Ошибка доступа: %s", self.filename)
+            return
+        sheet = wb.active
         white_fill = PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid")
         red_fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
 
-        for row in range(self.min_row, self.sheet.max_row + 1):
-            for col in range(1, self.sheet.max_column - 1):
-                cell = self.sheet.cell(row=row, column=col)
+        for row in range(self.min_row, sheet.max_row + 1):
+            for col in range(1, sheet.max_column - 1):
+                cell = sheet.cell(row=row, column=col)
                 if row in cells_to_highlight and col in cells_to_highlight[row]:
                     cell.fill = red_fill
                 else:
@@ -70,6 +100,16 @@ class ExcelSheet:
 
         # Сохранение изменений в файл
         try:
-            self.wb.save(self.filename)
+            wb.save(self.filename)
+            self.__highlighted_cells = {row: list(cols) for row, cols in cells_to_highlight.items()}
         except PermissionError:
             logger.error("Ошибка доступа: %s", self.filename)
+
+    def __normalize(self, cells: Dict[int, List[int]]) -> Dict[int, set]:
+        """Приводит ячейки к сравнимому виду (учитываются только строки и столбцы, которые закрашиваются)"""
+        normalized = {}
+        for row, cols in cells.items():
+            cols = {col for col in cols if 1 <= col < self.__max_column - 1}
+            if self.min_row <= row <= self.__max_row and cols:
+                normalized[row] = cols
+        return normalized
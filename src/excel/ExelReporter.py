@@ -1,11 +1,18 @@
 import os
-from typing import List
+from typing import List, Iterator
 from datetime import datetime
 from openpyxl import Workbook, load_workbook
 from logging import getLogger
 
 logger = getLogger(__name__)
 
+HEADERS = [
+    "Номер задачи в JIRA", "Название процесса", "Аналитик",
+    "Путь к папке, которую нужно очищать", "Наименование удаленных папок/ файлов",
+    "Время начала обработки", "Время окончания обработки", "Статус", "Комментарий",
+    "Освобождено, байт"
+]
+
 
 class Reporter:
     def __init__(self, output_directory: str):
@@ -27,36 +34,41 @@ class Reporter:
                 wb = Workbook()
                 ws = wb.active
                 ws.title = "Отчет"
-                headers = [
-                    "Номер задачи в JIRA", "Название процесса", "Аналитик",
-                    "Путь к папке, которую нужно очищать", "Наименование удаленных папок/ файлов",
-                    "Время начала обработки", "Время окончания обработки", "Статус", "Комментарий"
-                ]
-                ws.append(headers)
-
-            for report in reporter_list:
-                task_number, process_name, analyst, folder_path, report_dict, start_time, end_time = report
-
-                if "Нет файлов на удаление" in report_dict:
-                    ws.append([
-                        task_number, process_name, analyst, folder_path, "Нет файлов на удаление", start_time, end_time,
-                        report_dict['Нет файлов на удаление'].status, report_dict['Нет файлов на удаление'].comment
-                    ])
-                    continue
-
-                else:
-                    ws.append([
-                        task_number, process_name, analyst, folder_path,
-                        f"Список файлов на удаление ({len(report_dict)} эл)", start_time, end_time, "", ""
-                    ])
-                for path, result in report_dict.items():
-                    ws.append([
-                        "", "", "", "", path,
-                        "", "", result.status, result.comment
-                    ])
+                ws.append(HEADERS)
+
+            for row in self.iter_rows(reporter_list):
+                ws.append(row)
             wb.save(self.filename)
             logger.info("Отчёт сохранён по пути: %s", self.filename)
         except PermissionError:
             logger.error("Не удалось сохранить отчёт. Возможно, файл открыт в другой программе.")
         except Exception as e:
             logger.error("Произошла ошибка при генерации отчёта: %s", e)
+
+    @staticmethod
+    def iter_rows(reporter_list: List[List]) -> Iterator[List]:
+        """
+        Преобразует данные для отчёта в строки листа: строка таблицы и по одной строке на каждый путь.
+
+        :param reporter_list: Список с данными для отчёта
+        """
+        for report in reporter_list:
+            task_number, process_name, analyst, folder_path, report_dict, start_time, end_time = report
+
+            if "Нет файлов на удаление" in report_dict:
+                yield [
+                    task_number, process_name, analyst, folder_path, "Нет файлов на удаление", start_time, end_time,
+                    report_dict['Нет файлов на удаление'].status, report_dict['Нет файлов на удаление'].comment, ""
+                ]
+                continue
+
+            # Освобождённый объём строки - сумма известных объёмов удалённых элементов
+            sizes = [result.size for result in report_dict.values() if result.size is not None]
+            yield [
+                task_number, process_name, analyst, folder_path,
+                f"Список файлов на удаление ({len(report_dict)} эл)", start_time, end_time, "", "",
+                sum(sizes) if sizes else ""
+            ]
+            for path, result in report_dict.items():
+                yield ["", "", "", "", path, "", "", result.status, result.comment,
+                       "" if result.size is None else result.size]
@@ -0,0 +1,99 @@
+import os
+import json
+import tempfile
+from typing import Iterator, Tuple, List
+from src.folders.FolderOperations import CleanResult
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+EMPTY_REPORT_KEY = "Нет файлов на удаление"
+
+
+class ReportSpool:
+    """
+    Результаты удаления одной строки таблицы, записываемые во временный файл по мере получения.
+    Ведёт себя как словарь {путь: CleanResult}, который возвращает FolderCleaner.clean, поэтому
+    Reporter.generate_report работает с ним без изменений, а память не растёт с количеством элементов.
+    """
+
+    def __init__(self, buffer_size: int = 1000) -> None:
+        """
+        Инициализатор
+        :param buffer_size: Количество результатов, накапливаемых в памяти перед записью во временный файл.
+        """
+        self.buffer_size = max(1, buffer_size)
+        self._buffer: List[str] = []
+        # Файл открывается только на время записи/чтения, чтобы множество строк не удерживало дескрипторы
+        file_descriptor, self.spool_path = tempfile.mkstemp(prefix="report_", suffix=".jsonl")
+        os.close(file_descriptor)
+        self._count = 0
+
+    def add(self, path: str, result: CleanResult) -> None:
+        """Добавляет результат удаления"""
+        self._buffer.append(json.dumps([path, result.status, result.comment, result.size], ensure_ascii=False))
+        self._count += 1
+        if len(self._buffer) >= self.buffer_size:
+            self._flush()
+
+    def extend(self, results: Iterator[Tuple[str, CleanResult]]) -> "ReportSpool":
+        """Добавляет результаты из потока (path, CleanResult)"""
+        for path, result in results:
+            self.add(path, result)
+        return self
+
+    def _flush(self) -> None:
+        if self._buffer:
+            with open(self.spool_path, "a", encoding="utf-8") as spool_file:
+                spool_file.write("\n".join(self._buffer) + "\n")
+            self._buffer = []
+
+    def items(self) -> Iterator[Tuple[str, CleanResult]]:
+        if not self._count:
+            yield EMPTY_REPORT_KEY, CleanResult(status="Выполнено", comment="Список файлов на удаление пуст")
+            return
+        self._flush()
+        with open(self.spool_path, "r", encoding="utf-8") as spool_file:
+            for line in spool_file:
+                path, *result = json.loads(line)
+                yield path, CleanResult(*result)
+
+    def keys(self) -> Iterator[str]:
+        return (path for path, _result in self.items())
+
+    def values(self) -> Iterator[CleanResult]:
+        return (result for _path, result in self.items())
+
+    def __iter__(self) -> Iterator[str]:
+        return self.keys()
+
+    def __len__(self) -> int:
+        return self._count or 1
+
+    def __contains__(self, key: str) -> bool:
+        if key == EMPTY_REPORT_KEY:
+            return not self._count
+        return any(path == key for path in self.keys())
+
+    def __getitem__(self, key: str) -> CleanResult:
+        for path, result in self.items():
+            if path == key:
+                return result
+        raise KeyError(key)
+
+    def close(self) -> None:
+        """Удаляет временный файл"""
+        try:
+            os.remove(self.spool_path)
+        except OSError:
+            pass
+
+    def __repr__(self) -> str:
+        return f"ReportSpool({self._count} эл)"
+
+
+def close_report_spools(reporter_list: List[List]) -> None:
+    """Удаляет временные файлы результатов после формирования отчёта"""
+    for report in reporter_list:
+        if isinstance(report[4], ReportSpool):
+            report[4].close()
@@ -0,0 +1,85 @@
+import os
+import json
+from typing import List, Iterator, Optional
+from openpyxl import Workbook, load_workbook
+from src.excel.ExelReporter import Reporter, HEADERS
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+
+class StreamingReporter(Reporter):
+    """
+    Отчёт, строки которого дописываются в журнал (JSONL рядом с xlsx-файлом) по мере формирования.
+    Добавление строк в дневной отчёт стоит столько же, сколько сами строки: существующий xlsx не загружается.
+    Файл xlsx собирается из журнала в режиме write-only (строки записываются потоком, без хранения листа в памяти);
+    сборка стоит столько же, сколько все строки отчёта за день. Поэтому при нескольких запусках за день
+    (режим постоянной работы) строки только дописываются в журнал, а xlsx собирается один раз - перед отправкой.
+    """
+
+    def __init__(self, output_directory: str, filename: Optional[str] = None):
+        """
+        Инициализатор
+        :param output_directory: Папка отчётов.
+        :param filename: Путь к файлу отчёта (по умолчанию - отчёт за текущий день в папке отчётов).
+        """
+        super().__init__(output_directory)
+        if filename is not None:
+            self.filename = filename
+        self.journal_path = os.path.splitext(self.filename)[0] + ".jsonl"
+
+    def generate_report(self, reporter_list: List[List], build: bool = True) -> None:
+        """
+        Дописывает строки в журнал дневного отчёта и пересобирает xlsx-файл.
+
+        :param reporter_list: Список с данными для отчёта
+        :param build: Собрать xlsx-файл. Если False, строки только дописываются в журнал (build_workbook - позже).
+        """
+        try:
+            if not os.path.exists(self.journal_path) and os.path.exists(self.filename):
+                # Отчёт за день создан обычным Reporter: его строки переносятся в журнал один раз
+                self._import_existing_report()
+            with open(self.journal_path, "a", encoding="utf-8") as journal:
+                for row in self.iter_rows(reporter_list):
+                    journal.write(json.dumps(row, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.error("Произошла ошибка при записи журнала отчёта: %s", e)
+            return
+        if build:
+            self.build_workbook()
+
+    def build_workbook(self) -> None:
+        """Собирает xlsx-файл из журнала. Файл заменяется целиком только после успешной записи"""
+        temp_filename = self.filename + ".tmp"
+        try:
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet("Отчет")
+            ws.append(HEADERS)
+            for row in self._iter_journal():
+                ws.append(row)
+            wb.save(temp_filename)
+            os.replace(temp_filename, self.filename)
+            logger.info("Отчёт сохранён по пути: %s", self.filename)
+        except PermissionError:
+            logger.error("Не удалось сохранить отчёт. Возможно, файл открыт в другой программе.")
+        except Exception as e:
+            logger.error("Произошла ошибка при генерации отчёта: %s", e)
+        finally:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+
+    def _iter_journal(self) -> Iterator[List]:
+        with open(self.journal_path, "r", encoding="utf-8") as journal:
+            for line in journal:
+                yield json.loads(line)
+
+    def _import_existing_report(self) -> None:
+        wb = load_workbook(self.filename, read_only=True)
+        try:
+            with open(self.journal_path + ".tmp", "w", encoding="utf-8") as journal:
+                for row in wb.active.iter_rows(min_row=2, values_only=True):
+                    journal.write(json.dumps(["" if value is None else value for value in row],
+                                             ensure_ascii=False, default=str) + "\n")
+        finally:
+            wb.close()
+        os.replace(self.journal_path + ".tmp", self.journal_path)
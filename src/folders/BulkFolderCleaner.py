@@ -0,0 +1,123 @@
+import os
+import stat
+import shutil
+import inspect
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterable, Iterator, Tuple
+from src.folders.FolderOperations import FolderCleaner, CleanResult
+from src.folders.IoThrottle import throttled
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+# Удаление относительно дескриптора папки доступно не на всех платформах (например, недоступно в Windows)
+SUPPORTS_DIR_FD = ({os.open, os.stat, os.unlink} <= os.supports_dir_fd
+                   and "dir_fd" in inspect.signature(shutil.rmtree).parameters
+                   and shutil.rmtree.avoids_symlink_attacks)
+
+
+class BulkFolderCleaner(FolderCleaner):
+    """
+    Пакетное удаление файлов и папок.
+    Пути группируются по родительской папке: родительская папка открывается один раз, элементы удаляются
+    относительно её дескриптора (без полного разбора пути для каждого элемента). Независимые группы
+    удаляются параллельно в пуле потоков. Статусы и комментарии CleanResult совпадают с FolderCleaner.
+    """
+
+    def __init__(self, max_workers: int = 4, chunk_size: int = 1000) -> None:
+        """
+        Инициализатор
+        :param max_workers: Количество потоков для параллельного удаления.
+        :param chunk_size: Количество путей, обрабатываемых за один пакет.
+        """
+        self.max_workers = max(1, max_workers)
+        self.chunk_size = max(1, chunk_size)
+
+    def iter_clean(self, items_to_delete: Iterable[str]) -> Iterator[Tuple[str, CleanResult]]:
+        items = iter(items_to_delete)
+        while True:
+            chunk = list(islice(items, self.chunk_size))
+            if not chunk:
+                return
+            yield from self._clean_chunk(chunk)
+
+    def _clean_chunk(self, paths: List[str]) -> Iterator[Tuple[str, CleanResult]]:
+        """Удаляет пакет путей. Результаты возвращаются в исходном порядке"""
+        groups: Dict[str, List[Tuple[int, str]]] = {}
+        for index, path in enumerate(paths):
+            parent, name = os.path.split(path)
+            groups.setdefault(parent, []).append((index, name))
+
+        # Группы внутри других удаляемых путей и группы, содержащие эти пути, зависят от порядка удаления.
+        # Они выполняются после параллельной фазы последовательно, в исходном порядке
+        targets = {os.path.normcase(os.path.normpath(path)): index for index, path in enumerate(paths)}
+        dependent = set()
+        for parent in groups:
+            ancestor_index = self._find_ancestor_target(parent, targets)
+            if ancestor_index is not None:
+                dependent.add(parent)
+                dependent.add(os.path.dirname(paths[ancestor_index]))
+        independent = [parent for parent in groups if parent not in dependent]
+
+        results: List[CleanResult] = [None] * len(paths)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for parent, group_results in zip(independent, pool.map(lambda p: self._clean_group(p, groups[p]),
+                                                                   independent)):
+                for (index, _name), result in zip(groups[parent], group_results):
+                    results[index] = result
+        for index in sorted(index for parent in dependent for index, _name in groups.get(parent, [])):
+            results[index] = self._delete_throttled(paths[index])
+        return zip(paths, results)
+
+    @staticmethod
+    def _find_ancestor_target(path: str, targets: Dict[str, int]):
+        """Возвращает номер удаляемого пути, внутри которого лежит папка path (или None)"""
+        path = os.path.normcase(os.path.normpath(path))
+        parent = os.path.dirname(path)
+        while parent != path:
+            if path in targets:
+                return targets[path]
+            path, parent = parent, os.path.dirname(parent)
+        return None
+
+    def _clean_group(self, parent: str, names: List[Tuple[int, str]]) -> List[CleanResult]:
+        """Удаляет элементы одной родительской папки"""
+        if not SUPPORTS_DIR_FD:
+            return [self._delete_throttled(os.path.join(parent, name)) for _index, name in names]
+        try:
+            dir_fd = os.open(parent or os.curdir, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+        except OSError:
+            # Папку не удалось открыть: результат для каждого элемента определяется обычным способом
+            return [self._delete_throttled(os.path.join(parent, name)) for _index, name in names]
+        try:
+            results = []
+            for _index, name in names:
+                with throttled(self.throttle):
+                    results.append(self._delete_at(dir_fd, name))
+            return results
+        finally:
+            os.close(dir_fd)
+
+    def _delete_throttled(self, path: str) -> CleanResult:
+        with throttled(self.throttle):
+            return self.delete(path)
+
+    @staticmethod
+    def _delete_at(dir_fd: int, name: str) -> CleanResult:
+        """Удаляет элемент относительно дескриптора родительской папки"""
+        try:
+            mode = os.stat(name, dir_fd=dir_fd).st_mode
+        except (OSError, ValueError):
+            # Аналог os.path.isfile/isdir, которые возвращают False при ошибке
+            return CleanResult(status="Не выполнено", comment="Неизвестный тип или не существует")
+        try:
+            if stat.S_ISREG(mode):
+                os.unlink(name, dir_fd=dir_fd)
+                return CleanResult(status="Выполнено", comment="Файл удалён")
+            elif stat.S_ISDIR(mode):
+                shutil.rmtree(name, dir_fd=dir_fd)
+                return CleanResult(status="Выполнено", comment="Папка удалена")
+            return CleanResult(status="Не выполнено", comment="Неизвестный тип или не существует")
+        except Exception as e:
+            return FolderCleaner.error_result(e)
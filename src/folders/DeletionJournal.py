@@ -0,0 +1,218 @@
+import os
+import json
+import datetime
+import threading
+from typing import List, Dict, Iterable, Iterator, Tuple, Optional
+from src.folders.FolderOperations import FolderCleaner, CleanResult
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+JOURNAL_FILENAME = "deletion_journal.jsonl"
+EMPTY_REPORT_KEY = "Нет файлов на удаление"
+DONE_STATUS = "Выполнено"
+
+
+class JournalRow:
+    """Состояние строки таблицы по журналу: описание строки, элементы на удаление и результаты удаления"""
+
+    __slots__ = ("info", "planned", "complete", "results", "finished")
+
+    def __init__(self, info: Dict) -> None:
+        self.info = info
+        self.planned: Dict[str, None] = {}  # Элементы на удаление (упорядоченное множество)
+        self.complete = False  # Записан весь список элементов на удаление строки
+        self.results: Dict[str, CleanResult] = {}
+        self.finished: Optional[str] = None  # Время завершения строки
+
+    def remaining(self) -> List[str]:
+        """Элементы на удаление, результат удаления которых не записан"""
+        return [path for path in self.planned if path not in self.results]
+
+    def report_row(self) -> List:
+        """Строка для формирования отчёта"""
+        report_dict = dict(self.results) or {
+            EMPTY_REPORT_KEY: CleanResult(status=DONE_STATUS, comment="Список файлов на удаление пуст")}
+        return [self.info["task_number"], self.info["process_name"], self.info["analyst"], self.info["folder_path"],
+                report_dict, self.info["started"], self.finished or self.info["started"]]
+
+
+def read_journal(journal_path: str) -> Tuple[Dict, Dict[int, JournalRow], bool]:
+    """
+    Читает журнал удаления. Неполная последняя запись (прерванная запись в файл) пропускается.
+
+    :return: (запись о начале запуска {"run": время начала, "run_id": идентификатор запуска},
+              состояние строк по номерам строк таблицы, запуск завершён).
+    """
+    run, rows, ended = {}, {}, False
+    with open(journal_path, "r", encoding="utf-8") as journal_file:
+        for line in journal_file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.error("Пропущена повреждённая запись журнала удаления: %s", line[:200])
+                continue
+            if isinstance(record, list):
+                row_index, path, *result = record
+                rows[row_index].results[path] = CleanResult(*result)
+            elif "row" in record:
+                row = rows.setdefault(record["row"]["row_index"], JournalRow(record["row"]))
+                row.finished = None
+            elif "planned" in record:
+                row = rows[record["planned"]]
+                row.planned.update(dict.fromkeys(record["paths"]))
+                row.complete = row.complete or record["complete"]
+            elif "row_end" in record:
+                rows[record["row_end"]].finished = record["finished"]
+            elif "run" in record:
+                run = record
+            elif "run_end" in record:
+                ended = True
+    return run, rows, ended
+
+
+def journal_report_rows(journal_path: str) -> List[List]:
+    """Строки для отчёта по журналу удаления (например, прерванного запуска) в порядке строк таблицы"""
+    _run, rows, _ended = read_journal(journal_path)
+    return [rows[row_index].report_row() for row_index in sorted(rows)]
+
+
+class JournalingCleaner(FolderCleaner):
+    """Удаление с записью результата каждого элемента в журнал удаления"""
+
+    def __init__(self, cleaner: FolderCleaner, journal: "DeletionJournal", row_index: int) -> None:
+        self.cleaner = cleaner
+        self.journal = journal
+        self.row_index = row_index
+
+    def iter_clean(self, items_to_delete: Iterable[str]) -> Iterator[Tuple[str, CleanResult]]:
+        return self.journal.record(self.row_index, self.cleaner.iter_clean(items_to_delete))
+
+
+class DeletionJournal:
+    """
+    Журнал удаления (JSONL, только дозапись). Для каждой строки таблицы записываются описание строки,
+    элементы на удаление и результат удаления каждого элемента; записи сбрасываются на диск (fsync) пакетами.
+    Если предыдущий запуск с тем же идентификатором был прерван, журнал продолжается: завершённые строки
+    не выполняются повторно, для строк с полным списком элементов удаляются только оставшиеся элементы,
+    отчёт включает результаты, записанные до прерывания. Журнал прерванного запуска с другим идентификатором
+    (например, предыдущей ночи) не продолжается: запуск начинается заново.
+    """
+
+    def __init__(self, journal_path: str, batch_size: int = 100, run_id: Optional[str] = None) -> None:
+        """
+        Инициализатор
+        :param journal_path: Путь к файлу журнала.
+        :param batch_size: Количество записей, после которого журнал сбрасывается на диск.
+        :param run_id: Идентификатор запуска (по умолчанию - текущая дата).
+        """
+        self.journal_path = journal_path
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self.resumed: Dict[int, JournalRow] = {}  # Строки прерванного запуска
+        self.run_id = run_id or datetime.datetime.now().strftime("%Y-%m-%d")
+        run, rows, ended = read_journal(journal_path) if os.path.exists(journal_path) else ({}, {}, True)
+        if not ended and run.get("run_id") != self.run_id:
+            logger.warning("Журнал прерванного запуска %s от %s не продолжается (текущий запуск %s): "
+                           "строки выполняются заново", run.get("run_id"), run.get("run"), self.run_id)
+            ended = True
+        if ended:
+            self._file = open(journal_path, "w", encoding="utf-8")
+            self._write([{"run": datetime.datetime.now().isoformat(timespec="seconds"), "run_id": self.run_id}],
+                        sync=True)
+        else:
+            logger.info("Продолжение прерванного запуска от %s: строк в журнале %s, завершено %s", run.get("run"),
+                        len(rows), sum(row.finished is not None for row in rows.values()))
+            self.resumed = rows
+            self._file = open(journal_path, "a", encoding="utf-8")
+
+    def resumed_row(self, row_index: int, rule) -> Optional[JournalRow]:
+        """Состояние строки прерванного запуска (None, если строки нет в журнале или она изменилась в таблице)"""
+        row = self.resumed.get(row_index)
+        if row is None:
+            return None
+        if (row.info["task_number"], row.info["folder_path"]) != (rule.task_number, rule.folder_path):
+            logger.info("Строка %s изменилась после прерванного запуска и выполняется заново", row_index)
+            del self.resumed[row_index]
+            return None
+        return row
+
+    def start_row(self, row_index: int, rule, started: str) -> None:
+        self._write([{"row": {"row_index": row_index, "task_number": rule.task_number,
+                              "process_name": rule.process_name, "analyst": rule.analyst,
+                              "folder_path": rule.folder_path, "started": started}}])
+
+    def plan(self, row_index: int, paths: Iterable, complete: bool) -> None:
+        """Записывает элементы на удаление строки (complete - записан весь список строки)"""
+        self._write([{"planned": row_index, "paths": [os.fspath(path) for path in paths], "complete": complete}],
+                    sync=True)
+
+    def record(self, row_index: int, results: Iterable[Tuple[str, CleanResult]]) -> Iterator[Tuple[str, CleanResult]]:
+        """Поток результатов удаления, каждый из которых записывается в журнал"""
+        row = self.resumed.get(row_index)
+        for path, result in results:
+            self._write([[row_index, path, result.status, result.comment, result.size]])
+            if row is not None:
+                row.results[path] = result
+            yield path, result
+
+    def end_row(self, row_index: int, finished: str) -> None:
+        self._write([{"row_end": row_index, "finished": finished}], sync=True)
+        if row_index in self.resumed:
+            self.resumed[row_index].finished = finished
+
+    def resume_row(self, row_index: int, cleaner: FolderCleaner) -> None:
+        """
+        Удаляет оставшиеся элементы строки прерванного запуска. Отсутствующие элементы считаются удалёнными
+        до прерывания (результат их удаления мог не попасть в журнал).
+        """
+        row = self.resumed[row_index]
+        remaining = row.remaining()
+        logger.info("Строка %s: удаление оставшихся элементов прерванного запуска: %s", row_index, len(remaining))
+        missing = [(path, CleanResult(status=DONE_STATUS, comment="Удалено до прерывания запуска"))
+                   for path in remaining if not os.path.lexists(path)]
+        for _result in self.record(row_index, missing):
+            pass
+        for _result in JournalingCleaner(cleaner, self, row_index).iter_clean(
+                [path for path in remaining if path not in row.results]):
+            pass
+
+    def merge_resumed(self, row_index: int, report_row: Optional[List]) -> Optional[List]:
+        """Добавляет в строку отчёта результаты удаления, записанные до прерывания запуска"""
+        row = self.resumed.get(row_index)
+        if report_row is None or row is None or not row.results:
+            return report_row
+        report_dict = report_row[4]
+        if isinstance(report_dict, dict):
+            merged = dict(row.results)
+            merged.update((path, result) for path, result in report_dict.items() if path != EMPTY_REPORT_KEY)
+            report_row[4] = merged
+        else:
+            # Результаты потоковой обработки (ReportSpool) дополняются без загрузки в память
+            new_paths = set(report_dict.keys())
+            report_dict.extend((path, result) for path, result in row.results.items() if path not in new_paths)
+        return report_row
+
+    def _write(self, records: List, sync: bool = False) -> None:
+        with self._lock:
+            self._file.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+            self._unsynced += len(records)
+            if sync or self._unsynced >= self.batch_size:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    def finish(self) -> None:
+        """Отмечает запуск завершённым (после отправки отчёта): следующий запуск начинает новый журнал"""
+        if self._file.closed:
+            self._file = open(self.journal_path, "a", encoding="utf-8")
+        self._write([{"run_end": datetime.datetime.now().isoformat(timespec="seconds")}], sync=True)
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
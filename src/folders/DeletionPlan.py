@@ -0,0 +1,136 @@
+import os
+import gzip
+import json
+import stat
+import threading
+from itertools import islice
+from typing import List, Dict, Iterable, Tuple, Optional, NamedTuple
+from src.folders.FolderEntry import FolderEntry
+from src.folders.FolderOperations import CleanResult
+from src.utils.RunMetrics import item_size
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+# Количество элементов, записываемых в план за одну операцию
+CHUNK_SIZE = 1000
+
+
+class DeletionPlanWriter:
+    """
+    Записывает план удаления (JSONL, сжатый gzip). Для каждой строки таблицы записывается описание правила,
+    затем элементы на удаление: [номер строки, путь, дата в формате ISO, размер в байтах, mtime в наносекундах].
+    Для строк, папка которых не прошла проверку, записывается только описание правила с результатом проверки.
+    Потокобезопасен: элементы разных строк могут чередоваться, при чтении они группируются по номеру строки.
+    """
+
+    def __init__(self, plan_path: str) -> None:
+        """
+        Инициализатор
+        :param plan_path: Путь к файлу плана.
+        """
+        self.plan_path = plan_path
+        self._lock = threading.Lock()
+        self._file = gzip.open(plan_path, "wt", encoding="utf-8")
+        self._count = 0
+
+    def add_rule_items(self, row_index: int, rule, items: Iterable, storage_period_handler) -> int:
+        """
+        Записывает элементы на удаление одной строки таблицы.
+
+        :param row_index: Номер строки таблицы (определяет порядок строк в отчёте при выполнении плана).
+        :param rule: Правило очистки (Rule).
+        :param items: Элементы с истёкшим сроком хранения (пути или FolderEntry).
+        :param storage_period_handler: Обработчик условия хранения, через который определяется дата элемента.
+        :return: Количество записанных элементов.
+        """
+        self._write([self._header(row_index, rule)])
+        count = 0
+        items = iter(items)
+        while True:
+            # Элементы записываются пакетами, чтобы не накапливать весь список строки таблицы в памяти
+            chunk = list(islice(items, CHUNK_SIZE))
+            if not chunk:
+                return count
+            self._write([json.dumps([row_index, os.fspath(item), self._get_date(item, storage_period_handler),
+                                     *self._get_size_and_mtime(item)], ensure_ascii=False) for item in chunk])
+            count += len(chunk)
+            with self._lock:
+                self._count += len(chunk)
+
+    def add_rule_check(self, row_index: int, rule, check_result: CleanResult) -> None:
+        """Записывает строку таблицы, папка которой не прошла проверку (результат попадёт в отчёт по плану)"""
+        self._write([self._header(row_index, rule, check=[check_result.status, check_result.comment])])
+
+    @staticmethod
+    def _header(row_index: int, rule, **extra) -> str:
+        return json.dumps({"rule": {"row_index": row_index, "task_number": rule.task_number,
+                                    "process_name": rule.process_name, "analyst": rule.analyst,
+                                    "folder_path": rule.folder_path, "regex_pattern": rule.regex_pattern,
+                                    "interval": rule.interval, "date_modification": rule.date_modification, **extra}},
+                          ensure_ascii=False)
+
+    def _write(self, lines: List[str]) -> None:
+        with self._lock:
+            self._file.write("\n".join(lines) + "\n")
+
+    @staticmethod
+    def _get_date(item, storage_period_handler) -> Optional[str]:
+        try:
+            folder_date = storage_period_handler.get_date(item)
+            return folder_date.isoformat() if folder_date else None
+        except Exception as e:
+            logger.error("Ошибка: %s", e)
+            return None
+
+    @staticmethod
+    def _get_size_and_mtime(item) -> Tuple[Optional[int], Optional[int]]:
+        """Размер (для папки - суммарный размер файлов) и mtime элемента"""
+        try:
+            stat_result = item.stat() if isinstance(item, FolderEntry) else os.stat(item)
+        except OSError:
+            return None, None
+        return item_size(item), stat_result.st_mtime_ns
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+        logger.info("План удаления сохранён по пути: %s (%s эл)", self.plan_path, self._count)
+
+
+class PlannedItem(NamedTuple):
+    """Элемент плана удаления: путь и состояние элемента на момент формирования плана"""
+    path: str
+    date: Optional[str] = None
+    size: Optional[int] = None
+    mtime_ns: Optional[int] = None  # Отсутствует в планах, сформированных до его добавления
+
+    def changed_comment(self, stat_result: os.stat_result) -> Optional[str]:
+        """Причина, по которой элемент не удаляется (изменён после формирования плана), или None"""
+        if self.mtime_ns is not None and stat_result.st_mtime_ns != self.mtime_ns:
+            return "Пропущено: изменён после формирования плана"
+        if not stat.S_ISDIR(stat_result.st_mode) and self.size is not None and stat_result.st_size != self.size:
+            return "Пропущено: размер изменился после формирования плана"
+        return None
+
+
+def read_plan(plan_path: str) -> List[Tuple[Dict, List[PlannedItem]]]:
+    """
+    Читает план удаления.
+
+    :param plan_path: Путь к файлу плана.
+    :return: Список пар (описание строки таблицы, элементы на удаление) в порядке строк таблицы.
+             Для строк, папка которых не прошла проверку, описание содержит результат проверки ("check").
+    """
+    rules: Dict[int, Dict] = {}
+    paths: Dict[int, List[PlannedItem]] = {}
+    with gzip.open(plan_path, "rt", encoding="utf-8") as plan_file:
+        for line in plan_file:
+            record = json.loads(line)
+            if isinstance(record, dict):
+                rules[record["rule"]["row_index"]] = record["rule"]
+                paths.setdefault(record["rule"]["row_index"], [])
+            else:
+                row_index, *item = record
+                paths.setdefault(row_index, []).append(PlannedItem(*item))
+    return [(rules[row_index], paths[row_index]) for row_index in sorted(rules)]
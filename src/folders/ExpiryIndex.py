@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import hashlib
+import datetime
+import threading
+from typing import List, Tuple, Iterable, Optional
+from src.folders.sqlite_store import connect, write_transaction
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+# Время истечения для дат, срок хранения которых не может истечь (выход за допустимый диапазон дат)
+NEVER = datetime.datetime.max.isoformat()
+
+
+class ExpiryIndex:
+    """
+    Индекс времени истечения срока хранения в SQLite. Для каждого правила хранит найденные при полном обходе
+    элементы с ещё не истёкшим сроком и оценку времени истечения (дата + смещение срока хранения).
+    Запуск между полными обходами выбирает по индексу (по возрастанию времени истечения) только элементы,
+    срок которых подошёл, и не обходит дерево папок.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        """
+        Инициализатор
+        :param db_path: Путь к файлу базы данных.
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = connect(db_path)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS items (rule_key TEXT, path TEXT, is_dir INTEGER, "
+                                     "expires_at TEXT, PRIMARY KEY (rule_key, path))")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS items_expiry ON items (rule_key, expires_at)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS scans (rule_key TEXT PRIMARY KEY, scanned_at TEXT)")
+
+    @staticmethod
+    def rule_key(folder_path: str, regex_pattern: str, date_modification: str, is_file: bool, interval: str) -> str:
+        """
+        Ключ правила в индексе. Включает маску, источник даты и срок хранения: при их изменении
+        оценки времени истечения пересчитываются полным обходом.
+        """
+        signature = "|".join([os.path.normcase(os.path.normpath(folder_path)), regex_pattern,
+                              date_modification.lower().strip(), str(is_file), interval.lower().strip()])
+        return hashlib.sha1(signature.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _expires_at(expiry_time: Optional[datetime.datetime]) -> str:
+        return expiry_time.isoformat() if expiry_time is not None else NEVER
+
+    def needs_full_scan(self, rule_key: str, current_time: datetime.datetime, full_scan_hours: float) -> bool:
+        """
+        Проверяет, нужен ли полный обход правила (индекс не заполнен, полный обход был давно
+        или индекс заблокирован другим процессом)
+        """
+        try:
+            with self._lock:
+                row = self._connection.execute("SELECT scanned_at FROM scans WHERE rule_key = ?",
+                                               (rule_key,)).fetchone()
+        except sqlite3.OperationalError as e:
+            logger.error("Не удалось прочитать индекс времени истечения: %s", e)
+            return True
+        return row is None or \
+            current_time - datetime.datetime.fromisoformat(row[0]) >= datetime.timedelta(hours=full_scan_hours)
+
+    def replace_rule(self, rule_key: str, items: Iterable[Tuple[str, bool, Optional[datetime.datetime]]],
+                     current_time: datetime.datetime) -> None:
+        """
+        Заменяет элементы правила результатами полного обхода.
+
+        :param items: Элементы с неистёкшим сроком: (путь, папка ли, оценка времени истечения).
+        :param current_time: Время полного обхода.
+        """
+        with write_transaction(self._connection, self._lock, "индекс времени истечения"):
+            self._connection.execute("DELETE FROM items WHERE rule_key = ?", (rule_key,))
+            self._connection.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?)", [
+                (rule_key, path, int(is_dir), self._expires_at(expiry_time)) for path, is_dir, expiry_time in items])
+            self._connection.execute("INSERT OR REPLACE INTO scans VALUES (?, ?)",
+                                     (rule_key, current_time.isoformat()))
+
+    def due_items(self, rule_key: str, current_time: datetime.datetime) -> List[Tuple[str, bool]]:
+        """Элементы правила, оценка времени истечения которых наступила: (путь, папка ли)"""
+        with self._lock:
+            rows = self._connection.execute("SELECT path, is_dir FROM items WHERE rule_key = ? AND expires_at <= ? "
+                                            "ORDER BY expires_at", (rule_key, current_time.isoformat())).fetchall()
+        return [(path, bool(is_dir)) for path, is_dir in rows]
+
+    def reschedule(self, rule_key: str, items: Iterable[Tuple[str, Optional[datetime.datetime]]]) -> None:
+        """Обновляет оценку времени истечения элементов: (путь, время истечения)"""
+        with write_transaction(self._connection, self._lock, "индекс времени истечения"):
+            self._connection.executemany("UPDATE items SET expires_at = ? WHERE rule_key = ? AND path = ?", [
+                (self._expires_at(expiry_time), rule_key, path) for path, expiry_time in items])
+
+    def remove(self, rule_key: str, paths: Iterable[str]) -> None:
+        """Удаляет элементы из индекса (удалённые или отсутствующие)"""
+        with write_transaction(self._connection, self._lock, "индекс времени истечения"):
+            self._connection.executemany("DELETE FROM items WHERE rule_key = ? AND path = ?",
+                                         [(rule_key, path) for path in paths])
+
+    def retain_rules(self, rule_keys: Iterable[str]) -> None:
+        """Удаляет данные правил, которых больше нет в таблице (или у которых изменились маска/источник даты)"""
+        with write_transaction(self._connection, self._lock, "индекс времени истечения"):
+            self._connection.execute("CREATE TEMP TABLE IF NOT EXISTS active_rules (rule_key TEXT PRIMARY KEY)")
+            self._connection.execute("DELETE FROM active_rules")
+            self._connection.executemany("INSERT OR IGNORE INTO active_rules VALUES (?)",
+                                         [(rule_key,) for rule_key in rule_keys])
+            self._connection.execute("DELETE FROM items WHERE rule_key NOT IN (SELECT rule_key FROM active_rules)")
+            self._connection.execute("DELETE FROM scans WHERE rule_key NOT IN (SELECT rule_key FROM active_rules)")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,49 @@
+import os
+from typing import Optional
+
+
+class FolderEntry:
+    """
+    Элемент папки (файл или папка), найденный при обходе через os.scandir.
+    Хранит результат stat(), чтобы метаданные элемента запрашивались не более одного раза за запуск.
+    """
+
+    __slots__ = ("path", "name", "is_dir", "date", "_dir_entry", "_stat")
+
+    def __init__(self, path: str, name: str, is_dir: bool, dir_entry: Optional[os.DirEntry] = None,
+                 stat_result: Optional[os.stat_result] = None) -> None:
+        """
+        Инициализатор
+        :param path: Полный путь к элементу.
+        :param name: Имя элемента.
+        :param is_dir: True-Папка, False-Файл.
+        :param dir_entry: Объект os.DirEntry, полученный при обходе (содержит закэшированный stat).
+        :param stat_result: Уже известный результат stat() элемента.
+        """
+        self.path = path
+        self.name = name
+        self.is_dir = is_dir
+        self.date = None  # Дата элемента, если она уже определена (например, взята из каталога сканирования)
+        self._dir_entry = dir_entry
+        self._stat = stat_result
+
+    @classmethod
+    def from_dir_entry(cls, dir_entry: os.DirEntry, is_dir: bool) -> "FolderEntry":
+        """Создаёт запись из os.DirEntry"""
+        return cls(dir_entry.path, dir_entry.name, is_dir, dir_entry=dir_entry)
+
+    def stat(self) -> os.stat_result:
+        """Возвращает результат stat() элемента. Системный вызов выполняется только при первом обращении"""
+        if self._stat is None:
+            self._stat = self._dir_entry.stat() if self._dir_entry is not None else os.stat(self.path)
+            self._dir_entry = None
+        return self._stat
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __str__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"FolderEntry({self.path!r})"
@@ -1,14 +1,20 @@
 from collections import namedtuple
 from abc import ABC, abstractmethod
 import os
-from typing import List, Dict
+from typing import List, Dict, Union, Iterable, Iterator, Tuple
 from src.user_format_handlers.work_with_user_format import *
+from src.folders.FolderEntry import FolderEntry
+from src.folders.IoThrottle import throttled
+from src.logger.logger_settings import summarize
 import shutil
 
 
 class FolderContentLoader(ABC):
     """Абстрактный класс для загрузки содержимого."""
 
+    visited = 0  # Количество элементов, просмотренных при обходе (для показателей запуска)
+    throttle = None  # Ограничение частоты обращений к серверу/диску (IoThrottle)
+
     def __init__(self, path: str, regex_pattern: str, user_date_format: str, re_compile_date_format: re.Pattern,
                  is_file: bool) -> None:
         """ Инициализатор
@@ -33,6 +39,10 @@ class FolderContentLoader(ABC):
         """
         pass
 
+    def iter_contents(self) -> Iterator[Union[str, FolderEntry]]:
+        """Возвращает подходящие файлы/папки по одному (для потоковой обработки)"""
+        yield from self.load_contents()
+
 
 class RecursiveFolderContentLoader(FolderContentLoader):
     """Класс для рекурсивной загрузки содержимого папки с подпапками. Файлы и папки по формату"""
@@ -48,17 +58,153 @@ class RecursiveFolderContentLoader(FolderContentLoader):
             else:
                 contents.extend([os.path.join(root, _dir) for _dir in dirs if
                                  validator.check_pattern(_dir)])
-        logger.debug("Полученные папки и файлы, подходящие под формат: %s", contents)
+        logger.debug("Полученные папки и файлы, подходящие под формат: %s", summarize(contents))
+        return contents
+
+
+class ScandirFolderContentLoader(FolderContentLoader):
+    """
+    Класс для рекурсивной загрузки содержимого папки через os.scandir.
+    Возвращает записи FolderEntry с закэшированным результатом stat(), чтобы источники даты
+    не запрашивали метаданные элемента повторно.
+    """
+
+    def get_validator(self) -> FileNameValidator:
+        """Создаёт валидатор имён по пользовательскому формату"""
+        pattern_replacer = PatternReplacer(self.user_date_format, self.re_compile_date_format, self.regex_pattern)
+        return FileNameValidator(pattern_replacer)
+
+    def load_contents(self) -> List[FolderEntry]:
+        contents = list(self.iter_contents())
+        logger.debug("Полученные папки и файлы, подходящие под формат: %s", summarize(contents))
+        return contents
+
+    def iter_contents(self) -> Iterator[FolderEntry]:
+        validator = self.get_validator()
+        return (entry for entry in self.iter_entries() if validator.check_pattern(entry.name))
+
+    def descend_into(self, entry: FolderEntry) -> bool:
+        """
+        Определяет, нужно ли обходить содержимое найденной папки (вызывается для папок при is_file=False).
+        Переопределяется в подклассах.
+        """
+        return True
+
+    def iter_entries(self):
+        """
+        Обходит дерево папок в том же порядке, что и os.walk (сверху вниз, символические ссылки на папки
+        не раскрываются). Возвращает элементы нужного типа (файлы или папки).
+        """
+        self.visited = 0
+        stack = [self.path]
+        while stack:
+            current_dir = stack.pop()
+            try:
+                with throttled(self.throttle), os.scandir(current_dir) as it:
+                    dir_entries = list(it)
+            except FileNotFoundError:
+                # Папка могла быть удалена во время потоковой обработки
+                logger.debug("Папка не найдена: %s", current_dir)
+                continue
+            except OSError as e:
+                logger.error("Не удалось прочитать папку %s: %s", current_dir, e)
+                continue
+
+            self.visited += len(dir_entries)
+            sub_dirs = []
+            for dir_entry in dir_entries:
+                try:
+                    is_dir = dir_entry.is_dir()
+                except OSError:
+                    is_dir = False
+                descend = is_dir and not dir_entry.is_symlink()
+                if is_dir != self.is_file:
+                    entry = FolderEntry.from_dir_entry(dir_entry, is_dir)
+                    if is_dir and not self.descend_into(entry):
+                        descend = False
+                    yield entry
+                if descend:
+                    sub_dirs.append(dir_entry.path)
+            stack.extend(reversed(sub_dirs))
+
+
+class PruningFolderContentLoader(ScandirFolderContentLoader):
+    """
+    Загрузчик папок, который решает вопрос об удалении во время обхода.
+    Содержимое папки, подлежащей удалению, не обходится: shutil.rmtree удалит его вместе с родителем,
+    поэтому вложенные совпадения не попадают ни в список на удаление, ни в отчёт.
+    Возвращает только элементы, срок хранения которых истёк.
+    """
+
+    def __init__(self, path: str, regex_pattern: str, user_date_format: str, re_compile_date_format: re.Pattern,
+                 is_file: bool, storage_period_handler, current_date) -> None:
+        """
+        Инициализатор
+        :param storage_period_handler: Обработчик условия хранения (StoragePeriodFunction).
+        :param current_date: Текущая дата.
+        """
+        super().__init__(path, regex_pattern, user_date_format, re_compile_date_format, is_file)
+        self.storage_period_handler = storage_period_handler
+        self.current_date = current_date
+        self._validator = None
+        self._expired: List[FolderEntry] = []
+        self.matched = 0  # Количество элементов, подходящих под формат (включая элементы с неистёкшим сроком)
+
+    def load_contents(self) -> List[FolderEntry]:
+        contents = list(self.iter_contents())
+        logger.debug("Папки и файлы на удаление, найденные при обходе: %s", summarize(contents))
         return contents
 
+    def iter_contents(self) -> Iterator[FolderEntry]:
+        self._validator = self.get_validator()
+        self._expired = []
+        self.matched = 0
+        for entry in self.iter_entries():
+            # Папки проверяются во время обхода в descend_into, файлы - здесь
+            if not entry.is_dir and self._is_expired_match(entry):
+                self._expired.append(entry)
+            yield from self._expired
+            self._expired.clear()
+
+    def descend_into(self, entry: FolderEntry) -> bool:
+        if self._is_expired_match(entry):
+            self._expired.append(entry)
+            return False
+        return True
+
+    def _is_expired_match(self, entry: FolderEntry) -> bool:
+        if not self._validator.check_pattern(entry.name):
+            return False
+        self.matched += 1
+        return self.storage_period_handler.is_item_expired(entry, self.current_date)
+
+
+class PreloadedContentLoader(FolderContentLoader):
+    """Загрузчик, возвращающий элементы, найденные заранее (например, общим обходом нескольких правил)"""
+
+    def __init__(self, path: str, contents: List[FolderEntry]) -> None:
+        """
+        Инициализатор
+        :param path: Путь к корневой папке правила.
+        :param contents: Найденные элементы, подходящие под пользовательский формат.
+        """
+        self.path = path
+        self.contents = contents
+
+    def load_contents(self) -> List[FolderEntry]:
+        return self.contents
+
 
 # Определение именованного кортежа
-CleanResult = namedtuple('CleanResult', ['status', 'comment'])
+# size - освобождённый объём в байтах (None, если не определялся)
+CleanResult = namedtuple('CleanResult', ['status', 'comment', 'size'], defaults=[None])
 
 
 class FolderCleaner:
     """Класс для очистки папки от указанных файлов."""
 
+    throttle = None  # Ограничение частоты обращений к серверу/диску (IoThrottle)
+
     def clean(self, items_to_delete: List[str]) -> Dict[str, CleanResult]:
         """
         Удаляет указанные файлы и папки.
@@ -74,43 +220,60 @@ class FolderCleaner:
                 "Нет файлов на удаление": CleanResult(status="Выполнено", comment="Список файлов на удаление пуст")}
             return report_dict
 
+        report_dict.update(self.iter_clean(items_to_delete))
+        return report_dict
+
+    def iter_clean(self, items_to_delete: Iterable[str]) -> Iterator[Tuple[str, CleanResult]]:
+        """
+        Удаляет файлы и папки по мере поступления путей (для потоковой обработки).
+
+        :param items_to_delete: Пути к файлам/папкам, которые нужно удалить.
+        :return: Пары (путь, CleanResult).
+        """
         for path in items_to_delete:
-            try:
-                if os.path.isfile(path):
-                    os.remove(path)
-                    report_dict[path] = CleanResult(status="Выполнено", comment="Файл удалён")
-                elif os.path.isdir(path):
-                    shutil.rmtree(path)
-                    report_dict[path] = CleanResult(status="Выполнено", comment="Папка удалена")
-                else:
-                    report_dict[path] = CleanResult(status="Не выполнено", comment="Неизвестный тип или не существует")
-            except FileNotFoundError:
-                report_dict[path] = CleanResult(status="Не выполнено", comment="Файл или папка не найдены")
-            except PermissionError:
-                report_dict[path] = CleanResult(status="Не выполнено", comment="Недостаточно прав доступа")
-            except OSError as e:
-                if 'being used by another process' in str(e):
-                    report_dict[path] = CleanResult(status="Не выполнено",
-                                                    comment="Файл или папка используются другим процессом")
-                elif 'path too long' in str(e).lower():
-                    report_dict[path] = CleanResult(status="Не выполнено", comment="Слишком длинный путь")
-                else:
-                    report_dict[path] = CleanResult(status="Не выполнено", comment=f"Ошибка OSError: {e}")
-            except ValueError as e:
-                report_dict[path] = CleanResult(status="Не выполнено", comment=f"Ошибка скрипта: ValueError: {e}")
-            except TypeError as e:
-                report_dict[path] = CleanResult(status="Не выполнено", comment=f"Ошибка скрипта: TypeError: {e}")
-            except Exception as e:
-                report_dict[path] = CleanResult(status="Не выполнено",
-                                                comment=f"Ошибка скрипта: Неизвестная ошибка: {e}")
+            with throttled(self.throttle):
+                result = self.delete(path)
+            yield path, result
 
-        return report_dict
+    @staticmethod
+    def delete(path: str) -> CleanResult:
+        """Удаляет один файл или папку и возвращает результат"""
+        try:
+            if os.path.isfile(path):
+                os.remove(path)
+                return CleanResult(status="Выполнено", comment="Файл удалён")
+            elif os.path.isdir(path):
+                shutil.rmtree(path)
+                return CleanResult(status="Выполнено", comment="Папка удалена")
+            else:
+                return CleanResult(status="Не выполнено", comment="Неизвестный тип или не существует")
+        except Exception as e:
+            return FolderCleaner.error_result(e)
+
+    @staticmethod
+    def error_result(error: Exception) -> CleanResult:
+        """Преобразует исключение, возникшее при удалении, в CleanResult"""
+        if isinstance(error, FileNotFoundError):
+            return CleanResult(status="Не выполнено", comment="Файл или папка не найдены")
+        if isinstance(error, PermissionError):
+            return CleanResult(status="Не выполнено", comment="Недостаточно прав доступа")
+        if isinstance(error, OSError):
+            if 'being used by another process' in str(error):
+                return CleanResult(status="Не выполнено", comment="Файл или папка используются другим процессом")
+            elif 'path too long' in str(error).lower():
+                return CleanResult(status="Не выполнено", comment="Слишком длинный путь")
+            return CleanResult(status="Не выполнено", comment=f"Ошибка OSError: {error}")
+        if isinstance(error, ValueError):
+            return CleanResult(status="Не выполнено", comment=f"Ошибка скрипта: ValueError: {error}")
+        if isinstance(error, TypeError):
+            return CleanResult(status="Не выполнено", comment=f"Ошибка скрипта: TypeError: {error}")
+        return CleanResult(status="Не выполнено", comment=f"Ошибка скрипта: Неизвестная ошибка: {error}")
 
 
 class Folder:
     """Класс, представляющий папку на файловой системе."""
 
-    def __init__(self, path: str, content_loader: RecursiveFolderContentLoader, cleaner: FolderCleaner) -> None:
+    def __init__(self, path: str, content_loader: FolderContentLoader, cleaner: FolderCleaner) -> None:
         """
         Инициализатор
         :param path: Путь к корневой папке ( из таблицы пользователя ).
@@ -126,9 +289,9 @@ class Folder:
         """Получает список путей файлов/папок, которые подходят под пользовательскую маску"""
         return self.content_loader.load_contents()
 
-    def add_files_to_delete(self, files: List[str]) -> None:
-        """Добавляет список путей к файлам/папкам на удаление в общий список"""
-        self.deleted_files.extend(files)
+    def add_files_to_delete(self, files: List[Union[str, FolderEntry]]) -> None:
+        """Добавляет список путей к файлам/папкам (или записей FolderEntry) на удаление в общий список"""
+        self.deleted_files.extend(os.fspath(file) for file in files)
 
     def clean(self) -> Dict[str, CleanResult]:
         """Удаляет все элементы из списка на удаление"""
@@ -136,5 +299,9 @@ class Folder:
         self.deleted_files = []
         return clean_status
 
+    def iter_clean(self, files: Iterable[Union[str, FolderEntry]]) -> Iterator[Tuple[str, CleanResult]]:
+        """Удаляет элементы по мере поступления, не накапливая список на удаление"""
+        return self.cleaner.iter_clean(os.fspath(file) for file in files)
+
     def __str__(self) -> str:
         return f"{self.path}"
@@ -0,0 +1,181 @@
+import os
+import json
+import errno
+import time
+import datetime
+import queue
+import threading
+from typing import Dict, List, Iterable, Optional, Set
+from src.folders.FolderOperations import CleanResult
+from src.folders.check_folder import checking_folder
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+EMPTY_REPORT_KEY = "Нет файлов на удаление"
+UNREACHABLE_COMMENT = "Не удалось подключиться к папке"
+# Ошибки подключения к серверу (в отличие от отсутствия папки на доступном сервере)
+CONNECTION_ERRNOS = {errno.ETIMEDOUT, errno.EHOSTUNREACH, errno.EHOSTDOWN, errno.ENETUNREACH, errno.ENETDOWN,
+                     errno.ECONNREFUSED, errno.ECONNRESET}
+# Windows: сетевой путь не найден, сетевое имя недоступно или не найдено, сеть или сервер недоступны, таймаут
+CONNECTION_WINERRORS = {51, 53, 64, 67, 121, 1231, 1232}
+
+
+def is_connection_error(error: OSError) -> bool:
+    """Ошибка означает недоступность сервера, а не отсутствие папки или прав на доступном сервере"""
+    return error.errno in CONNECTION_ERRNOS or getattr(error, "winerror", None) in CONNECTION_WINERRORS
+
+
+class FolderProbe:
+    """
+    Проверка доступности корневых папок всех строк таблицы до начала обработки.
+    Папки проверяются параллельно ограниченным числом потоков, общее время проверки ограничено: недоступный
+    сервер не задерживает запуск на время ожидания SMB для каждой папки по очереди.
+    Папки, недоступные в предыдущих запусках (нет ответа за отведённое время или ошибка подключения к серверу),
+    сохраняются в файл (негативный кэш) и не проверяются до истечения интервала, который удваивается после каждой
+    неудачной проверки. Отсутствие папки на доступном сервере - результат только этой папки, в кэш он не попадает.
+    """
+
+    def __init__(self, cache_path: str, timeout: float = 30.0, backoff_hours: float = 20.0,
+                 max_backoff_hours: float = 168.0, max_workers: int = 32) -> None:
+        """
+        Инициализатор
+        :param cache_path: Путь к файлу негативного кэша (JSON).
+        :param timeout: Максимальное время проверки папок, секунд.
+        :param backoff_hours: Интервал до повторной проверки после первой неудачи, часов.
+        :param max_backoff_hours: Максимальный интервал до повторной проверки, часов.
+        :param max_workers: Максимальное число потоков проверки.
+        """
+        self.cache_path = cache_path
+        self.timeout = timeout
+        self.backoff_hours = backoff_hours
+        self.max_backoff_hours = max_backoff_hours
+        self.max_workers = max(1, max_workers)
+        self.cache: Dict[str, Dict] = self._load_cache()
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as cache_file:
+                return json.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.error("Не удалось прочитать кэш недоступных папок %s: %s", self.cache_path, e)
+            return {}
+
+    def _save_cache(self) -> None:
+        temp_path = self.cache_path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as cache_file:
+                json.dump(self.cache, cache_file, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            logger.error("Не удалось сохранить кэш недоступных папок %s: %s", self.cache_path, e)
+
+    @staticmethod
+    def key(folder_path: str) -> str:
+        return os.path.normcase(os.path.normpath(folder_path))
+
+    def probe_all(self, folder_paths: Iterable[str],
+                  current_time: datetime.datetime) -> Dict[str, Optional[Dict[str, CleanResult]]]:
+        """
+        Проверяет папки.
+
+        :param folder_paths: Пути к корневым папкам строк таблицы.
+        :param current_time: Время запуска скрипта.
+        :return: Словарь: путь -> результат как у checking_folder (None - папка доступна). Папок, до проверки
+                 которых очередь не дошла за отведённое время, в словаре нет: они проверяются при обработке строк.
+        """
+        results: Dict[str, Optional[Dict[str, CleanResult]]] = {}
+        pending: List[str] = []
+        for folder_path in dict.fromkeys(folder_paths):
+            cached = self.cache.get(self.key(folder_path))
+            if cached and current_time < datetime.datetime.fromisoformat(cached["retry_at"]):
+                results[folder_path] = self._unreachable(f"{UNREACHABLE_COMMENT} (недоступна в предыдущих запусках, "
+                                                         f"повторная проверка после {cached['retry_at']})")
+            else:
+                pending.append(folder_path)
+        if results:
+            logger.info("Пропущены папки, недоступные в предыдущих запусках: %s", len(results))
+
+        # Потоки проверки - фоновые (daemon): зависшее обращение к серверу не задерживает завершение скрипта.
+        # Их число ограничено: зависшие вызовы занимают не больше max_workers потоков
+        probe_results: Dict[str, Optional[Dict[str, CleanResult]]] = {}
+        started: Set[str] = set()
+        unreachable: Set[str] = set()  # Папки с ошибкой подключения к серверу
+        folder_queue: "queue.Queue[str]" = queue.Queue()
+        for folder_path in pending:
+            folder_queue.put(folder_path)
+        stop = threading.Event()
+        worker_args = (folder_queue, stop, started, probe_results, unreachable)
+        threads = [threading.Thread(target=self._probe_worker, args=worker_args, daemon=True)
+                   for _ in range(min(self.max_workers, len(pending)))]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + self.timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        stop.set()
+
+        skipped = 0
+        for folder_path in pending:
+            if folder_path in probe_results:
+                results[folder_path] = probe_results[folder_path]
+            elif folder_path not in started:
+                skipped += 1
+                continue
+            else:
+                logger.error("Папка не ответила за %s с: %s", self.timeout, folder_path)
+                results[folder_path] = self._unreachable(f"{UNREACHABLE_COMMENT} (нет ответа за {self.timeout} с)")
+                unreachable.add(folder_path)
+            self._update_cache(folder_path, folder_path in unreachable, current_time)
+        if skipped:
+            logger.warning("Не проверены за %s с (будут проверены при обработке строк): %s", self.timeout, skipped)
+        self._save_cache()
+        return results
+
+    @classmethod
+    def _probe_worker(cls, folder_queue: "queue.Queue[str]", stop: threading.Event, started: Set[str],
+                      probe_results: Dict, unreachable: Set[str]) -> None:
+        """Проверяет папки из очереди, пока она не опустеет или не истечёт время проверки"""
+        while not stop.is_set():
+            try:
+                folder_path = folder_queue.get_nowait()
+            except queue.Empty:
+                return
+            started.add(folder_path)
+            cls._probe(folder_path, probe_results, unreachable)
+
+    @staticmethod
+    def _probe(folder_path: str, probe_results: Dict, unreachable: Set[str]) -> None:
+        try:
+            os.stat(folder_path)
+        except OSError as e:
+            if is_connection_error(e):
+                logger.error("Нет подключения к серверу папки %s: %s", folder_path, e)
+                unreachable.add(folder_path)
+                probe_results[folder_path] = FolderProbe._unreachable(UNREACHABLE_COMMENT)
+                return
+        try:
+            probe_results[folder_path] = checking_folder(folder_path)
+        except Exception as e:
+            logger.error("Ошибка проверки папки %s: %s", folder_path, e)
+            probe_results[folder_path] = FolderProbe._unreachable(UNREACHABLE_COMMENT)
+
+    @staticmethod
+    def _unreachable(comment: str) -> Dict[str, CleanResult]:
+        return {EMPTY_REPORT_KEY: CleanResult(status="Не выполнено", comment=comment)}
+
+    def _update_cache(self, folder_path: str, unreachable: bool, current_time: datetime.datetime) -> None:
+        """Недоступная папка попадает в кэш с удвоенным интервалом, папка с ответом сервера удаляется из кэша"""
+        key = self.key(folder_path)
+        if not unreachable:
+            # Сервер отвечает (папка доступна, отсутствует или недоступна для записи)
+            self.cache.pop(key, None)
+            return
+        failures = self.cache.get(key, {}).get("failures", 0) + 1
+        backoff_hours = min(self.backoff_hours * 2 ** (failures - 1), self.max_backoff_hours)
+        self.cache[key] = {"path": folder_path, "failures": failures,
+                           "last_failure": current_time.isoformat(timespec="seconds"),
+                           "retry_at": (current_time + datetime.timedelta(hours=backoff_hours)).isoformat(
+                               timespec="seconds")}
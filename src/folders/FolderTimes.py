@@ -1,20 +1,25 @@
 import os
 import platform
 import datetime
-from typing import Union
+from typing import Union, Optional
+
+IS_WINDOWS = platform.system() == 'Windows'
 
 
 class FolderCreationTime:
     """Класс для получения времени создания и модификации папки."""
 
-    def __init__(self, path: str) -> None:
+    def __init__(self, path: str, stat_result: Optional[os.stat_result] = None) -> None:
         """
         Инициализирует объект FolderCreationTime.
 
         Args:
             path (str): Путь к папке.
+            stat_result (os.stat_result, optional): Уже полученный результат stat(). Если передан,
+                повторный системный вызов не выполняется.
         """
         self.path = path
+        self.stat_result = stat_result
 
     def get_creation_time(self) -> Union[datetime.datetime, None]:
         """
@@ -24,10 +29,12 @@ class FolderCreationTime:
             Union[datetime.datetime, None]: Время создания в формате datetime.datetime
             или None, если время создания не может быть определено.
         """
-        if platform.system() == 'Windows':
+        if self.stat_result is not None and IS_WINDOWS:
+            creation_time = self.stat_result.st_ctime
+        elif IS_WINDOWS:
             creation_time = os.path.getctime(self.path)
         else:
-            stat = os.stat(self.path)
+            stat = self.stat_result if self.stat_result is not None else os.stat(self.path)
             try:
                 creation_time = stat.st_birthtime
             except AttributeError:
@@ -43,6 +50,8 @@ class FolderCreationTime:
             Union[datetime.datetime, None]: Время модификации в формате datetime.datetime
             или None, если время модификации не может быть определено.
         """
+        if self.stat_result is not None:
+            return datetime.datetime.fromtimestamp(self.stat_result.st_mtime)
         try:
             modification_time = os.path.getmtime(self.path)
             return datetime.datetime.fromtimestamp(modification_time)
@@ -0,0 +1,90 @@
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Optional
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+ADJUST_INTERVAL = 1.0  # Интервал пересчёта допустимой частоты операций, секунд
+BACKOFF_FACTOR = 0.5  # Во сколько раз снижается частота при задержке выше целевой
+INCREASE_FRACTION = 0.1  # Доля максимальной частоты, на которую частота растёт при задержке ниже целевой
+LATENCY_SMOOTHING = 0.2  # Вес последней операции в сглаженной задержке
+BURST_SECONDS = 0.1  # Запас операций (ёмкость корзины) в секундах работы на текущей частоте
+
+
+class IoThrottle:
+    """
+    Адаптивное ограничение частоты операций с файловым сервером (чтение папки, stat, удаление).
+    Операции выполняются по жетонам (token bucket), жетоны пополняются с допустимой частотой.
+    Задержка операций измеряется: если сглаженная задержка выше целевой, частота снижается вдвое,
+    если ниже - постепенно растёт до максимальной (AIMD). Поэтому при нагрузке на сервер от других
+    пользователей скрипт замедляется, а на свободном сервере работает с максимальной частотой.
+    Потокобезопасен: один экземпляр используется всеми потоками, работающими с сервером/диском.
+    """
+
+    def __init__(self, max_rate: float, min_rate: float = 5.0, target_latency: float = 0.05) -> None:
+        """
+        Инициализатор
+        :param max_rate: Максимальная частота операций, в секунду.
+        :param min_rate: Минимальная частота операций, в секунду.
+        :param target_latency: Целевая задержка одной операции, секунд.
+        """
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.target_latency = target_latency
+        self.rate = max_rate
+        self.latency: Optional[float] = None  # Сглаженная задержка операций
+        self._tokens = self._capacity()
+        self._last_refill = time.monotonic()
+        self._last_adjust = self._last_refill
+        self._lock = threading.Lock()
+
+    def _capacity(self) -> float:
+        return max(1.0, self.rate * BURST_SECONDS)
+
+    def acquire(self) -> None:
+        """Ожидает жетон на одну операцию. Жетон резервируется сразу, ожидание выполняется вне блокировки"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity(), self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+    def record(self, latency: float) -> None:
+        """Учитывает задержку выполненной операции и при необходимости пересчитывает частоту"""
+        with self._lock:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+            now = time.monotonic()
+            if now - self._last_adjust < ADJUST_INTERVAL:
+                return
+            self._last_adjust = now
+            rate = self.rate
+            if self.latency > self.target_latency:
+                self.rate = max(self.min_rate, self.rate * BACKOFF_FACTOR)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * INCREASE_FRACTION)
+            if self.rate != rate:
+                logger.debug("Частота операций: %.1f -> %.1f в секунду (задержка %.1f мс)", rate, self.rate,
+                             self.latency * 1000)
+
+    @contextmanager
+    def operation(self):
+        """Выполняет операцию с ожиданием жетона и замером задержки"""
+        self.acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(time.perf_counter() - started)
+
+
+def throttled(throttle: Optional[IoThrottle]):
+    """Операция с ограничением частоты (без ограничения, если throttle не задан)"""
+    return throttle.operation() if throttle is not None else nullcontext()
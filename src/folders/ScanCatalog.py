@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import datetime
+import threading
+from typing import List, Dict, Tuple, Optional, NamedTuple, Iterable
+from src.folders.FolderEntry import FolderEntry
+from src.folders.IoThrottle import throttled
+from src.folders.FolderOperations import ScandirFolderContentLoader
+from src.logger.logger_settings import summarize
+from src.folders.sqlite_store import connect, write_transaction
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+# Папки, изменённые за последние секунды, не кэшируются: изменение в пределах той же отметки mtime было бы потеряно
+MTIME_SAFETY_SECONDS = 2
+
+
+class CachedDir(NamedTuple):
+    """Сохранённое состояние папки: mtime, вложенные папки для обхода и подходящие элементы с датами"""
+    mtime_ns: int
+    sub_dirs: List[str]
+    entries: List[Tuple[str, bool, Optional[str]]]  # (имя, папка ли, дата в формате ISO или None)
+
+
+class ScanCatalog:
+    """
+    Каталог сканирования в SQLite. Хранит для каждого правила mtime обойденных папок, подходящие элементы
+    и их даты. При следующем запуске перечитываются только папки, mtime которых изменился.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        """
+        Инициализатор
+        :param db_path: Путь к файлу базы данных.
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = connect(db_path)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS dirs (rule_key TEXT, dir_path TEXT, "
+                                     "mtime_ns INTEGER, sub_dirs TEXT, PRIMARY KEY (rule_key, dir_path))")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS entries (rule_key TEXT, dir_path TEXT, "
+                                     "name TEXT, is_dir INTEGER, date TEXT)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS entries_dir ON entries (rule_key, dir_path)")
+
+    @staticmethod
+    def rule_key(folder_path: str, regex_pattern: str, date_modification: str, is_file: bool) -> str:
+        """
+        Ключ правила в каталоге. Включает маску и источник даты, поэтому при их изменении
+        правило получает новый ключ и старые данные не используются.
+        """
+        signature = "|".join([os.path.normcase(os.path.normpath(folder_path)), regex_pattern,
+                              date_modification.lower().strip(), str(is_file)])
+        return hashlib.sha1(signature.encode("utf-8")).hexdigest()
+
+    def load_rule(self, rule_key: str) -> Dict[str, CachedDir]:
+        """Загружает сохранённое состояние всех папок правила (пустое, если база заблокирована другим процессом)"""
+        try:
+            with self._lock:
+                dir_rows = self._connection.execute("SELECT dir_path, mtime_ns, sub_dirs FROM dirs "
+                                                    "WHERE rule_key = ?", (rule_key,)).fetchall()
+                entry_rows = self._connection.execute("SELECT dir_path, name, is_dir, date FROM entries "
+                                                      "WHERE rule_key = ?", (rule_key,)).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.error("Не удалось прочитать каталог сканирования: %s", e)
+            return {}
+        cached = {dir_path: CachedDir(mtime_ns, json.loads(sub_dirs), []) for dir_path, mtime_ns, sub_dirs in dir_rows}
+        for dir_path, name, is_dir, date in entry_rows:
+            if dir_path in cached:
+                cached[dir_path].entries.append((name, bool(is_dir), date))
+        return cached
+
+    def save_rule(self, rule_key: str, changed: Dict[str, CachedDir], removed: Iterable[str]) -> None:
+        """
+        Сохраняет изменения правила.
+
+        :param changed: Перечитанные папки.
+        :param removed: Папки, которые больше не встречаются при обходе.
+        """
+        stale = [(rule_key, dir_path) for dir_path in list(changed) + list(removed)]
+        with write_transaction(self._connection, self._lock, "каталог сканирования"):
+            self._connection.executemany("DELETE FROM dirs WHERE rule_key = ? AND dir_path = ?", stale)
+            self._connection.executemany("DELETE FROM entries WHERE rule_key = ? AND dir_path = ?", stale)
+            self._connection.executemany("INSERT INTO dirs VALUES (?, ?, ?, ?)", [
+                (rule_key, dir_path, cached.mtime_ns, json.dumps(cached.sub_dirs, ensure_ascii=False))
+                for dir_path, cached in changed.items()])
+            self._connection.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?)", [
+                (rule_key, dir_path, name, int(is_dir), date)
+                for dir_path, cached in changed.items() for name, is_dir, date in cached.entries])
+
+    def retain_rules(self, rule_keys: Iterable[str]) -> None:
+        """Удаляет данные правил, которых больше нет в таблице (или у которых изменились маска/источник даты)"""
+        with write_transaction(self._connection, self._lock, "каталог сканирования"):
+            self._connection.execute("CREATE TEMP TABLE IF NOT EXISTS active_rules (rule_key TEXT PRIMARY KEY)")
+            self._connection.execute("DELETE FROM active_rules")
+            self._connection.executemany("INSERT OR IGNORE INTO active_rules VALUES (?)",
+                                         [(rule_key,) for rule_key in rule_keys])
+            self._connection.execute("DELETE FROM dirs WHERE rule_key NOT IN (SELECT rule_key FROM active_rules)")
+            self._connection.execute("DELETE FROM entries WHERE rule_key NOT IN (SELECT rule_key FROM active_rules)")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class CatalogFolderContentLoader(ScandirFolderContentLoader):
+    """
+    Загрузчик, использующий каталог сканирования. Папка перечитывается, только если её mtime изменился,
+    для остальных папок подходящие элементы и их даты берутся из каталога.
+    Даты элементов определяются при перечитывании папки и записываются в FolderEntry.date.
+    """
+
+    def __init__(self, path: str, regex_pattern: str, user_date_format: str, re_compile_date_format,
+                 is_file: bool, catalog: ScanCatalog, rule_key: str, storage_period_handler) -> None:
+        """
+        Инициализатор
+        :param catalog: Каталог сканирования.
+        :param rule_key: Ключ правила в каталоге (ScanCatalog.rule_key).
+        :param storage_period_handler: Обработчик условия хранения, через который определяются даты элементов.
+        """
+        super().__init__(path, regex_pattern, user_date_format, re_compile_date_format, is_file)
+        self.catalog = catalog
+        self.rule_key = rule_key
+        self.storage_period_handler = storage_period_handler
+
+    def load_contents(self) -> List[FolderEntry]:
+        validator = self.get_validator()
+        cached_dirs = self.catalog.load_rule(self.rule_key)
+        changed: Dict[str, CachedDir] = {}
+        visited = set()
+        contents: List[FolderEntry] = []
+        rescanned = 0
+        self.visited = 0  # Учитываются только элементы перечитанных папок
+
+        stack = [self.path]
+        while stack:
+            current_dir = stack.pop()
+            visited.add(current_dir)
+            try:
+                with throttled(self.throttle):
+                    mtime_ns = os.stat(current_dir).st_mtime_ns
+            except OSError as e:
+                logger.error("Не удалось прочитать папку %s: %s", current_dir, e)
+                continue
+
+            cached = cached_dirs.get(current_dir)
+            if cached is None or cached.mtime_ns != mtime_ns:
+                cached = self._scan_dir(current_dir, mtime_ns, validator)
+                if cached is None:
+                    continue
+                rescanned += 1
+                if time.time() - mtime_ns / 1e9 > MTIME_SAFETY_SECONDS:
+                    changed[current_dir] = cached
+
+            for name, is_dir, date in cached.entries:
+                entry = FolderEntry(os.path.join(current_dir, name), name, is_dir)
+                entry.date = datetime.datetime.fromisoformat(date) if date else None
+                contents.append(entry)
+            stack.extend(reversed([os.path.join(current_dir, name) for name in cached.sub_dirs]))
+
+        self.catalog.save_rule(self.rule_key, changed, set(cached_dirs) - visited)
+        logger.debug("Каталог сканирования: папок обойдено %s, перечитано %s", len(visited), rescanned)
+        logger.debug("Полученные папки и файлы, подходящие под формат: %s", summarize(contents))
+        return contents
+
+    def _scan_dir(self, current_dir: str, mtime_ns: int, validator) -> Optional[CachedDir]:
+        """Перечитывает папку и определяет даты подходящих элементов"""
+        try:
+            with throttled(self.throttle), os.scandir(current_dir) as it:
+                dir_entries = list(it)
+        except OSError as e:
+            logger.error("Не удалось прочитать папку %s: %s", current_dir, e)
+            return None
+
+        self.visited += len(dir_entries)
+        sub_dirs, entries = [], []
+        for dir_entry in dir_entries:
+            try:
+                is_dir = dir_entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir and not dir_entry.is_symlink():
+                sub_dirs.append(dir_entry.name)
+            if is_dir != self.is_file and validator.check_pattern(dir_entry.name):
+                try:
+                    folder_date = self.storage_period_handler.get_date(FolderEntry.from_dir_entry(dir_entry, is_dir))
+                except Exception as e:
+                    logger.error("Ошибка: %s", e)
+                    folder_date = None
+                entries.append((dir_entry.name, is_dir, folder_date.isoformat() if folder_date else None))
+        return CachedDir(mtime_ns, sub_dirs, entries)
@@ -0,0 +1,28 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+# Время ожидания блокировки базы, занятой другим процессом (части строк выполняются в нескольких процессах), секунд
+BUSY_TIMEOUT_SECONDS = 60.0
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Открывает базу каталога/индекса с ожиданием блокировки, занятой другим процессом"""
+    return sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+
+
+@contextmanager
+def write_transaction(connection: sqlite3.Connection, lock: threading.Lock, description: str):
+    """
+    Транзакция записи. Каталог и индекс только ускоряют обход, поэтому если база осталась заблокированной
+    дольше BUSY_TIMEOUT_SECONDS, изменения не сохраняются (при следующем запуске папки обходятся заново),
+    а запуск продолжается.
+    """
+    try:
+        with lock, connection:
+            yield connection
+    except sqlite3.OperationalError as e:
+        logger.error("Не удалось сохранить %s: %s", description, e)
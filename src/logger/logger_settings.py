@@ -1,13 +1,88 @@
-from logging import getLogger, basicConfig, DEBUG, FileHandler
+import os
+import atexit
+from queue import Queue
+from itertools import islice
+from logging import getLogger, DEBUG, FileHandler, Formatter, Handler
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
 from datetime import datetime
 from src.utils.json_reader import ConfigParams
 
+FORMAT = '%(asctime)s : %(name)s : %(levelname)s : %(message)s'
+COLLECTION_LIMIT = 20  # Количество первых элементов коллекции, выводимых в журнал (log_collection_limit)
+
+_handler: Optional[Handler] = None
+_listener: Optional[QueueListener] = None
+
 
 def setup_logger(config_params: ConfigParams):
+    """
+    Настраивает журнал. При async_logging сообщения передаются через очередь и записываются в файл
+    фоновым потоком (QueueListener), поэтому запись на сетевой диск не задерживает обход папок.
+    Уровень журнала задаётся для всего скрипта (log_level) и отдельно для модулей (log_levels).
+    """
+    global _handler, _listener, COLLECTION_LIMIT
     logger = getLogger()
-    FORMAT = '%(asctime)s : %(name)s : %(levelname)s : %(message)s'
+    stop_logger()
+    if _handler is not None:
+        logger.removeHandler(_handler)
+
     file_handler = FileHandler(
-        f"{config_params.attached_file_path}\\Logger_{datetime.today().strftime('%d.%m.%Y')}.log")
+        os.path.join(config_params.attached_file_path, f"Logger_{datetime.today().strftime('%d.%m.%Y')}.log"))
     file_handler.setLevel(DEBUG)
-    basicConfig(level=DEBUG, format=FORMAT, handlers=[file_handler])
+    file_handler.setFormatter(Formatter(FORMAT))
+    if config_params.async_logging:
+        log_queue = Queue()
+        _handler = QueueHandler(log_queue)
+        _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        _listener.start()
+    else:
+        _handler = file_handler
+    logger.addHandler(_handler)
+
+    logger.setLevel(config_params.log_level.upper())
+    for module_name, level in (config_params.log_levels or {}).items():
+        getLogger(module_name).setLevel(level.upper())
+    COLLECTION_LIMIT = config_params.log_collection_limit
     return logger
+
+
+def stop_logger() -> None:
+    """Дожидается записи сообщений из очереди и останавливает фоновый поток журнала"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logger)
+
+
+class Summary:
+    """
+    Краткое представление коллекции для журнала: количество элементов и первые из них.
+    Строка формируется только при записи сообщения, то есть не формируется, если уровень журнала выше.
+    """
+
+    __slots__ = ("collection", "limit")
+
+    def __init__(self, collection, limit: Optional[int] = None) -> None:
+        self.collection = collection
+        self.limit = limit
+
+    def __str__(self) -> str:
+        limit = COLLECTION_LIMIT if self.limit is None else self.limit
+        if hasattr(self.collection, "items"):
+            first = [f"{key}: {value}" for key, value in islice(self.collection.items(), limit)]
+        else:
+            first = [str(item) for item in islice(self.collection, limit)]
+        count = len(self.collection)
+        more = f", ... (ещё {count - len(first)})" if count > len(first) else ""
+        return f"{count} эл: [{', '.join(first)}{more}]"
+
+
+def summarize(collection, limit: Optional[int] = None) -> Summary:
+    """Количество и первые элементы коллекции (для сообщений журнала о больших списках и словарях)"""
+    return Summary(collection, limit)
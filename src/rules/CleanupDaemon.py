@@ -0,0 +1,155 @@
+import os
+import datetime
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from src.excel.ExcelSheet import ExcelSheet
+from src.rules.Rule import Rule
+from src.rules.RuleExecutor import RuleExecutor, compile_rules
+from src.utils.json_reader import ConfigParams
+from src.utils.RunMetrics import RunMetrics
+from src.utils.StoragePeriodFunction import is_quota_interval
+from src.validators.check_Input_table import CheckInputTable, VALIDATION_CACHE_FILENAME
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+# Период запуска строк по единице интервала хранения, часов (если daemon_schedule_hours не задан)
+DEFAULT_SCHEDULE_HOURS = {"д": 1.0, "м": 24.0, "г": 168.0}
+
+
+def interval_unit(rule: Rule) -> str:
+    """Единица интервала хранения строки: "д", "м" или "г" ("1 год" -> "г", квота "10 ГБ" -> "д")"""
+    if is_quota_interval(rule.interval):
+        return "д"
+    return rule.interval.split()[1][0].lower()
+
+
+class RuleSchedule:
+    """
+    Расписание строк таблицы. Период запуска строки зависит от единицы её интервала хранения:
+    строки со сроком в днях выполняются чаще, строки со сроком в годах - реже, и их деревья не обходятся
+    при каждом запуске строк со сроком в днях.
+    """
+
+    def __init__(self, period_hours: Optional[Dict[str, float]] = None) -> None:
+        """
+        Инициализатор
+        :param period_hours: Период запуска по единице интервала хранения ({"д": 1, "м": 24, "г": 168}), часов.
+                             По умолчанию - DEFAULT_SCHEDULE_HOURS.
+        """
+        self.period_hours = dict(DEFAULT_SCHEDULE_HOURS if period_hours is None else period_hours)
+        self.next_run: Dict[Rule, datetime.datetime] = {}
+
+    def update(self, indexed_rules: List[Tuple[int, Rule]]) -> None:
+        """
+        Обновляет список строк после перечитывания таблицы. Для неизменившихся строк расписание сохраняется,
+        новые и изменённые строки выполняются при ближайшей проверке.
+        """
+        rules = {rule for _index, rule in indexed_rules}
+        self.next_run = {rule: next_run for rule, next_run in self.next_run.items() if rule in rules}
+
+    def due(self, indexed_rules: List[Tuple[int, Rule]], current_time: datetime.datetime) -> List[Tuple[int, Rule]]:
+        """Строки, время запуска которых наступило"""
+        return [(index, rule) for index, rule in indexed_rules
+                if self.next_run.get(rule, current_time) <= current_time]
+
+    def mark_run(self, indexed_rules: List[Tuple[int, Rule]], current_time: datetime.datetime) -> None:
+        """Назначает следующий запуск выполненных строк"""
+        for _index, rule in indexed_rules:
+            hours = self.period_hours.get(interval_unit(rule), 24.0)
+            self.next_run[rule] = current_time + datetime.timedelta(hours=hours)
+
+
+class CleanupDaemon:
+    """
+    Режим постоянной работы. Между запусками в памяти сохраняются правила, построенные по таблице,
+    результаты проверки доступности папок и каталог сканирования. Таблица перечитывается
+    (и проверяется заново) только при изменении даты изменения файла.
+    """
+
+    def __init__(self, config_params: ConfigParams,
+                 report: Callable[[List[List], datetime.datetime, Optional[RunMetrics]], None]) -> None:
+        """
+        Инициализатор
+        :param config_params: Параметры из config.json. Изменения config.json применяются после перезапуска.
+        :param report: Формирование отчёта по результатам запуска (строки отчёта, время запуска, показатели).
+        """
+        self.config_params = config_params
+        self.report = report
+        self.executor = RuleExecutor(config_params)
+        self.schedule = RuleSchedule(config_params.daemon_schedule_hours)
+        self.indexed_rules: List[Tuple[int, Rule]] = []
+        self._table_mtime_ns: Optional[int] = None
+        self._stop_event = threading.Event()
+
+    def reload_table(self) -> bool:
+        """Перечитывает таблицу, если она изменилась. Возвращает True, если таблица перечитана"""
+        try:
+            mtime_ns = os.stat(self.config_params.table_path).st_mtime_ns
+        except OSError as e:
+            logger.error("Нет доступа к таблице %s: %s", self.config_params.table_path, e)
+            return False
+        if mtime_ns == self._table_mtime_ns:
+            return False
+
+        exel_table = ExcelSheet(filename=self.config_params.table_path, min_row=2)
+        exel_rows = exel_table.get_data()
+        validation_cache_path = os.path.join(self.config_params.attached_file_path, VALIDATION_CACHE_FILENAME) \
+            if self.config_params.validation_cache else None
+        check = CheckInputTable(exel_rows, cache_path=validation_cache_path).check_validation()
+        exel_table.highlight_cells(check)
+        # Дата изменения берётся после закрашивания ячеек, чтобы собственное сохранение не вызывало перечитывания
+        try:
+            self._table_mtime_ns = os.stat(self.config_params.table_path).st_mtime_ns
+        except OSError:
+            self._table_mtime_ns = mtime_ns
+
+        if check:
+            logger.info("Строки не выполняются до исправления проблем в таблице")
+            self.indexed_rules = []
+        else:
+            self.indexed_rules = compile_rules(exel_rows)
+            self.executor.retain_catalog(self.indexed_rules)
+        self.schedule.update(self.indexed_rules)
+        logger.info("Таблица перечитана: строк %s", len(self.indexed_rules))
+        return True
+
+    def run_once(self, current_time: datetime.datetime) -> List[Tuple[int, Rule]]:
+        """
+        Перечитывает таблицу (если она изменилась) и выполняет строки, время запуска которых наступило.
+
+        :return: Выполненные строки.
+        """
+        self.reload_table()
+        due_rules = self.schedule.due(self.indexed_rules, current_time)
+        if not due_rules:
+            return []
+        logger.info("Запуск строк по расписанию: %s", len(due_rules))
+        run_metrics = None
+        if self.config_params.run_summary or self.config_params.metrics_textfile:
+            run_metrics = RunMetrics(current_time)
+        self.executor.run_metrics = run_metrics
+        try:
+            reporter_list = self.executor.run_rules(due_rules, current_time)
+        finally:
+            self.schedule.mark_run(due_rules, current_time)
+        self.report(reporter_list, current_time, run_metrics)
+        return due_rules
+
+    def run_forever(self) -> None:
+        """Выполняет строки по расписанию до вызова stop()"""
+        logger.info("Запущен режим постоянной работы")
+        while not self._stop_event.is_set():
+            try:
+                self.run_once(datetime.datetime.now())
+            except Exception as e:
+                logger.error("Ошибка при выполнении строк по расписанию: %s", e)
+            self._stop_event.wait(self.config_params.daemon_tick_seconds)
+        logger.info("Режим постоянной работы остановлен")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def close(self) -> None:
+        """Закрывает каталог сканирования и индекс времени истечения (после остановки)"""
+        self.executor.close()
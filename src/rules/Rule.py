@@ -0,0 +1,46 @@
+import os
+import re
+from typing import NamedTuple, Optional, Tuple
+from src.user_format_handlers.work_with_user_format import UserDateFormatDetector
+from src.user_format_handlers.date_formats import USER_SEASON_FORMAT_OPTIONS
+
+
+class Rule(NamedTuple):
+    """Правило очистки, построенное по одной строке настроечной таблицы."""
+    task_number: str
+    process_name: str
+    analyst: str
+    folder_path: str
+    regex_pattern: str
+    interval: str
+    date_modification: str
+    is_active: bool
+    is_file: bool
+    user_date_format: Optional[str]
+    re_compile_date_format: Optional[re.Pattern]
+    datetime_date_format: Optional[str]
+
+
+def is_file_mask(mask: str) -> bool:
+    """Определяет тип элемента по маске: True - файл (есть расширение из латинских букв), False - папка"""
+    extension = os.path.splitext(mask)[1]
+    return bool(extension) and re.match(r'^[a-zA-Z]+$', extension[1:]) is not None
+
+
+def rule_from_row(row: Tuple) -> Rule:
+    """
+    Создаёт правило очистки из строки Exel-таблицы.
+
+    :param row: Строка таблицы (кортеж из 8 элементов).
+    :return: Экземпляр Rule.
+    """
+    regex_pattern = row[4].strip()
+    # Получение нужных форматов и их представление в datetime и re.compile()
+    user_date_format, re_compile_date_format = UserDateFormatDetector.get_user_and_re_compile_date_format(
+        regex_pattern)
+    return Rule(task_number=row[0], process_name=row[1], analyst=row[2], folder_path=row[3],
+                regex_pattern=regex_pattern, interval=row[5], date_modification=row[6].lower(),
+                is_active=row[7].strip().lower() != "не активен",
+                is_file=is_file_mask(regex_pattern),
+                user_date_format=user_date_format, re_compile_date_format=re_compile_date_format,
+                datetime_date_format=USER_SEASON_FORMAT_OPTIONS.get(user_date_format, None))
@@ -0,0 +1,780 @@
+import os
+import time
+import datetime
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+from typing import List, Dict, Optional, Tuple, Iterator, Iterable, Set, Callable, Deque
+from src.folders.FolderOperations import ScandirFolderContentLoader, PruningFolderContentLoader, \
+    PreloadedContentLoader, FolderCleaner, Folder, CleanResult
+from src.folders.FolderEntry import FolderEntry
+from src.folders.BulkFolderCleaner import BulkFolderCleaner
+from src.folders.ScanCatalog import ScanCatalog, CatalogFolderContentLoader
+from src.folders.ExpiryIndex import ExpiryIndex
+from src.folders.IoThrottle import IoThrottle, throttled
+from src.folders.DeletionPlan import DeletionPlanWriter, PlannedItem, read_plan
+from src.folders.DeletionJournal import DeletionJournal, JournalingCleaner
+from src.excel.ReportSpool import ReportSpool, EMPTY_REPORT_KEY
+from src.folders.check_folder import checking_folder
+from src.folders.FolderProbe import FolderProbe
+from src.rules.Rule import Rule, rule_from_row
+from src.rules.RulePlanner import RulePlanner, RuleGroup, SharedTraversal, normalize_path
+from src.utils.exceptions import InvalidDate
+from src.utils.json_reader import ConfigParams
+from src.utils.RunMetrics import RunMetrics, RuleMetrics, item_size, DONE_STATUS
+from src.utils.StoragePeriodFunction import QuotaRetention, is_quota_interval
+from src.logger.logger_settings import summarize
+from src.utils.selecting_handlers import cls_definition, selecting_date_source
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+TIME_FORMAT = "%d-%m-%Y %H:%M:%S"
+SCAN_CATALOG_FILENAME = "scan_catalog.sqlite"
+PROBE_CACHE_FILENAME = "unreachable_folders.json"
+EXPIRY_INDEX_FILENAME = "expiry_index.sqlite"
+# Элемент, срок которого по оценке подошёл, но ещё не истёк, проверяется снова не раньше чем через это время
+EXPIRY_RECHECK = datetime.timedelta(hours=1)
+
+
+def share_key(folder_path: str) -> str:
+    """
+    Возвращает ключ ресурса, на котором расположена папка: сервер для UNC-путей (\\\\server\\share\\...),
+    диск для локальных путей (C:\\...) и первый уровень каталога в остальных случаях.
+    """
+    drive, tail = os.path.splitdrive(folder_path)
+    if drive.startswith(("\\\\", "//")):
+        return drive.replace("/", "\\").split("\\")[2].lower()
+    if drive:
+        return drive.lower()
+    parts = [part for part in tail.replace("\\", "/").split("/") if part]
+    return parts[0].lower() if parts else tail
+
+
+def check_rule_folder(rule: Rule, current_time: datetime.datetime,
+                      folder_checks: Optional[Dict[str, Optional[Dict]]] = None) -> Optional[List]:
+    """
+    Проверяет папку правила ( её наличие и доступ к ней ).
+
+    :param folder_checks: Результаты предварительной проверки папок (FolderProbe). Если папка в них есть,
+                          повторно она не проверяется.
+    :return: Строка для формирования отчёта, если с папкой проблема, иначе None.
+    """
+    logger.debug("Данные строки: Номер задачи: %s, Имя процесса: %s, Аналитик : %s",
+                 rule.task_number, rule.process_name, rule.analyst)
+    logger.debug("Данные строки: Путь:%s, Пользовательский формат:%s, Получение даты:%s, Интервал :%s",
+                 rule.folder_path, rule.regex_pattern, rule.date_modification, rule.interval)
+
+    # Проверка папки ( её наличие и доступ к ней )
+    if folder_checks is not None and rule.folder_path in folder_checks:
+        checking_folder_result = folder_checks[rule.folder_path]
+    else:
+        checking_folder_result = checking_folder(rule.folder_path)
+    if checking_folder_result:
+        logger.error("Проблема с папкой:%s, ", checking_folder_result['Нет файлов на удаление'].comment)
+        return [rule.task_number, rule.process_name, rule.analyst, rule.folder_path, checking_folder_result,
+                current_time.strftime(TIME_FORMAT), current_time.strftime(TIME_FORMAT)]
+    return None
+
+
+def error_report_row(row_head: List, error: Exception, current_time: datetime.datetime) -> List:
+    """
+    Строка для отчёта о строке таблицы, обработка которой прервана ошибкой скрипта.
+
+    :param row_head: Номер задачи, имя процесса, аналитик и путь к папке строки.
+    """
+    logger.error("Ошибка при обработке строки %s (%s): %s", row_head[0], row_head[3], error)
+    result = CleanResult(status="Не выполнено", comment=f"Ошибка скрипта: {error}")
+    return row_head + [{EMPTY_REPORT_KEY: result}, current_time.strftime(TIME_FORMAT),
+                       datetime.datetime.now().strftime(TIME_FORMAT)]
+
+
+def uses_pruning(rule: Rule, config_params: ConfigParams) -> bool:
+    """Срок хранения папок проверяется во время обхода (prune_traversal). Для квоты объёма нужны все элементы"""
+    return config_params.prune_traversal and not rule.is_file and not is_quota_interval(rule.interval)
+
+
+def has_yearless_date(rule: Rule) -> bool:
+    """
+    Дата берётся из имени по маске без года (например, "ММ.Месяц"): год подставляется текущий,
+    поэтому сохранённая в каталоге дата устаревает после смены года.
+    """
+    date_format = rule.datetime_date_format
+    return (rule.date_modification.lower().strip() == "дата из имени" and bool(date_format)
+            and "%Y" not in date_format and "%y" not in date_format)
+
+
+def uses_catalog(rule: Rule, config_params: ConfigParams) -> bool:
+    """
+    Правило использует каталог сканирования. Для даты изменения каталог не применяется:
+    изменение файла не меняет mtime папки, и сохранённая дата могла бы устареть. То же для масок без года.
+    """
+    return (config_params.scan_catalog and not uses_pruning(rule, config_params)
+            and rule.date_modification.strip() != "дата изменения" and not has_yearless_date(rule))
+
+
+def uses_expiry_index(rule: Rule, config_params: ConfigParams) -> bool:
+    """
+    Правило использует индекс времени истечения. При проверке срока во время обхода элементы с неистёкшим
+    сроком не собираются, поэтому индекс для таких правил не применяется. Для квоты объёма время истечения
+    элементов не определено.
+    """
+    return (config_params.expiry_index and not uses_pruning(rule, config_params)
+            and not is_quota_interval(rule.interval))
+
+
+def uses_streaming(rule: Rule, config_params: ConfigParams, expiry_index: Optional[ExpiryIndex]) -> bool:
+    """
+    Правило выполняется потоком (streaming_pipeline). Правилам с индексом времени истечения нужны
+    все элементы для обновления индекса, поэтому они выполняются без потоковой обработки.
+    """
+    return config_params.streaming_pipeline and not (expiry_index is not None
+                                                     and uses_expiry_index(rule, config_params))
+
+
+def expiry_rule_key(rule: Rule) -> str:
+    """Ключ правила в индексе времени истечения"""
+    return ExpiryIndex.rule_key(rule.folder_path, rule.regex_pattern, rule.date_modification, rule.is_file,
+                                rule.interval)
+
+
+def make_cleaner(config_params: ConfigParams, throttle: Optional[IoThrottle] = None) -> FolderCleaner:
+    """Создаёт класс для удаления файлов/папок в соответствии с настройками"""
+    if config_params.bulk_delete:
+        # Пакетное удаление относительно дескрипторов папок с параллельной обработкой независимых групп
+        cleaner = BulkFolderCleaner(max_workers=config_params.delete_workers,
+                                    chunk_size=config_params.stream_buffer_size)
+    else:
+        cleaner = FolderCleaner()
+    cleaner.throttle = throttle
+    return cleaner
+
+
+def iter_expired(content_loader, storage_period_handler, current_time: datetime.datetime,
+                 metrics: RuleMetrics) -> Iterator:
+    """Поток элементов с истёкшим сроком хранения: поиск подходящих элементов и отбор по сроку хранения"""
+    if isinstance(content_loader, PruningFolderContentLoader):
+        # Срок хранения проверяется загрузчиком во время обхода
+        return metrics.timed(content_loader.iter_contents(), "walk", "expired")
+    folder_contents = metrics.timed(content_loader.iter_contents(), "walk", "matched")
+    return metrics.timed(storage_period_handler.iter_process(folder_contents, current_time), "retention", "expired")
+
+
+def select_due(expiry_index: ExpiryIndex, rule_key: str, storage_period_handler, current_time: datetime.datetime,
+               metrics: RuleMetrics, throttle: Optional[IoThrottle] = None) -> List[FolderEntry]:
+    """
+    Выбирает из индекса элементы, оценка времени истечения которых наступила, и проверяет срок хранения
+    каждого по одному stat(). Отсутствующие элементы удаляются из индекса, для элементов с неистёкшим сроком
+    оценка пересчитывается.
+    """
+    due_entries, missing = [], []
+    with metrics.phase("walk"):
+        for path, is_dir in expiry_index.due_items(rule_key, current_time):
+            try:
+                with throttled(throttle):
+                    stat_result = os.stat(path)
+            except FileNotFoundError:
+                missing.append(path)
+                continue
+            except OSError as e:
+                logger.error("Нет доступа к %s: %s", path, e)
+                continue
+            due_entries.append(FolderEntry(path, os.path.basename(path), is_dir, stat_result=stat_result))
+    metrics.count("visited", len(due_entries) + len(missing))
+    metrics.count("matched", len(due_entries))
+
+    remove_files, rescheduled = [], []
+    with metrics.phase("retention"):
+        for entry in due_entries:
+            folder_date = storage_period_handler.get_date_or_none(entry)
+            if folder_date is not None and storage_period_handler.is_date_expired(folder_date, current_time):
+                remove_files.append(entry)
+                continue
+            expiry_time = storage_period_handler.expiry_time(folder_date) if folder_date is not None else None
+            if expiry_time is not None:
+                expiry_time = max(expiry_time, current_time + EXPIRY_RECHECK)
+            rescheduled.append((entry.path, expiry_time))
+    expiry_index.remove(rule_key, missing)
+    expiry_index.reschedule(rule_key, rescheduled)
+    logger.debug("Индекс времени истечения: подошёл срок %s, отсутствуют %s, срок не истёк %s",
+                 len(due_entries) + len(missing), len(missing), len(rescheduled))
+    return remove_files
+
+
+def remember_sizes(items: Iterable, sizes: Dict[str, int]) -> Iterator:
+    """Поток элементов на удаление: размер каждого элемента (если ещё не известен) запоминается до удаления"""
+    for item in items:
+        path = os.fspath(item)
+        if path not in sizes:
+            sizes[path] = item_size(item)
+        yield item
+
+
+def attach_sizes(results: Iterable[Tuple[str, CleanResult]],
+                 sizes: Dict[str, int]) -> Iterator[Tuple[str, CleanResult]]:
+    """Поток результатов удаления, в которые для удалённых элементов добавлен освобождённый объём"""
+    for path, result in results:
+        size = sizes.pop(path, None)
+        if size is not None and result.status == DONE_STATUS:
+            result = result._replace(size=size)
+        yield path, result
+
+
+def deleted_paths(report_dict) -> Set[str]:
+    """Нормализованные пути удалённых элементов по результатам удаления строки"""
+    return {normalize_path(path) for path, result in report_dict.items()
+            if path != EMPTY_REPORT_KEY and result.status == DONE_STATUS}
+
+
+def deleted_by(path: str, deleted: Dict[str, str]) -> Optional[str]:
+    """
+    Номер задачи строки, удалившей нормализованный путь сам или вместе с одной из папок, в которых он находится
+    (None, если путь не удалён).
+
+    :param deleted: Удалённые пути -> номер задачи строки, которая их удалила.
+    """
+    while path not in deleted:
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    return deleted[path]
+
+
+def deleted_earlier_result(task_number: str) -> CleanResult:
+    """Результат для элемента, удалённого предыдущей строкой группы с общим обходом"""
+    return CleanResult(status="Не выполнено", comment=f"Уже удалено строкой {task_number}")
+
+
+def count_loader_entries(content_loader, metrics: RuleMetrics) -> None:
+    """Учитывает в показателях элементы, просмотренные загрузчиком при обходе"""
+    metrics.count("visited", content_loader.visited)
+    if isinstance(content_loader, PruningFolderContentLoader):
+        metrics.count("matched", content_loader.matched)
+
+
+def execute_rule(rule: Rule, current_time: datetime.datetime, config_params: ConfigParams,
+                 folder_contents: Optional[List[FolderEntry]] = None,
+                 catalog: Optional[ScanCatalog] = None,
+                 plan_writer: Optional[DeletionPlanWriter] = None, row_index: int = 0,
+                 metrics: Optional[RuleMetrics] = None, expiry_index: Optional[ExpiryIndex] = None,
+                 journal: Optional[DeletionJournal] = None, throttle: Optional[IoThrottle] = None) -> Optional[List]:
+    """
+    Выполняет поиск элементов, отбор по сроку хранения и удаление для правила с доступной папкой.
+
+    :param rule: Правило очистки (строка таблицы).
+    :param current_time: Время запуска скрипта.
+    :param config_params: Параметры из config.json.
+    :param folder_contents: Элементы, уже найденные общим обходом. Если не переданы, папка обходится заново.
+    :param catalog: Каталог сканирования для инкрементального обхода.
+    :param plan_writer: План удаления. Если передан, элементы на удаление записываются в план и не удаляются.
+    :param row_index: Номер строки таблицы (для плана удаления).
+    :param metrics: Показатели строки таблицы (время этапов, количество элементов, освобождённый объём).
+    :param expiry_index: Индекс времени истечения. Между полными обходами проверяются только элементы из индекса,
+                         срок хранения которых подошёл.
+    :param journal: Журнал удаления. Элементы на удаление и результат удаления каждого элемента записываются в него.
+    :param throttle: Ограничение частоты обращений к серверу/диску папки при обходе и удалении.
+    :return: Строка для формирования отчёта или None, если правило ничего не выполняло.
+    """
+    logger.debug("Формат времени для модуля datetime: %s", rule.datetime_date_format)
+    metrics = metrics or RuleMetrics(enabled=False)
+
+    # Определение класса для обработки условия хранения
+    storage_period_handler = cls_definition(storage_period=rule.interval,
+                                            date_source=selecting_date_source(rule.date_modification),
+                                            datetime_date_format=rule.datetime_date_format,
+                                            re_compile_date_format=rule.re_compile_date_format)
+    if not storage_period_handler:
+        return None
+    if metrics.enabled:
+        storage_period_handler.metrics = metrics
+
+    # Классы для очистки и загрузки данных(файлов/папок), подходящие под пользовательский формат
+    cleaner = make_cleaner(config_params, throttle)
+    loader_args = (rule.folder_path, rule.regex_pattern, rule.user_date_format, rule.re_compile_date_format,
+                   rule.is_file)
+    if folder_contents is not None:
+        content_loader = PreloadedContentLoader(rule.folder_path, folder_contents)
+    elif uses_pruning(rule, config_params):
+        # Срок хранения проверяется во время обхода, содержимое удаляемых папок не обходится
+        content_loader = PruningFolderContentLoader(*loader_args, storage_period_handler=storage_period_handler,
+                                                    current_date=current_time)
+    elif catalog is not None and uses_catalog(rule, config_params):
+        # Перечитываются только папки, изменившиеся с прошлого запуска
+        rule_key = ScanCatalog.rule_key(rule.folder_path, rule.regex_pattern, rule.date_modification, rule.is_file)
+        content_loader = CatalogFolderContentLoader(*loader_args, catalog=catalog, rule_key=rule_key,
+                                                    storage_period_handler=storage_period_handler)
+    else:
+        content_loader = ScandirFolderContentLoader(*loader_args)
+    content_loader.throttle = throttle
+    # Размеры удаляемых элементов для отчёта (для квоты объёма известны после отбора)
+    sizes = storage_period_handler.sizes if isinstance(storage_period_handler, QuotaRetention) else None
+    if sizes is None and config_params.report_bytes_freed:
+        sizes = {}
+    # Экземпляр класса для работы с текущей папкой
+    if journal is not None and plan_writer is None:
+        journal.start_row(row_index, rule, current_time.strftime(TIME_FORMAT))
+        cleaner = JournalingCleaner(cleaner, journal, row_index)
+    current_folder = Folder(rule.folder_path, content_loader=content_loader, cleaner=cleaner)
+
+    if plan_writer is not None:
+        # Режим плана: элементы с истёкшим сроком хранения записываются в план без удаления
+        remove_files = iter_expired(content_loader, storage_period_handler, current_time, metrics)
+        count = plan_writer.add_rule_items(row_index, rule, remove_files, storage_period_handler)
+        count_loader_entries(content_loader, metrics)
+        logger.info("В план удаления добавлено элементов: %s (%s)", count, rule.folder_path)
+        return None
+
+    index_key = None
+    if expiry_index is not None and uses_expiry_index(rule, config_params):
+        index_key = expiry_rule_key(rule)
+
+    if uses_streaming(rule, config_params, expiry_index):
+        # Поиск, отбор по сроку хранения, удаление и запись результатов выполняются потоком, без промежуточных списков
+        remove_files = iter_expired(content_loader, storage_period_handler, current_time, metrics)
+        if sizes is not None:
+            remove_files = remember_sizes(remove_files, sizes)
+        results = metrics.timed(current_folder.iter_clean(metrics.sized(remove_files, sizes)), "delete")
+        if sizes is not None:
+            results = attach_sizes(results, sizes)
+        with metrics.phase("report"):
+            report_dict = ReportSpool(config_params.stream_buffer_size).extend(metrics.results(results))
+        time_end = datetime.datetime.now()
+    else:
+        if index_key is not None and \
+                not expiry_index.needs_full_scan(index_key, current_time, config_params.expiry_full_scan_hours):
+            # Обход папки не выполняется: проверяются только элементы, срок хранения которых подошёл
+            remove_files = select_due(expiry_index, index_key, storage_period_handler, current_time, metrics,
+                                      throttle)
+        else:
+            with metrics.phase("walk"):
+                folder_contents = current_folder.load_contents()  # Получение всех подходящих файлов/папок
+
+            # Список папок/файлов на удаление
+            if isinstance(content_loader, PruningFolderContentLoader):
+                remove_files = folder_contents
+            elif index_key is not None:
+                # Полный обход: элементы с неистёкшим сроком сохраняются в индекс с оценкой времени истечения
+                metrics.count("matched", len(folder_contents))
+                with metrics.phase("retention"):
+                    remove_files, pending = storage_period_handler.partition(folder_contents, current_time)
+                expiry_index.replace_rule(index_key, [
+                    (os.fspath(elem), elem.is_dir, storage_period_handler.expiry_time(folder_date))
+                    for elem, folder_date in pending], current_time)
+                logger.debug("Индекс времени истечения обновлён: элементов %s (%s)", len(pending), rule.folder_path)
+            else:
+                metrics.count("matched", len(folder_contents))
+                with metrics.phase("retention"):
+                    remove_files = storage_period_handler.process(folder_contents, current_time)
+        metrics.count("expired", len(remove_files))
+        logger.debug("Файлы на удаление: %s", summarize(remove_files))
+
+        time_end = datetime.datetime.now()
+        if journal is not None:
+            # Весь список строки: при прерывании запуска повторный запуск удалит оставшиеся элементы без обхода
+            journal.plan(row_index, remove_files, complete=True)
+        with metrics.phase("delete"):
+            current_folder.add_files_to_delete(metrics.sized(
+                remove_files if sizes is None else remember_sizes(remove_files, sizes), sizes))
+            report_dict = current_folder.clean()
+            if sizes is not None:
+                report_dict = dict(attach_sizes(report_dict.items(), sizes))
+        if index_key is not None and remove_files:
+            # Не удалённые элементы остаются в индексе и проверяются при следующем запуске
+            expiry_index.remove(index_key, [path for path, result in report_dict.items()
+                                            if result.status == "Выполнено"])
+        if metrics.enabled and remove_files:
+            for path, result in report_dict.items():
+                metrics.add_result(path, result)
+    count_loader_entries(content_loader, metrics)
+    if journal is not None:
+        journal.end_row(row_index, time_end.strftime(TIME_FORMAT))
+    # Данные для формирования отчёта
+    report_row = [rule.task_number, rule.process_name, rule.analyst, rule.folder_path, report_dict,
+                  current_time.strftime(TIME_FORMAT), time_end.strftime(TIME_FORMAT)]
+    logger.debug("Данные для формирование отчёта: %s", report_row[:4] + [summarize(report_dict)] + report_row[5:])
+    return report_row
+
+
+def process_rule(rule: Rule, current_time: datetime.datetime, config_params: ConfigParams,
+                 catalog: Optional[ScanCatalog] = None) -> Optional[List]:
+    """
+    Выполняет одно правило очистки: проверка папки, поиск элементов, отбор по сроку хранения и удаление.
+
+    :param rule: Правило очистки (строка таблицы).
+    :param current_time: Время запуска скрипта.
+    :param config_params: Параметры из config.json.
+    :param catalog: Каталог сканирования для инкрементального обхода.
+    :return: Строка для формирования отчёта или None, если правило ничего не выполняло.
+    """
+    checking_folder_result = check_rule_folder(rule, current_time)
+    if checking_folder_result or not rule.is_active:
+        return checking_folder_result
+    return execute_rule(rule, current_time, config_params, catalog=catalog)
+
+
+def compile_rules(rows: List[Tuple]) -> List[Tuple[int, Rule]]:
+    """Строит правила очистки по строкам таблицы. Строки с ошибкой формата пропускаются"""
+    indexed_rules = []
+    for index, row in enumerate(rows):
+        try:
+            indexed_rules.append((index, rule_from_row(row)))
+        except InvalidDate as e:
+            logger.error("Ошибка в формате %s", e)
+    return indexed_rules
+
+
+class RuleExecutor:
+    """
+    Параллельно выполняет правила очистки в ограниченном пуле потоков.
+    Количество одновременно обрабатываемых строк на одном сервере/диске ограничено отдельно.
+    """
+
+    def __init__(self, config_params: ConfigParams, plan_writer: Optional[DeletionPlanWriter] = None,
+                 run_metrics: Optional[RunMetrics] = None, journal: Optional[DeletionJournal] = None) -> None:
+        """
+        Инициализатор
+        :param config_params: Параметры из config.json. Используются max_workers (размер пула потоков) и
+                              max_rows_per_share (максимум строк, одновременно обращающихся к одному серверу/диску).
+        :param plan_writer: План удаления. Если передан, правила только формируют план, удаление не выполняется.
+        :param run_metrics: Показатели запуска. Если переданы, для каждой строки собираются её показатели.
+        :param journal: Журнал удаления. Если передан, строки, завершённые в прерванном запуске,
+                        не выполняются повторно.
+        """
+        self.config_params = config_params
+        self.plan_writer = plan_writer
+        self.run_metrics = run_metrics
+        self.journal = journal
+        self.max_workers = max(1, config_params.max_workers)
+        self.max_rows_per_share = max(1, config_params.max_rows_per_share)
+        self._share_throttles: Dict[str, IoThrottle] = {}
+        self._lock = threading.Lock()
+        self.catalog: Optional[ScanCatalog] = None
+        if config_params.scan_catalog:
+            self.catalog = ScanCatalog(os.path.join(config_params.attached_file_path, SCAN_CATALOG_FILENAME))
+        self.folder_checks: Optional[Dict[str, Optional[Dict]]] = None
+        self.probe: Optional[FolderProbe] = None
+        if config_params.probe_folders:
+            self.probe = FolderProbe(os.path.join(config_params.attached_file_path, PROBE_CACHE_FILENAME),
+                                     timeout=config_params.probe_timeout,
+                                     backoff_hours=config_params.probe_backoff_hours,
+                                     max_backoff_hours=config_params.probe_max_backoff_hours,
+                                     max_workers=config_params.probe_max_workers)
+        self.expiry_index: Optional[ExpiryIndex] = None
+        if config_params.expiry_index:
+            self.expiry_index = ExpiryIndex(os.path.join(config_params.attached_file_path, EXPIRY_INDEX_FILENAME))
+
+    def _run_per_share(self, tasks: List[Tuple[str, Callable]]) -> List:
+        """
+        Выполняет задачи в пуле потоков. Для каждого сервера/диска одновременно выполняется не больше
+        max_rows_per_share задач, остальные ждут в очереди сервера/диска и не занимают потоки пула:
+        пока задачи загруженного сервера ждут своей очереди, выполняются задачи других серверов.
+        Свободные потоки распределяются между серверами по очереди.
+
+        :param tasks: Задачи: (путь к папке, функция без аргументов).
+        :return: Результаты задач в порядке задач.
+        """
+        queues: Dict[str, Deque[int]] = {}
+        for position, (folder_path, _task) in enumerate(tasks):
+            queues.setdefault(share_key(folder_path), deque()).append(position)
+        active = dict.fromkeys(queues, 0)  # Количество выполняемых задач сервера/диска
+        results: List = [None] * len(tasks)
+        running: Dict[Future, Tuple[int, str]] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while queues or running:
+                submitted = True
+                while submitted and len(running) < self.max_workers:
+                    submitted = False
+                    for key in list(queues):
+                        if len(running) >= self.max_workers:
+                            break
+                        if active[key] >= self.max_rows_per_share:
+                            continue
+                        position = queues[key].popleft()
+                        if not queues[key]:
+                            del queues[key]
+                        active[key] += 1
+                        running[pool.submit(tasks[position][1])] = (position, key)
+                        submitted = True
+                done, _pending = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    position, key = running.pop(future)
+                    active[key] -= 1
+                    results[position] = future.result()
+        return results
+
+    def _get_throttle(self, folder_path: str) -> Optional[IoThrottle]:
+        """
+        Возвращает ограничение частоты операций для сервера/диска, на котором расположена папка
+        (None, если частота не ограничивается). Общее для всех строк, обращающихся к серверу/диску.
+        """
+        if self.config_params.io_max_ops_per_second <= 0:
+            return None
+        key = share_key(folder_path)
+        with self._lock:
+            if key not in self._share_throttles:
+                self._share_throttles[key] = IoThrottle(self.config_params.io_max_ops_per_second,
+                                                        self.config_params.io_min_ops_per_second,
+                                                        self.config_params.io_target_latency_ms / 1000)
+            return self._share_throttles[key]
+
+    def _rule_metrics(self, index: int, task_number, process_name, folder_path: str) -> RuleMetrics:
+        """Показатели строки таблицы (выключенные, если показатели запуска не собираются)"""
+        if self.run_metrics is None:
+            return RuleMetrics(enabled=False)
+        return self.run_metrics.rule_metrics(index, task_number, process_name, folder_path,
+                                             folder_bytes=self.config_params.metrics_folder_bytes)
+
+    def _uses_fresh_index(self, rule: Rule, current_time: datetime.datetime) -> bool:
+        """Правило выбирает элементы из индекса времени истечения (полный обход ещё не нужен)"""
+        return (self.expiry_index is not None and self.plan_writer is None
+                and uses_expiry_index(rule, self.config_params)
+                and not self.expiry_index.needs_full_scan(expiry_rule_key(rule), current_time,
+                                                          self.config_params.expiry_full_scan_hours))
+
+    def _resume_row(self, index: int, rule: Rule, results: Dict[int, Optional[List]]) -> bool:
+        """
+        Продолжает строку прерванного запуска по журналу удаления.
+
+        :return: True, если строка завершена (результат взят из журнала), False - строку нужно выполнить.
+        """
+        row = self.journal.resumed_row(index, rule)
+        if row is None:
+            return False
+        if row.finished is None and row.remaining():
+            self.journal.resume_row(index, make_cleaner(self.config_params, self._get_throttle(rule.folder_path)))
+        if row.finished is None and not row.complete:
+            # Список элементов строки не был записан полностью: папка обходится заново
+            return False
+        if row.finished is None:
+            self.journal.end_row(index, datetime.datetime.now().strftime(TIME_FORMAT))
+        results[index] = row.report_row()
+        return True
+
+    def _run_group(self, group: RuleGroup, current_time: datetime.datetime) -> Dict[int, Optional[List]]:
+        """
+        Выполняет группу правил с общим корнем. Дерево обходится один раз для всех правил группы,
+        затем каждое правило отбирает и удаляет свои элементы.
+        """
+        results: Dict[int, Optional[List]] = {}
+        runnable = []
+        rule_metrics: Dict[int, RuleMetrics] = {}
+        for index, rule in group.rules:
+            rule_metrics[index] = self._rule_metrics(index, rule.task_number, rule.process_name, rule.folder_path)
+            try:
+                if self.journal is not None and self._resume_row(index, rule, results):
+                    continue
+                with rule_metrics[index].phase("check_folder"):
+                    results[index] = check_rule_folder(rule, current_time, self.folder_checks)
+            except Exception as e:
+                results[index] = self._error_row(index, rule, current_time, e)
+                continue
+            if results[index] is not None and self.plan_writer is not None:
+                # Результат проверки папки попадёт в отчёт по плану
+                self.plan_writer.add_rule_check(index, rule, results[index][4][EMPTY_REPORT_KEY])
+            if results[index] is None and rule.is_active:
+                runnable.append((index, rule))
+
+        # Правила с проверкой срока во время обхода или с каталогом сканирования обходят папку отдельно,
+        # правила с заполненным индексом времени истечения папку не обходят. Потоковые правила тоже
+        # обходят папку отдельно: общий обход собирает полные списки элементов каждого правила
+        shared = [(index, rule) for index, rule in runnable
+                  if not uses_pruning(rule, self.config_params) and not uses_catalog(rule, self.config_params)
+                  and not self._uses_fresh_index(rule, current_time)
+                  and not uses_streaming(rule, self.config_params, self.expiry_index)]
+        contents = {}
+        if len(shared) > 1:
+            started = time.perf_counter()
+            traversal = SharedTraversal(shared)
+            traversal.throttle = self._get_throttle(group.root)
+            try:
+                contents = traversal.load_contents()
+            except Exception as e:
+                # Правила группы обходят свои папки отдельно
+                logger.error("Ошибка общего обхода %s: %s", group.root, e)
+            if self.run_metrics is not None and contents:
+                self.run_metrics.add_shared_traversal(group.root, time.perf_counter() - started,
+                                                      traversal.visited, [index for index, _rule in shared])
+
+        deleted: Dict[str, str] = {}  # Пути, удалённые правилами группы с общим обходом -> номер задачи
+        for index, rule in runnable:
+            folder_contents = contents.get(index)
+            already_deleted: Dict[str, CleanResult] = {}
+            try:
+                if folder_contents is not None and deleted:
+                    # Элементы найдены до удаления предыдущими правилами группы: удалённые не обрабатываются
+                    # повторно, а попадают в отчёт с номером строки, которая их удалила
+                    root_deleted_by = deleted_by(normalize_path(rule.folder_path), deleted)
+                    if root_deleted_by is not None:
+                        results[index] = [rule.task_number, rule.process_name, rule.analyst, rule.folder_path,
+                                          {EMPTY_REPORT_KEY: deleted_earlier_result(root_deleted_by)},
+                                          current_time.strftime(TIME_FORMAT), current_time.strftime(TIME_FORMAT)]
+                        continue
+                    remaining = []
+                    for entry in folder_contents:
+                        entry_deleted_by = deleted_by(normalize_path(entry.path), deleted)
+                        if entry_deleted_by is None:
+                            remaining.append(entry)
+                        else:
+                            already_deleted[entry.path] = deleted_earlier_result(entry_deleted_by)
+                    folder_contents = remaining
+                results[index] = execute_rule(rule, current_time, self.config_params, folder_contents,
+                                              catalog=self.catalog, plan_writer=self.plan_writer,
+                                              row_index=index, metrics=rule_metrics[index],
+                                              expiry_index=self.expiry_index, journal=self.journal,
+                                              throttle=self._get_throttle(rule.folder_path))
+                if self.journal is not None:
+                    results[index] = self.journal.merge_resumed(index, results[index])
+                if folder_contents is not None and results[index] is not None:
+                    deleted.update(dict.fromkeys(deleted_paths(results[index][4]), rule.task_number))
+                    if already_deleted:
+                        report_dict = results[index][4]
+                        if EMPTY_REPORT_KEY in report_dict and report_dict[EMPTY_REPORT_KEY].status == DONE_STATUS:
+                            del report_dict[EMPTY_REPORT_KEY]  # "Список файлов на удаление пуст"
+                        report_dict.update(already_deleted)
+            except Exception as e:
+                results[index] = self._error_row(index, rule, current_time, e)
+        return results
+
+    def _error_row(self, index: int, rule: Rule, current_time: datetime.datetime, error: Exception) -> List:
+        """Строка отчёта об ошибке скрипта. В режиме плана ошибка записывается в план и попадёт в отчёт по плану"""
+        report_row = error_report_row([rule.task_number, rule.process_name, rule.analyst, rule.folder_path], error,
+                                      current_time)
+        if self.plan_writer is not None:
+            try:
+                self.plan_writer.add_rule_check(index, rule, report_row[4][EMPTY_REPORT_KEY])
+            except Exception as e:
+                logger.error("Не удалось записать ошибку строки %s в план: %s", rule.task_number, e)
+        return report_row
+
+    def run(self, rows: List[Tuple], current_time: datetime.datetime) -> List[List]:
+        """
+        Выполняет все строки таблицы.
+
+        :param rows: Строки Exel-таблицы.
+        :param current_time: Время запуска скрипта.
+        :return: Список строк для отчёта в порядке строк таблицы.
+        """
+        indexed_rules = compile_rules(rows)
+        results = self.run_rules(indexed_rules, current_time)
+        self.retain_catalog(indexed_rules)
+        return results
+
+    def run_rules(self, indexed_rules: List[Tuple[int, Rule]], current_time: datetime.datetime) -> List[List]:
+        """
+        Выполняет правила, построенные по строкам таблицы.
+
+        :param indexed_rules: Правила (номер строки, правило).
+        :param current_time: Время запуска скрипта.
+        :return: Список строк для отчёта в порядке строк таблицы.
+        """
+        results = self.run_indexed(indexed_rules, current_time)
+        return [results[index] for index in sorted(results)]
+
+    def run_indexed(self, indexed_rules: List[Tuple[int, Rule]], current_time: datetime.datetime) -> Dict[int, List]:
+        """Выполняет правила и возвращает строки для отчёта по номерам строк таблицы"""
+        if self.probe is not None:
+            # Доступность всех папок проверяется заранее и параллельно, с ограничением времени
+            self.folder_checks = self.probe.probe_all((rule.folder_path for _index, rule in indexed_rules),
+                                                      current_time)
+
+        if self.config_params.shared_traversal:
+            # Правила с одинаковыми или вложенными путями обходят дерево один раз
+            groups = RulePlanner.plan(indexed_rules)
+        else:
+            groups = [RuleGroup(root=rule.folder_path, rules=[(index, rule)]) for index, rule in indexed_rules]
+
+        results: Dict[int, Optional[List]] = {}
+        for group_results in self._run_per_share([(group.root, partial(self._run_group, group, current_time))
+                                                  for group in groups]):
+            results.update(group_results)
+        return {index: report_row for index, report_row in results.items() if report_row is not None}
+
+    def retain_catalog(self, indexed_rules: List[Tuple[int, Rule]]) -> None:
+        """Удаляет из каталога сканирования и индекса времени истечения данные правил, которых больше нет в таблице"""
+        if self.catalog is not None:
+            # Данные правил, которых больше нет в таблице или у которых изменилась маска/источник даты
+            self.catalog.retain_rules(ScanCatalog.rule_key(rule.folder_path, rule.regex_pattern,
+                                                           rule.date_modification, rule.is_file)
+                                      for _index, rule in indexed_rules)
+        if self.expiry_index is not None:
+            self.expiry_index.retain_rules(expiry_rule_key(rule) for _index, rule in indexed_rules)
+
+    def close(self) -> None:
+        """Закрывает каталог сканирования и индекс времени истечения"""
+        if self.catalog is not None:
+            self.catalog.close()
+        if self.expiry_index is not None:
+            self.expiry_index.close()
+
+    def apply_plan(self, plan_path: str, current_time: datetime.datetime) -> List[List]:
+        """
+        Выполняет удаление по ранее сохранённому плану, без повторного обхода папок.
+
+        :param plan_path: Путь к файлу плана (DeletionPlanWriter).
+        :param current_time: Время запуска скрипта.
+        :return: Список строк для отчёта в порядке строк таблицы.
+        """
+        planned_rules = read_plan(plan_path)
+        logger.info("Загружен план удаления: строк %s, элементов %s", len(planned_rules),
+                    sum(len(items) for _rule_info, items in planned_rules))
+        return self._run_per_share([(rule_info["folder_path"],
+                                     partial(self._apply_rule, rule_info, items, current_time))
+                                    for rule_info, items in planned_rules])
+
+    def _apply_rule(self, rule_info: Dict, items: List[PlannedItem], current_time: datetime.datetime) -> List:
+        """
+        Удаляет элементы одной строки плана и возвращает строку для отчёта. Элементы, изменённые после
+        формирования плана (например, созданные заново по тому же пути), не удаляются.
+        Ошибка скрипта при удалении попадает в отчёт строкой "Ошибка скрипта: ...".
+        """
+        report_row = [rule_info["task_number"], rule_info["process_name"], rule_info["analyst"],
+                      rule_info["folder_path"]]
+        try:
+            return self._apply_items(report_row, rule_info, items, current_time)
+        except Exception as e:
+            return error_report_row(report_row, e, current_time)
+
+    def _apply_items(self, report_row: List, rule_info: Dict, items: List[PlannedItem],
+                     current_time: datetime.datetime) -> List:
+        if rule_info.get("check"):
+            # Папка строки не прошла проверку при формировании плана
+            return report_row + [{EMPTY_REPORT_KEY: CleanResult(*rule_info["check"])},
+                                 current_time.strftime(TIME_FORMAT), current_time.strftime(TIME_FORMAT)]
+        metrics = self._rule_metrics(rule_info["row_index"], rule_info["task_number"], rule_info["process_name"],
+                                     rule_info["folder_path"])
+        metrics.count("expired", len(items))
+        throttle = self._get_throttle(rule_info["folder_path"])
+        with metrics.phase("delete"):
+            # Все элементы проверяются до удаления: удаление вложенного элемента меняет mtime папки
+            skipped, paths = {}, []
+            for item in items:
+                comment = self._changed_comment(item, throttle)
+                if comment is None:
+                    paths.append(item.path)
+                else:
+                    skipped[item.path] = CleanResult(status="Не выполнено", comment=comment)
+            cleaner = make_cleaner(self.config_params, throttle)
+            # Размеры элементов записаны в план: содержимое папок повторно не обходится
+            planned_sizes = {item.path: item.size for item in items}
+            report_dict = cleaner.clean(list(metrics.sized(paths, planned_sizes))) if paths or not skipped else {}
+            report_dict.update(skipped)
+        if metrics.enabled and items:
+            for path, result in report_dict.items():
+                metrics.add_result(path, result)
+        if skipped:
+            logger.info("Строка %s: элементы изменены после формирования плана и не удалены: %s",
+                        rule_info["task_number"], summarize(list(skipped)))
+        time_end = datetime.datetime.now()
+        return report_row + [report_dict, current_time.strftime(TIME_FORMAT), time_end.strftime(TIME_FORMAT)]
+
+    @staticmethod
+    def _changed_comment(item: PlannedItem, throttle: Optional[IoThrottle]) -> Optional[str]:
+        """Проверяет элемент плана одним stat(). Отсутствующий элемент передаётся удалению (ошибка попадёт в отчёт)"""
+        try:
+            with throttled(throttle):
+                stat_result = os.stat(item.path)
+        except OSError:
+            return None
+        return item.changed_comment(stat_result)
@@ -0,0 +1,132 @@
+import os
+from typing import List, Dict, Tuple, NamedTuple
+from src.folders.FolderEntry import FolderEntry
+from src.folders.IoThrottle import throttled
+from src.rules.Rule import Rule
+from src.user_format_handlers.work_with_user_format import PatternReplacer, FileNameValidator, NameMatcher
+from src.logger.logger_settings import summarize
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+
+def normalize_path(path: str) -> str:
+    """Приводит путь к виду, пригодному для сравнения (регистр, разделители, завершающий слэш)"""
+    return os.path.normcase(os.path.normpath(path))
+
+
+def is_nested_path(path: str, root: str) -> bool:
+    """Проверяет, совпадает ли нормализованный путь path с root или находится внутри него"""
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+class RuleGroup(NamedTuple):
+    """Группа правил с общим корнем: дерево корня обходится один раз для всех правил группы"""
+    root: str
+    rules: List[Tuple[int, Rule]]  # (номер строки в таблице, правило)
+
+
+class RulePlanner:
+    """Группирует правила по корневой папке: правила с одинаковыми или вложенными путями попадают в одну группу"""
+
+    @staticmethod
+    def plan(indexed_rules: List[Tuple[int, Rule]]) -> List[RuleGroup]:
+        """
+        Строит группы правил.
+
+        :param indexed_rules: Список пар (номер строки, правило).
+        :return: Список групп в порядке первой строки каждой группы.
+        """
+        groups: List[RuleGroup] = []
+        for index, rule in sorted(indexed_rules, key=lambda item: (len(normalize_path(item[1].folder_path)), item[0])):
+            path = normalize_path(rule.folder_path)
+            group = next((group for group in groups if is_nested_path(path, group.root)), None)
+            if group is None:
+                groups.append(RuleGroup(root=path, rules=[(index, rule)]))
+            else:
+                group.rules.append((index, rule))
+
+        for group in groups:
+            group.rules.sort(key=lambda item: item[0])
+        groups.sort(key=lambda group: group.rules[0][0])
+        logger.debug("Группы правил: %s", summarize([(group.root, len(group.rules)) for group in groups]))
+        return groups
+
+
+class SharedTraversal:
+    """
+    Обходит дерево папок один раз и проверяет каждый элемент по маскам всех правил,
+    корень которых содержит текущую папку. Каждое правило получает свой список подходящих элементов.
+    """
+
+    def __init__(self, rules: List[Tuple[int, Rule]]) -> None:
+        """
+        Инициализатор
+        :param rules: Правила группы (номер строки, правило).
+        """
+        self.rules_by_root: Dict[str, List[Tuple[int, Rule, FileNameValidator]]] = {}
+        self.start_paths: Dict[str, str] = {}
+        for index, rule in rules:
+            validator = FileNameValidator(PatternReplacer(rule.user_date_format, rule.re_compile_date_format,
+                                                          rule.regex_pattern))
+            root = normalize_path(rule.folder_path)
+            self.rules_by_root.setdefault(root, []).append((index, rule, validator))
+            self.start_paths.setdefault(root, rule.folder_path)
+        self.visited = 0  # Количество элементов, просмотренных при обходе
+        # Объединённые маски правил, действующих в папке: номера строк -> NameMatcher
+        self._matchers: Dict[Tuple[int, ...], NameMatcher] = {}
+        self.throttle = None  # Ограничение частоты обращений к серверу/диску (IoThrottle)
+        # Обход начинается только с корней, не вложенных в корни других правил
+        for root in list(self.start_paths):
+            if any(other != root and is_nested_path(root, other) for other in self.rules_by_root):
+                del self.start_paths[root]
+
+    def load_contents(self) -> Dict[int, List[FolderEntry]]:
+        """
+        Выполняет обход.
+
+        :return: Словарь: номер строки -> список подходящих элементов (в порядке os.walk от корня правила).
+        """
+        contents: Dict[int, List[FolderEntry]] = {index: [] for rules in self.rules_by_root.values()
+                                                  for index, _rule, _validator in rules}
+        stack = [(path, self.rules_by_root[root]) for root, path in reversed(list(self.start_paths.items()))]
+        while stack:
+            current_dir, active_rules = stack.pop()
+            try:
+                with throttled(self.throttle), os.scandir(current_dir) as it:
+                    dir_entries = list(it)
+            except OSError as e:
+                logger.error("Не удалось прочитать папку %s: %s", current_dir, e)
+                continue
+
+            self.visited += len(dir_entries)
+            matcher = self._matcher(active_rules)
+            sub_dirs = []
+            for dir_entry in dir_entries:
+                try:
+                    is_dir = dir_entry.is_dir()
+                except OSError:
+                    is_dir = False
+                entry = None
+                # Имя, не подходящее ни под одну маску, отсеивается одной проверкой без перебора правил
+                if matcher.match(dir_entry.name):
+                    for index, rule, validator in active_rules:
+                        if is_dir != rule.is_file and validator.check_pattern(dir_entry.name):
+                            entry = entry or FolderEntry.from_dir_entry(dir_entry, is_dir)
+                            contents[index].append(entry)
+                if is_dir:
+                    nested_rules = self.rules_by_root.get(normalize_path(dir_entry.path), [])
+                    if nested_rules or (active_rules and not dir_entry.is_symlink()):
+                        sub_dirs.append((dir_entry.path, active_rules + nested_rules))
+            stack.extend(reversed(sub_dirs))
+
+        logger.debug("Общий обход %s: найдено элементов по строкам %s", list(self.start_paths.values()),
+                     {index: len(entries) for index, entries in contents.items()})
+        return contents
+
+    def _matcher(self, active_rules: List[Tuple[int, Rule, FileNameValidator]]) -> NameMatcher:
+        """Объединённая проверка имени по маскам правил, действующих в папке"""
+        key = tuple(index for index, _rule, _validator in active_rules)
+        if key not in self._matchers:
+            self._matchers[key] = NameMatcher([validator.pattern_replacer for _index, _rule, validator in active_rules])
+        return self._matchers[key]
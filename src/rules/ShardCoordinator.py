@@ -0,0 +1,361 @@
+import os
+import re
+import json
+import time
+import socket
+import shutil
+import hashlib
+import heapq
+import datetime
+import itertools
+import tempfile
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional, Tuple, Iterable, Iterator
+from src.excel.ReportSpool import ReportSpool, close_report_spools
+from src.folders.FolderOperations import CleanResult
+from src.logger.logger_settings import setup_logger
+from src.rules.Rule import Rule
+from src.rules.RuleExecutor import RuleExecutor, share_key
+from src.utils.json_reader import ConfigParams
+from src.utils.RunMetrics import RunMetrics
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+SHARD_POLL_SECONDS = 5.0  # Интервал проверки готовности частей, выполняемых другими серверами
+# Блокировка, не обновлявшаяся дольше этого времени, оставлена аварийно завершённым сервером/процессом
+# (выполняемые части обновляют время изменения своих блокировок каждые SHARD_POLL_SECONDS)
+LOCK_STALE_SECONDS = 600.0
+REPORT_LOCK_NAME = "report.lock"
+DONE_NAME = "done"  # Отметка о сформированном отчёте: запуск с тем же идентификатором не выполняется повторно
+# Папки запусков, завершённых (или оставленных) раньше этого времени, удаляются из общей папки блокировок
+RUN_RETENTION_SECONDS = 7 * 24 * 3600.0
+
+
+def shard_rules(indexed_rules: List[Tuple[int, Rule]]) -> Dict[str, List[Tuple[int, Rule]]]:
+    """
+    Делит правила на части по серверу/диску корневой папки. Имена частей одинаковы на всех серверах запуска,
+    читающих одну таблицу, и пригодны для имён файлов.
+    """
+    shards: Dict[str, List[Tuple[int, Rule]]] = {}
+    for index, rule in indexed_rules:
+        key = share_key(rule.folder_path)
+        name = re.sub(r"[^\w.-]", "_", key)[:40] + "_" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+        shards.setdefault(name, []).append((index, rule))
+    return dict(sorted(shards.items()))
+
+
+def write_fragment(path: str, header: Dict, rows: Iterable[Tuple[int, List]]) -> None:
+    """
+    Сохраняет результаты части (JSONL: заголовок, затем для каждой строки отчёта в порядке строк таблицы -
+    описание строки и по одной записи [путь, статус, комментарий, объём] на каждый результат удаления).
+    Результаты строки записываются потоком, без промежуточного списка. Файл появляется целиком.
+    """
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as fragment_file:
+        fragment_file.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for index, report_row in rows:
+            fragment_file.write(json.dumps({"row": [index] + report_row[:4] + report_row[5:],
+                                            "results": len(report_row[4])}, ensure_ascii=False, default=str) + "\n")
+            for result_path, result in report_row[4].items():
+                fragment_file.write(json.dumps([result_path, result.status, result.comment, result.size],
+                                               ensure_ascii=False) + "\n")
+    os.replace(temp_path, path)
+
+
+def read_fragment_header(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as fragment_file:
+        return json.loads(fragment_file.readline())
+
+
+def iter_fragment_rows(path: str, streaming: bool) -> Iterator[Tuple[int, List]]:
+    """
+    Строки отчёта части (write_fragment) по одной: (номер строки таблицы, строка отчёта).
+    При streaming результаты строки сохраняются во временный файл (ReportSpool), а не в словарь.
+    """
+    with open(path, "r", encoding="utf-8") as fragment_file:
+        fragment_file.readline()
+        for line in fragment_file:
+            record = json.loads(line)
+            index, row = record["row"][0], record["row"][1:]
+            results = ((result_path, CleanResult(*result)) for result_path, *result in
+                       map(json.loads, itertools.islice(fragment_file, record["results"])))
+            report_dict = ReportSpool().extend(results) if streaming else dict(results)
+            yield index, row[:4] + [report_dict] + row[4:]
+
+
+def init_worker(config_params: ConfigParams) -> None:
+    """Настройка журнала в процессе-исполнителе"""
+    setup_logger(config_params)
+
+
+def run_shard(config_params: ConfigParams, indexed_rules: List[Tuple[int, Rule]], current_time: datetime.datetime,
+              folder_checks: Optional[Dict[str, Optional[Dict]]], collect_metrics: bool, fragment_path: str) -> int:
+    """
+    Выполняет часть правил (в процессе-исполнителе) и сохраняет результаты в файл части.
+
+    :param folder_checks: Результаты проверки доступности папок, выполненной координатором.
+    :param collect_metrics: Собирать показатели строк.
+    :param fragment_path: Путь к файлу результатов части.
+    :return: Количество строк отчёта.
+    """
+    run_metrics = RunMetrics(current_time) if collect_metrics else None
+    header = {"host": socket.gethostname(), "pid": os.getpid(), "error": None, "metrics": None}
+    results: Dict[int, List] = {}
+    try:
+        # Доступность папок уже проверена координатором
+        executor = RuleExecutor(config_params._replace(probe_folders=False), run_metrics=run_metrics)
+        executor.folder_checks = folder_checks
+        try:
+            results = executor.run_indexed(indexed_rules, current_time)
+        finally:
+            executor.close()
+    except Exception as e:
+        logger.error("Ошибка при выполнении части строк: %s", e)
+        header["error"] = str(e)
+    if run_metrics is not None:
+        header["metrics"] = run_metrics.fragment()
+    try:
+        write_fragment(fragment_path, header, ((index, results[index]) for index in sorted(results)))
+    finally:
+        close_report_spools(list(results.values()))
+    return len(results)
+
+
+class ShardCoordinator:
+    """
+    Делит строки таблицы на части по серверу/диску корневой папки и выполняет части в пуле процессов
+    (регулярные выражения и разбор дат не ограничиваются GIL одного процесса). Если задана общая папка
+    блокировок (shard_lock_dir), части распределяются между несколькими серверами запуска: каждый сервер
+    забирает свободную часть, создавая файл блокировки, и сохраняет результаты в общую папку.
+    Отчёт и письмо формирует один сервер - первый, дождавшийся результатов всех частей. После формирования отчёта
+    в папке запуска остаётся отметка DONE_NAME, папки старых запусков удаляются через RUN_RETENTION_SECONDS.
+    """
+
+    def __init__(self, config_params: ConfigParams, run_metrics: Optional[RunMetrics] = None) -> None:
+        """
+        Инициализатор
+        :param config_params: Параметры из config.json. Используются shard_processes (размер пула процессов),
+                              shard_lock_dir (общая папка блокировок) и shard_wait_seconds.
+        :param run_metrics: Показатели запуска. Показатели частей добавляются в них.
+        """
+        self.config_params = config_params
+        self.run_metrics = run_metrics
+        self.executor = RuleExecutor(config_params)
+
+    def close(self) -> None:
+        self.executor.close()
+
+    def run(self, indexed_rules: List[Tuple[int, Rule]], current_time: datetime.datetime,
+            run_id: Optional[str] = None) -> Optional[List[List]]:
+        """
+        Выполняет правила по частям.
+
+        :param indexed_rules: Правила (номер строки, правило).
+        :param current_time: Время запуска скрипта.
+        :param run_id: Идентификатор запуска, общий для всех серверов (по умолчанию - дата запуска).
+                       Запуск с идентификатором, отчёт по которому уже сформирован, строки не выполняет.
+        :return: Строки для отчёта в порядке строк таблицы или None, если отчёт формирует другой сервер.
+        """
+        shards = shard_rules(indexed_rules)
+        logger.info("Строки разделены на части по серверам/дискам: %s", len(shards))
+        folder_checks = None
+        if self.executor.probe is not None:
+            folder_checks = self.executor.probe.probe_all((rule.folder_path for _index, rule in indexed_rules),
+                                                          current_time)
+
+        if self.config_params.shard_lock_dir:
+            run_dir = os.path.join(self.config_params.shard_lock_dir, run_id or current_time.strftime("%Y-%m-%d"))
+            self._expire_old_runs(run_dir)
+            if os.path.exists(os.path.join(run_dir, DONE_NAME)):
+                logger.info("Отчёт по запуску %s уже сформирован", run_dir)
+                return None
+            self._expire_run_dir(run_dir)
+            if os.path.exists(os.path.join(run_dir, REPORT_LOCK_NAME)):
+                logger.info("Отчёт по запуску формирует другой сервер")
+                return None
+            os.makedirs(run_dir, exist_ok=True)
+            self._run_shards(shards, current_time, folder_checks, run_dir, shared=True)
+            self.executor.retain_catalog(indexed_rules)
+            if not self._wait_for_shards(run_dir, shards, current_time, folder_checks) or \
+                    not self._claim(run_dir, REPORT_LOCK_NAME):
+                return None
+            reporter_list = self._merge(run_dir, list(shards))
+            with open(os.path.join(run_dir, DONE_NAME), "w", encoding="utf-8") as done_file:
+                done_file.write(f"{socket.gethostname()} {os.getpid()}")
+            return reporter_list
+
+        run_dir = tempfile.mkdtemp(prefix="shards_")
+        try:
+            self._run_shards(shards, current_time, folder_checks, run_dir, shared=False)
+            self.executor.retain_catalog(indexed_rules)
+            return self._merge(run_dir, list(shards))
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    def _pool(self) -> Executor:
+        if self.config_params.shard_processes > 0:
+            return ProcessPoolExecutor(max_workers=self.config_params.shard_processes, initializer=init_worker,
+                                       initargs=(self.config_params,))
+        return ThreadPoolExecutor(max_workers=1)
+
+    def _run_shards(self, shards: Dict[str, List[Tuple[int, Rule]]], current_time: datetime.datetime,
+                    folder_checks: Optional[Dict[str, Optional[Dict]]], run_dir: str, shared: bool) -> None:
+        """
+        Выполняет части в пуле. Следующая часть забирается только при свободном исполнителе,
+        чтобы остальные части могли забрать другие серверы.
+
+        :param shared: Части распределяются между серверами через папку блокировок. Забираются только
+                       свободные части и части без результатов с оставленной блокировкой, блокировки
+                       выполняемых частей обновляются.
+        """
+        workers = max(1, self.config_params.shard_processes)
+        remaining = iter(shards.items())
+        running: Dict[Future, str] = {}
+
+        def claim(name: str) -> bool:
+            return not shared or (not os.path.exists(os.path.join(run_dir, name + ".jsonl"))
+                                  and self._claim(run_dir, name + ".lock", reclaim_stale=True))
+
+        with self._pool() as pool:
+            while True:
+                while len(running) < workers:
+                    shard = next(((name, rules) for name, rules in remaining if claim(name)), None)
+                    if shard is None:
+                        break
+                    name, rules = shard
+                    logger.info("Выполнение части %s: строк %s", name, len(rules))
+                    running[pool.submit(run_shard, self.config_params, rules, current_time, folder_checks,
+                                        self.run_metrics is not None, os.path.join(run_dir, name + ".jsonl"))] = name
+                if not running:
+                    return
+                done, _pending = wait(running, timeout=SHARD_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                if shared:
+                    for name in running.values():
+                        self._refresh_lock(os.path.join(run_dir, name + ".lock"))
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        logger.info("Часть %s выполнена: строк отчёта %s", name, future.result())
+                    except Exception as e:
+                        # Процесс-исполнитель завершился аварийно: результаты части не сохранены
+                        logger.error("Ошибка при выполнении части %s: %s", name, e)
+                        write_fragment(os.path.join(run_dir, name + ".jsonl"),
+                                       {"host": socket.gethostname(), "error": str(e), "metrics": None}, iter([]))
+
+    @staticmethod
+    def _is_stale(lock_path: str) -> bool:
+        """Блокировка не обновлялась дольше LOCK_STALE_SECONDS"""
+        try:
+            return time.time() - os.stat(lock_path).st_mtime > LOCK_STALE_SECONDS
+        except OSError:
+            return False
+
+    @staticmethod
+    def _refresh_lock(lock_path: str) -> None:
+        """Обновляет время изменения блокировки выполняемой части (часть не считается оставленной)"""
+        try:
+            os.utime(lock_path)
+        except OSError as e:
+            logger.error("Не удалось обновить блокировку %s: %s", lock_path, e)
+
+    def _claim(self, run_dir: str, lock_name: str, reclaim_stale: bool = False) -> bool:
+        """
+        Забирает часть (или формирование отчёта): файл блокировки создаётся только одним сервером.
+
+        :param reclaim_stale: Забрать часть, блокировка которой оставлена аварийно завершённым сервером.
+        """
+        lock_path = os.path.join(run_dir, lock_name)
+        try:
+            file_descriptor = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not reclaim_stale or not self._is_stale(lock_path):
+                return False
+            # Оставленная блокировка переименовывается: это удаётся только одному из серверов
+            stale_path = f"{lock_path}.{socket.gethostname()}.{os.getpid()}.stale"
+            try:
+                os.rename(lock_path, stale_path)
+                os.remove(stale_path)
+            except OSError:
+                return False
+            logger.warning("Блокировка %s оставлена аварийно завершённым сервером и забрана повторно", lock_path)
+            return self._claim(run_dir, lock_name)
+        except FileNotFoundError:
+            # Папка запуска удалена: запуск завершён другим сервером
+            return False
+        with os.fdopen(file_descriptor, "w", encoding="utf-8") as lock_file:
+            lock_file.write(f"{socket.gethostname()} {os.getpid()}")
+        return True
+
+    @staticmethod
+    def _expire_old_runs(run_dir: str) -> None:
+        """Удаляет из общей папки блокировок папки других запусков, не изменявшиеся дольше RUN_RETENTION_SECONDS"""
+        lock_dir = os.path.dirname(run_dir)
+        try:
+            with os.scandir(lock_dir) as it:
+                old_runs = [dir_entry.path for dir_entry in it
+                            if dir_entry.is_dir() and dir_entry.path != run_dir
+                            and time.time() - dir_entry.stat().st_mtime > RUN_RETENTION_SECONDS]
+        except OSError:
+            return
+        for old_run in old_runs:
+            logger.info("Удаление папки старого запуска: %s", old_run)
+            shutil.rmtree(old_run, ignore_errors=True)
+
+    def _expire_run_dir(self, run_dir: str) -> None:
+        """Удаляет папку запуска, отчёт по которому начал, но не завершил аварийно завершённый сервер"""
+        if self._is_stale(os.path.join(run_dir, REPORT_LOCK_NAME)):
+            logger.warning("Отчёт по запуску %s не был сформирован: результаты запуска удаляются", run_dir)
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    def _wait_for_shards(self, run_dir: str, shards: Dict[str, List[Tuple[int, Rule]]],
+                         current_time: datetime.datetime, folder_checks: Optional[Dict[str, Optional[Dict]]]) -> bool:
+        """
+        Ожидает результаты частей, выполняемых другими серверами. Части, блокировка которых оставлена
+        аварийно завершённым сервером, выполняются заново. Возвращает False, если отчёт уже сформирован.
+        """
+        deadline = time.monotonic() + self.config_params.shard_wait_seconds
+        while True:
+            if not os.path.isdir(run_dir) or os.path.exists(os.path.join(run_dir, REPORT_LOCK_NAME)):
+                logger.info("Отчёт по запуску формирует другой сервер")
+                return False
+            missing = [name for name in shards if not os.path.exists(os.path.join(run_dir, name + ".jsonl"))]
+            if not missing:
+                return True
+            abandoned = {name: shards[name] for name in missing
+                         if self._is_stale(os.path.join(run_dir, name + ".lock"))}
+            if abandoned:
+                self._run_shards(abandoned, current_time, folder_checks, run_dir, shared=True)
+                continue
+            if time.monotonic() >= deadline:
+                logger.error("Не получены результаты частей за %s с: %s", self.config_params.shard_wait_seconds,
+                             missing)
+                return True
+            time.sleep(SHARD_POLL_SECONDS)
+
+    def _merge(self, run_dir: str, names: List[str]) -> List[List]:
+        """
+        Объединяет результаты частей в строки отчёта в порядке строк таблицы. Строки частей читаются потоком
+        (слиянием по номеру строки), при потоковой обработке результаты строк не загружаются в память.
+        """
+        fragments = []
+        for name in names:
+            path = os.path.join(run_dir, name + ".jsonl")
+            try:
+                header = read_fragment_header(path)
+            except (OSError, ValueError) as e:
+                logger.error("Не удалось прочитать результаты части %s: %s", name, e)
+                continue
+            if header.get("error"):
+                logger.error("Часть %s выполнена с ошибкой (%s): %s", name, header["host"], header["error"])
+            if self.run_metrics is not None and header.get("metrics"):
+                self.run_metrics.merge(header["metrics"])
+            fragments.append(self._iter_fragment(name, path))
+        return [report_row for _index, report_row in heapq.merge(*fragments, key=lambda item: item[0])]
+
+    def _iter_fragment(self, name: str, path: str) -> Iterator[Tuple[int, List]]:
+        """Строки отчёта части. Если файл части повреждён, в отчёт попадают строки, прочитанные до ошибки"""
+        try:
+            yield from iter_fragment_rows(path, self.config_params.streaming_pipeline)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error("Не удалось прочитать результаты части %s: %s", name, e)
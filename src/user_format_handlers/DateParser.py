@@ -1,11 +1,64 @@
 from datetime import datetime
-from typing import Union
+from functools import lru_cache
+from typing import Union, Callable, Dict, Tuple
 import re
 from src.user_format_handlers.date_formats import MONTH_NAMES, USER_SEASON_FORMAT_OPTIONS
 from logging import getLogger
 
 logger = getLogger(__name__)
 
+# Разбор дат фиксированной структуры срезами строки (без datetime.strptime).
+# Значение - шаблон строки с датой ("0" - цифра, остальные символы - разделители) и функция, возвращающая datetime.
+# Строки, не совпадающие с шаблоном, разбираются через strptime
+FAST_PARSERS: Dict[str, Tuple[str, Callable[[str], datetime]]] = {
+    "%Y-%m-%d %H-%M": ("0000-00-00 00-00",
+                       lambda s: datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]), int(s[11:13]), int(s[14:16]))),
+    "%Y-%m-%d": ("0000-00-00", lambda s: datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]))),
+    "%d%m%Y": ("00000000", lambda s: datetime(int(s[4:8]), int(s[2:4]), int(s[0:2]))),
+    "%d_%m_%Y": ("00_00_0000", lambda s: datetime(int(s[6:10]), int(s[3:5]), int(s[0:2]))),
+    "%d.%m.%Y": ("00.00.0000", lambda s: datetime(int(s[6:10]), int(s[3:5]), int(s[0:2]))),
+    "%d-%m-%Y": ("00-00-0000", lambda s: datetime(int(s[6:10]), int(s[3:5]), int(s[0:2]))),
+    "%Y%m%d": ("00000000", lambda s: datetime(int(s[0:4]), int(s[4:6]), int(s[6:8]))),
+    "%m%Y": ("000000", lambda s: datetime(int(s[2:6]), int(s[0:2]), 1)),
+    "%m.%Y": ("00.0000", lambda s: datetime(int(s[3:7]), int(s[0:2]), 1)),
+    # Как и strptime: 69-99 - 1900-е годы, 00-68 - 2000-е
+    "%m.%y": ("00.00", lambda s: datetime(int(s[3:5]) + (1900 if int(s[3:5]) >= 69 else 2000), int(s[0:2]), 1)),
+    "%Y": ("0000", lambda s: datetime(int(s[0:4]), 1, 1)),
+}
+
+
+def matches_layout(date_str: str, layout: str) -> bool:
+    """Проверяет, что строка совпадает с шаблоном: цифры на местах "0", остальные символы совпадают"""
+    return len(date_str) == len(layout) and all(
+        char in "0123456789" if layout_char == "0" else char == layout_char
+        for char, layout_char in zip(date_str, layout))
+
+
+# Размер кэша разобранных дат: в архивах одни и те же даты повторяются во множестве имён
+PARSE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_date_string(date_format: str, date_str: str) -> Union[datetime, None]:
+    """
+    Преобразует найденную строку с датой в datetime. Результат кэшируется по формату и строке.
+
+    Args:
+        date_format (str): Формат даты для datetime ("%d%m%Y").
+        date_str (str): Строка с датой, найденная регулярным выражением ("01052024").
+
+    Returns:
+        Union[datetime, None]: Дата или None, если строку не удалось разобрать.
+    """
+    try:
+        fast_parser = FAST_PARSERS.get(date_format)
+        if fast_parser and matches_layout(date_str, fast_parser[0]):
+            return fast_parser[1](date_str)
+        return datetime.strptime(date_str, date_format)
+    except ValueError as e:
+        logger.error("Ошибка: %s", e)
+        return None
+
 
 class DateParser:
     @staticmethod
@@ -54,9 +107,4 @@ class DateParser:
         else:
             match = re.search(date_regex_pattern, elem)
             if match:
-                matched_date_str = match.group()
-                try:
-                    return datetime.strptime(matched_date_str, date_format)
-                except ValueError as e:
-                    logger.error("Ошибка: %s", e)
-                    return None
+                return parse_date_string(date_format, match.group())
@@ -1,4 +1,4 @@
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Sequence
 from src.user_format_handlers.date_formats import USER_DATE_FORMAT_TO_RE_COMPILE
 import re
 from logging import getLogger
@@ -48,6 +48,7 @@ class PatternReplacer:
         self.user_date_format = user_date_format
         self.re_date_format = re_date_format
         self.regex_pattern = self.replace_pattern(pattern)
+        self.literal_prefix, self.literal_suffix, self.min_length = self.literal_affixes(pattern)
         logger.debug("Патерн с замененными заполнителями и форматом даты : %s", self.regex_pattern)
 
     def replace_pattern(self, pattern: str) -> str:
@@ -76,6 +77,51 @@ class PatternReplacer:
         else:
             return pattern
 
+    def literal_affixes(self, pattern: str) -> Tuple[str, str, int]:
+        """
+        Определяет постоянные части маски: начало до первого заполнителя/формата даты и конец после последнего.
+
+        Args:
+            pattern (str): Шаблон, определенный пользователем, с заполнителями.
+
+        Returns:
+            Tuple[str, str, int]: (начало имени, конец имени (включая расширение), минимальная длина имени).
+        """
+        pattern = pattern.replace("{", "").replace("}", "")
+        if self.user_date_format and self.re_date_format.pattern:
+            pattern = pattern.replace(self.user_date_format, "*")
+        parts = pattern.split("*")
+        if len(parts) == 1:
+            # Маска без заполнителей: имя совпадает с ней целиком
+            return pattern, pattern, len(pattern)
+        return parts[0], parts[-1], len(parts[0]) + len(parts[-1])
+
+
+class NameMatcher:
+    """
+    Скомпилированная проверка имени по одной или нескольким маскам.
+    Имена отсеиваются сравнением постоянного начала и конца маски (включая расширение) и длины,
+    регулярное выражение выполняется только для оставшихся имён. Маски объединяются в одно выражение
+    с альтернативами, поэтому для имени, не подходящего ни под одну маску, выражение не выполняется,
+    а для подходящего выполняется один раз.
+    """
+
+    def __init__(self, pattern_replacers: Sequence[PatternReplacer]):
+        """
+        Инициализация
+        :param pattern_replacers: Объекты класса PatternReplacer (маски строк таблицы для одной папки)
+        """
+        self.prefixes = tuple({replacer.literal_prefix for replacer in pattern_replacers})
+        self.suffixes = tuple({replacer.literal_suffix for replacer in pattern_replacers})
+        self.min_length = min((replacer.min_length for replacer in pattern_replacers), default=0)
+        self.regex = re.compile("|".join(f"(?:{replacer.regex_pattern})" for replacer in pattern_replacers)
+                                if pattern_replacers else "(?!)")
+
+    def match(self, file_name: str) -> bool:
+        """Проверяет, подходит ли имя хотя бы под одну маску"""
+        return (len(file_name) >= self.min_length and file_name.startswith(self.prefixes)
+                and file_name.endswith(self.suffixes) and self.regex.fullmatch(file_name) is not None)
+
 
 class FileNameValidator:
     """
@@ -88,6 +134,7 @@ class FileNameValidator:
         :param pattern_replacer: Объект класса PatternReplacer
         """
         self.pattern_replacer = pattern_replacer
+        self.matcher = NameMatcher([pattern_replacer])
 
     def check_pattern(self, file_name: str) -> bool:
         """
@@ -100,5 +147,4 @@ class FileNameValidator:
         Returns:
             bool: True, если имя файла соответствует шаблону, False в противном случае.
         """
-        regex_pattern = self.pattern_replacer.regex_pattern
-        return bool(re.fullmatch(regex_pattern, file_name))
+        return self.matcher.match(file_name)
@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from typing import Union
 from src.user_format_handlers.DateParser import DateParser
 from src.folders.FolderTimes import FolderCreationTime
+from src.folders.FolderEntry import FolderEntry
 import os
 import datetime
 
@@ -12,11 +13,17 @@ class DateSource(ABC):
     Абстрактный базовый класс для определения источника даты из пути.
 
     Параметры:
-    - path (str): Путь к файлу или папке.
+    - path (Union[str, FolderEntry]): Путь к файлу или папке либо запись, полученная при обходе через os.scandir.
+      Для записи используются её имя и закэшированный результат stat().
     """
 
-    def __init__(self, path: str):
-        self.path = path
+    def __init__(self, path: Union[str, FolderEntry]):
+        self.entry = path if isinstance(path, FolderEntry) else None
+        self.path = os.fspath(path)
+
+    def get_stat(self) -> Union[os.stat_result, None]:
+        """Возвращает закэшированный результат stat() или None, если передан только путь"""
+        return self.entry.stat() if self.entry is not None else None
 
     @abstractmethod
     def get_folder_date(self, datetime_date_format, re_compile_date_format):
@@ -39,7 +46,7 @@ class DateFromName(DateSource):
         Возвращает:
         - Union[datetime.datetime, None]: Дата в формате datetime.datetime или None.
         """
-        file_name = os.path.basename(self.path)
+        file_name = self.entry.name if self.entry is not None else os.path.basename(self.path)
         date_parser = DateParser()
         return date_parser.get_folder_date(datetime_date_format, re_compile_date_format, file_name)
 
@@ -57,7 +64,7 @@ class DateCreation(DateSource):
             Union[datetime.datetime, None]: Время создания в формате datetime.datetime
             или None, если время создания не может быть определено.
         """
-        folder_creation_time = FolderCreationTime(self.path)
+        folder_creation_time = FolderCreationTime(self.path, self.get_stat())
         return folder_creation_time.get_creation_time()
 
 
@@ -74,5 +81,5 @@ class DateChange(DateSource):
             Union[datetime.datetime, None]: Время модификации в формате datetime.datetime
             или None, если время модификации не может быть определено.
         """
-        folder_creation_time = FolderCreationTime(self.path)
+        folder_creation_time = FolderCreationTime(self.path, self.get_stat())
         return folder_creation_time.get_modification_time()
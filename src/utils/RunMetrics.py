@@ -0,0 +1,290 @@
+import os
+import json
+import time
+import datetime
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Iterable, Iterator, Tuple, Optional
+from src.folders.FolderEntry import FolderEntry
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+PHASES = ["check_folder", "walk", "parse_dates", "retention", "delete", "report"]
+COUNTERS = ["visited", "matched", "expired", "deleted", "failed", "date_errors"]
+DONE_STATUS = "Выполнено"
+
+
+def tree_size(path: str) -> int:
+    """Суммарный размер файлов внутри папки (символические ссылки не раскрываются)"""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for dir_entry in it:
+                    if dir_entry.is_dir(follow_symlinks=False):
+                        stack.append(dir_entry.path)
+                    else:
+                        total += dir_entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            continue
+    return total
+
+
+def item_size(item, walk_folders: bool = True) -> int:
+    """
+    Размер файла или суммарный размер файлов папки (0, если размер получить не удалось).
+    При walk_folders=False содержимое папок не обходится, размер папки - 0.
+    """
+    try:
+        if isinstance(item, FolderEntry):
+            if item.is_dir:
+                return tree_size(item.path) if walk_folders else 0
+            return item.stat().st_size
+        path = os.fspath(item)
+        if os.path.isdir(path) and not os.path.islink(path):
+            return tree_size(path) if walk_folders else 0
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+class RuleMetrics:
+    """
+    Показатели выполнения одной строки таблицы: время этапов, количество элементов, освобождённый объём и ошибки.
+    Этапы могут быть вложены (например, разбор даты во время обхода): время вложенного этапа не учитывается
+    во внешнем, поэтому сумма времени этапов равна времени выполнения строки.
+    Выключенный экземпляр (enabled=False) ничего не замеряет и возвращает потоки элементов без изменений.
+    Освобождённый объём папок учитывается только при folder_bytes=True: для этого содержимое каждой удаляемой папки
+    обходится ещё раз. Размеры, уже известные к моменту удаления (квота, отчёт, план удаления), используются повторно.
+    """
+
+    def __init__(self, enabled: bool = True, folder_bytes: bool = False) -> None:
+        self.enabled = enabled
+        self.folder_bytes = folder_bytes
+        self.durations: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.counters: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        self.errors: Dict[str, int] = {}  # Причина ошибки удаления -> количество
+        self.bytes_reclaimed = 0
+        self._stack: List[List] = []  # Активные этапы: [название, время начала текущего отрезка]
+        self._sizes: Dict[str, int] = {}  # Размеры элементов, переданных на удаление
+
+    @contextmanager
+    def phase(self, name: str):
+        """Замеряет время этапа. Внешний этап приостанавливается на время вложенного"""
+        if not self.enabled:
+            yield
+            return
+        now = time.perf_counter()
+        if self._stack:
+            self.durations[self._stack[-1][0]] += now - self._stack[-1][1]
+        self._stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self.durations[name] += now - self._stack.pop()[1]
+            if self._stack:
+                self._stack[-1][1] = now
+
+    def count(self, counter: str, value: int = 1) -> None:
+        if self.enabled:
+            self.counters[counter] += value
+
+    def timed(self, items: Iterable, phase: str, counter: Optional[str] = None) -> Iterable:
+        """
+        Поток элементов, получение каждого из которых учитывается во времени этапа phase.
+        Количество полученных элементов добавляется к счётчику counter.
+        """
+        if not self.enabled:
+            return items
+        return self._iter_timed(iter(items), phase, counter)
+
+    def _iter_timed(self, items: Iterator, phase: str, counter: Optional[str]) -> Iterator:
+        while True:
+            with self.phase(phase):
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+            if counter:
+                self.counters[counter] += 1
+            yield item
+
+    def sized(self, items: Iterable, known_sizes: Optional[Dict[str, int]] = None) -> Iterable:
+        """
+        Поток элементов на удаление: размер каждого элемента запоминается до удаления.
+        :param known_sizes: Уже известные размеры элементов (путь -> размер). Для них размер повторно не определяется.
+        """
+        if not self.enabled:
+            return items
+        return (self._remember_size(item, known_sizes) for item in items)
+
+    def _remember_size(self, item, known_sizes: Optional[Dict[str, int]]):
+        path = os.fspath(item)
+        size = known_sizes.get(path) if known_sizes else None
+        self._sizes[path] = item_size(item, self.folder_bytes) if size is None else size
+        return item
+
+    def add_result(self, path: str, result) -> None:
+        """Учитывает результат удаления (CleanResult)"""
+        size = self._sizes.pop(path, 0)
+        if result.status == DONE_STATUS:
+            self.counters["deleted"] += 1
+            self.bytes_reclaimed += size
+        else:
+            self.counters["failed"] += 1
+            # Комментарий может содержать текст исключения: причиной считается часть до первого двоеточия
+            reason = result.comment.split(":")[0]
+            self.errors[reason] = self.errors.get(reason, 0) + 1
+
+    def results(self, results: Iterable[Tuple[str, object]]) -> Iterable[Tuple[str, object]]:
+        """Поток результатов удаления (путь, CleanResult), каждый из которых учитывается в показателях"""
+        if not self.enabled:
+            return results
+        return (self._add_result_item(item) for item in results)
+
+    def _add_result_item(self, item: Tuple[str, object]) -> Tuple[str, object]:
+        self.add_result(*item)
+        return item
+
+    def to_dict(self) -> Dict:
+        return {"durations": {phase: round(seconds, 6) for phase, seconds in self.durations.items()},
+                "counters": dict(self.counters), "bytes_reclaimed": self.bytes_reclaimed, "errors": dict(self.errors)}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RuleMetrics":
+        """Показатели строки, собранные в другом процессе (to_dict)"""
+        metrics = cls()
+        metrics.durations.update(data["durations"])
+        metrics.counters.update(data["counters"])
+        metrics.bytes_reclaimed = data["bytes_reclaimed"]
+        metrics.errors = dict(data["errors"])
+        return metrics
+
+
+class RunMetrics:
+    """
+    Показатели запуска скрипта: показатели строк таблицы, общих обходов и формирования отчёта.
+    Сохраняются в JSON-файл итогов запуска и в текстовый файл в формате Prometheus (textfile collector).
+    """
+
+    def __init__(self, started: datetime.datetime) -> None:
+        """
+        Инициализатор
+        :param started: Время запуска скрипта.
+        """
+        self.started = started
+        self.success = False
+        self.report_seconds = 0.0
+        self._start = time.perf_counter()
+        self._rules: Dict[int, Tuple[Dict[str, str], RuleMetrics]] = {}
+        self._shared_traversals: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def rule_metrics(self, index: int, task_number, process_name, folder_path: str,
+                     folder_bytes: bool = False) -> RuleMetrics:
+        """Создаёт показатели строки таблицы с номером index (folder_bytes - как у RuleMetrics)"""
+        metrics = RuleMetrics(folder_bytes=folder_bytes)
+        labels = {"row": index, "task": str(task_number), "process": str(process_name), "folder": str(folder_path)}
+        with self._lock:
+            self._rules[index] = (labels, metrics)
+        return metrics
+
+    def add_shared_traversal(self, root: str, seconds: float, visited: int, rows: List[int]) -> None:
+        """Учитывает общий обход дерева для нескольких строк таблицы"""
+        with self._lock:
+            self._shared_traversals.append({"root": root, "seconds": round(seconds, 6), "visited": visited,
+                                            "rows": rows})
+
+    def fragment(self) -> Dict:
+        """Показатели строк и общих обходов для передачи в другой процесс (merge)"""
+        with self._lock:
+            return {"rules": [[index, labels, metrics.to_dict()] for index, (labels, metrics) in self._rules.items()],
+                    "shared_traversals": list(self._shared_traversals)}
+
+    def merge(self, fragment: Dict) -> None:
+        """Добавляет показатели, собранные в другом процессе или на другом сервере (fragment)"""
+        with self._lock:
+            for index, labels, metrics in fragment["rules"]:
+                self._rules[index] = (labels, RuleMetrics.from_dict(metrics))
+            self._shared_traversals.extend(fragment["shared_traversals"])
+
+    def summary(self) -> Dict:
+        """Итоги запуска в виде словаря"""
+        rules = [dict(labels, **metrics.to_dict()) for labels, metrics in
+                 (self._rules[index] for index in sorted(self._rules))]
+        totals = dict.fromkeys(COUNTERS, 0)
+        for rule in rules:
+            for counter, value in rule["counters"].items():
+                totals[counter] += value
+        totals["bytes_reclaimed"] = sum(rule["bytes_reclaimed"] for rule in rules)
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "duration_seconds": round(time.perf_counter() - self._start, 6),
+            "success": self.success,
+            "report_seconds": round(self.report_seconds, 6),
+            "totals": totals,
+            "rules": rules,
+            "shared_traversals": list(self._shared_traversals),
+        }
+
+    def write_summary(self, path: str) -> None:
+        """Сохраняет итоги запуска в JSON-файл"""
+        summary = self.summary()
+        self._write_atomic(path, json.dumps(summary, ensure_ascii=False, indent=2))
+        logger.info("Итоги запуска сохранены по пути: %s", path)
+
+    def write_textfile(self, path: str) -> None:
+        """Сохраняет показатели в текстовый файл в формате Prometheus"""
+        self._write_atomic(path, self.prometheus_text())
+        logger.info("Показатели запуска сохранены по пути: %s", path)
+
+    def prometheus_text(self) -> str:
+        summary = self.summary()
+        lines = []
+
+        def metric(name: str, help_text: str, samples: List[Tuple[Dict[str, str], float]]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{escape_label(label)}"' for key, label in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        def rule_labels(rule: Dict, **extra) -> Dict[str, str]:
+            # Номер строки таблицы различает строки с одинаковыми задачей и папкой (разные маски в одной папке):
+            # повторяющиеся наборы меток делают файл недопустимым для textfile collector
+            return dict({"row": rule["row"], "task": rule["task"], "folder": rule["folder"]}, **extra)
+
+        rules = summary["rules"]
+        metric("cleanup_rule_duration_seconds", "Время выполнения этапа строки таблицы",
+               [(rule_labels(rule, phase=phase), seconds) for rule in rules
+                for phase, seconds in rule["durations"].items()])
+        metric("cleanup_rule_entries", "Количество элементов строки таблицы",
+               [(rule_labels(rule, kind=kind), value) for rule in rules for kind, value in rule["counters"].items()])
+        metric("cleanup_rule_bytes_reclaimed", "Освобождённый объём, байт",
+               [(rule_labels(rule), rule["bytes_reclaimed"]) for rule in rules])
+        metric("cleanup_rule_errors", "Количество ошибок удаления по причинам",
+               [(rule_labels(rule, reason=reason), value) for rule in rules
+                for reason, value in rule["errors"].items()])
+        metric("cleanup_shared_traversal_seconds", "Время общего обхода дерева",
+               [({"root": traversal["root"]}, traversal["seconds"]) for traversal in summary["shared_traversals"]])
+        metric("cleanup_run_duration_seconds", "Время выполнения запуска", [({}, summary["duration_seconds"])])
+        metric("cleanup_run_report_seconds", "Время формирования отчёта", [({}, summary["report_seconds"])])
+        metric("cleanup_run_success", "Запуск завершён успешно (1) или с ошибкой (0)", [({}, int(self.success))])
+        metric("cleanup_run_timestamp_seconds", "Время запуска (Unix time)", [({}, int(self.started.timestamp()))])
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _write_atomic(path: str, text: str) -> None:
+        """Файл заменяется целиком, чтобы сборщик показателей не прочитал его частично"""
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as output:
+            output.write(text)
+        os.replace(temp_path, path)
+
+
+def escape_label(value) -> str:
+    """Экранирование значения метки в формате Prometheus"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
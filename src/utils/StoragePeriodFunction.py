@@ -1,15 +1,37 @@
 from logging import getLogger
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
 from dateutil.relativedelta import relativedelta
-from typing import List, Union
+from typing import List, Dict, Union, Iterable, Iterator, Optional, Sequence, Tuple
+from src.utils.RunMetrics import item_size
+import os
+import heapq
+import calendar
 import datetime
 
+try:
+    import numpy as np
+except ImportError:  # NumPy не обязателен: без него пакетная проверка выполняется обычным циклом
+    np = None
+
 logger = getLogger(__name__)
 
+# Единицы объёма в интервале хранения строки с квотой ("10 ГБ"): единица -> байт
+QUOTA_UNITS = {"кб": 1024, "мб": 1024 ** 2, "гб": 1024 ** 3, "тб": 1024 ** 4}
+
+
+def is_quota_interval(interval: str) -> bool:
+    """Интервал хранения задаёт квоту объёма ("10 ГБ"), а не срок хранения ("10 д")"""
+    parts = interval.split()
+    return len(parts) == 2 and parts[1].lower() in QUOTA_UNITS
+
 
 class StoragePeriodFunction(ABC):
     """Абстрактный базовый класс для функций обработки периодов хранения."""
 
+    # Запас для оценки времени истечения срока (expiry_time): оценка не должна быть позже фактического истечения
+    EXPIRY_MARGIN = datetime.timedelta(days=3)
+
     def __init__(self, date_source, offset: int, datetime_date_format: str, re_compile_date_format):
         """
         Инициализирует экземпляр класса StoragePeriodFunction.
@@ -25,81 +47,376 @@ class StoragePeriodFunction(ABC):
         self.offset = offset
         self.datetime_date_format = datetime_date_format
         self.re_compile_date_format = re_compile_date_format
+        self._cutoff_date = None
+        self._cutoff = None
+        self.metrics = None  # Показатели строки таблицы (RuleMetrics), если они собираются
+
+    def _phase(self, name: str):
+        """Этап для показателей строки таблицы"""
+        return self.metrics.phase(name) if self.metrics is not None else nullcontext()
+
+    def get_date(self, elem_path) -> Union[datetime.datetime, None]:
+        """Получает дату папки/файла из источника даты (или уже определённую дату записи FolderEntry)"""
+        folder_date = getattr(elem_path, "date", None)
+        if folder_date is not None:
+            return folder_date
+        if self.metrics is None:
+            return self.date_source(elem_path).get_folder_date(self.datetime_date_format, self.re_compile_date_format)
+        with self.metrics.phase("parse_dates"):
+            try:
+                folder_date = self.date_source(elem_path).get_folder_date(self.datetime_date_format,
+                                                                          self.re_compile_date_format)
+            except Exception:
+                self.metrics.count("date_errors")
+                raise
+        if folder_date is None:
+            self.metrics.count("date_errors")
+        return folder_date
 
     @abstractmethod
-    def process(self, folder_contents: List[str], current_date: datetime):
+    def compute_cutoff(self, current_date: datetime.datetime) -> Optional[datetime.datetime]:
         """
-               Абстрактный метод обработки периода хранения.
+        Вычисляет крайнюю дату: срок хранения истёк для всех дат, не превышающих её.
+
+        Args:
+            current_date (datetime): Текущая дата.
+
+        Returns:
+            Optional[datetime]: Крайняя дата или None, если ни одна дата не может быть просрочена.
+        """
+        pass
+
+    def get_cutoff(self, current_date: datetime.datetime) -> Optional[datetime.datetime]:
+        """Возвращает крайнюю дату. Вычисляется один раз для текущей даты"""
+        if self._cutoff_date != current_date:
+            self._cutoff = self.compute_cutoff(current_date)
+            self._cutoff_date = current_date
+            logger.debug("Крайняя дата хранения: %s", self._cutoff)
+        return self._cutoff
+
+    def is_expired(self, folder_date: datetime.datetime, current_date: datetime.datetime) -> bool:
+        """
+        Проверяет, истёк ли срок хранения для указанной даты.
+
+        Args:
+            folder_date (datetime): Дата папки/файла.
+            current_date (datetime): Текущая дата.
+        """
+        logger.debug("Дата из папки/файла: %s", folder_date)
+        cutoff = self.get_cutoff(current_date)
+        return cutoff is not None and folder_date <= cutoff
+
+    def expired_mask(self, folder_dates: Sequence, current_date: datetime.datetime):
+        """
+        Пакетная проверка срока хранения.
+
+        Args:
+            folder_dates: Даты папок/файлов (datetime или None) либо массив numpy.datetime64 (NaT - дата не определена).
+            current_date (datetime): Текущая дата.
+
+        Returns:
+            Булева маска numpy (или список, если NumPy не установлен): True - срок хранения истёк.
+        """
+        if np is None:
+            return self.exact_mask(folder_dates, current_date)
+        dates = np.asarray(folder_dates, dtype="datetime64[us]")
+        cutoff = self.get_cutoff(current_date)
+        if cutoff is None:
+            return np.zeros(dates.shape, dtype=bool)
+        return dates <= np.datetime64(cutoff, "us")
+
+    @abstractmethod
+    def expiry_delta(self):
+        """Смещение срока хранения (timedelta или relativedelta), прибавляемое к дате папки/файла"""
+        pass
+
+    def expiry_time(self, folder_date: datetime.datetime) -> Optional[datetime.datetime]:
+        """
+        Оценка времени, начиная с которого срок хранения даты истечёт. Оценка не позже фактического истечения
+        (с запасом EXPIRY_MARGIN), поэтому перед удалением срок хранения проверяется через is_expired.
+
+        Returns:
+            Optional[datetime]: Время или None, если срок хранения не истечёт (дата вне допустимого диапазона).
+        """
+        expiry_delta = self.expiry_delta()
+        if expiry_delta is None:
+            return None
+        try:
+            return folder_date + expiry_delta - self.EXPIRY_MARGIN
+        except (OverflowError, ValueError):
+            return None
+
+    def is_item_expired(self, elem_path, current_date: datetime.datetime) -> bool:
+        """Проверяет, истёк ли срок хранения папки/файла. При ошибке получения даты элемент не удаляется"""
+        with self._phase("retention"):
+            try:
+                folder_date = self.get_date(elem_path)
+            except Exception as e:
+                logger.error("Ошибка: %s", e)
+                return False
+            return self.is_date_expired(folder_date, current_date)
+
+    def is_date_expired(self, folder_date: datetime.datetime, current_date: datetime.datetime) -> bool:
+        """Проверяет, истёк ли срок хранения для даты. При ошибке (в том числе без даты) элемент не удаляется"""
+        try:
+            return self.is_expired(folder_date, current_date)
+        except Exception as e:
+            logger.error("Ошибка: %s", e)
+            return False
+
+    def exact_mask(self, folder_dates: Sequence, current_date: datetime.datetime):
+        """Пакетная проверка отдельно для каждой даты (без NumPy или когда крайняя дата неприменима)"""
+        mask = []
+        for folder_date in folder_dates:
+            if np is not None and isinstance(folder_date, np.datetime64):
+                folder_date = folder_date.astype(datetime.datetime)  # NaT преобразуется в None
+            mask.append(folder_date is not None and self.is_date_expired(folder_date, current_date))
+        return mask if np is None else np.array(mask, dtype=bool)
+
+    def process(self, folder_contents: List[str], current_date: datetime) -> List[str]:
+        """
+               Обработка периода хранения.
 
                Args:
-                   folder_contents (List[str]): Содержимое папки.
-                   date_modification (bool): Флаг - Нужно ли смотреть на дату изменения
+                   folder_contents (List[str]): Содержимое папки (пути или записи FolderEntry с закэшированным stat).
                    current_date (datetime): Текущая дата.
 
-
-               Raises:
-                   NotImplementedError: Если метод не реализован в подклассе.
+               Returns:
+                   List[str]: Элементы, срок хранения которых истёк.
                """
-        pass
+        return self.partition(folder_contents, current_date)[0]
+
+    def partition(self, folder_contents: Iterable, current_date: datetime) -> Tuple[List, List[Tuple]]:
+        """
+        Разделяет элементы на элементы с истёкшим сроком хранения и остальные.
+
+        Returns:
+            Tuple: (элементы с истёкшим сроком хранения, [(элемент, дата)] для остальных элементов с датой).
+        """
+        folder_contents = list(folder_contents)
+        # Даты определяются для каждого элемента, срок хранения проверяется одной пакетной операцией
+        folder_dates = [self.get_date_or_none(elem_path) for elem_path in folder_contents]
+        mask = self.expired_mask(folder_dates, current_date)
+        expired, pending = [], []
+        for elem_path, folder_date, is_expired in zip(folder_contents, folder_dates, mask):
+            if is_expired:
+                expired.append(elem_path)
+            elif folder_date is not None:
+                pending.append((elem_path, folder_date))
+        return expired, pending
+
+    def get_date_or_none(self, elem_path) -> Optional[datetime.datetime]:
+        """Получает дату папки/файла. При ошибке возвращает None (элемент не удаляется)"""
+        try:
+            folder_date = self.get_date(elem_path)
+        except Exception as e:
+            logger.error("Ошибка: %s", e)
+            return None
+        if folder_date is None:
+            logger.debug("Не удалось определить дату: %s", elem_path)
+        return folder_date
+
+    def iter_process(self, folder_contents: Iterable, current_date: datetime) -> Iterator:
+        """Потоковый вариант process: возвращает элементы с истёкшим сроком хранения по мере проверки"""
+        return (elem_path for elem_path in folder_contents if self.is_item_expired(elem_path, current_date))
 
 
 class CurrentMonthWithOffset(StoragePeriodFunction):
     """Класс для обработки периода текущего месяца с учетом смещения."""
 
-    def process(self, folder_contents: List[str], current_date: datetime) -> List[str]:
+    def __init__(self, date_source, offset: int, datetime_date_format: str, re_compile_date_format):
+        super().__init__(date_source, offset, datetime_date_format, re_compile_date_format)
+        self._last_day_date = None
+        self._last_day = None
+
+    def compute_cutoff(self, current_date: datetime.datetime) -> Optional[datetime.datetime]:
+        """
+        Полных месяцев (relativedelta) прошло не меньше смещения, если дата + смещение в месяцах не позже текущей.
+        Крайняя дата - текущая дата минус смещение в месяцах. Если такого дня в месяце нет - конец этого месяца.
+        """
+        try:
+            cutoff = current_date - relativedelta(months=self.offset)
+        except (ValueError, OverflowError):
+            return None
+        if cutoff.day < current_date.day:
+            # В месяце крайней даты меньше дней, чем номер текущего дня: просрочен весь месяц
+            return datetime.datetime(cutoff.year, cutoff.month, 1) + relativedelta(months=1) - \
+                datetime.timedelta(microseconds=1)
+        return cutoff
+
+    def _last_day_range(self, current_date: datetime.datetime):
+        """
+        Если текущий день - последний день месяца, а в месяце крайней даты дней больше, то для дней после крайней даты
+        до конца её месяца (например, 30 и 31 марта при текущей дате 30 апреля) срок хранения тоже истёк,
+        если время не позже текущего. Возвращает границы этих дней (cutoff, начало следующего месяца) или None.
+        """
+        if self._last_day_date != current_date:
+            self._last_day_date = current_date
+            self._last_day = None
+            cutoff = self.get_cutoff(current_date)
+            if cutoff is not None and \
+                    current_date.day == calendar.monthrange(current_date.year, current_date.month)[1] and \
+                    cutoff.day != calendar.monthrange(cutoff.year, cutoff.month)[1]:
+                self._last_day = cutoff, datetime.datetime(cutoff.year, cutoff.month, 1) + relativedelta(months=1)
+        return self._last_day
+
+    def is_expired(self, folder_date: datetime.datetime, current_date: datetime.datetime) -> bool:
         """ Обрабатывает папки на основе текущего месяца с учетом смещения. """
-        result: List[str] = []
-        for elem_path in folder_contents:
-            try:
-                folder_date = self.date_source(elem_path).get_folder_date(self.datetime_date_format,
-                                                                          self.re_compile_date_format)
-                time_delta = relativedelta(current_date, folder_date)
-                months_difference = time_delta.years * 12 + time_delta.months
-                logger.debug("Дата из папки/файла: %s", folder_date)
-                logger.debug("Разница в месяцах: %s", months_difference)
-                if months_difference >= self.offset: result.append(elem_path)
-            except Exception as e:
-                logger.error("Ошибка: %s", e)
-        return result
+        if self.offset == 0:
+            # Нулевое смещение: для дат в будущем relativedelta считает месяцы отдельно, проверка без крайней даты
+            time_delta = relativedelta(current_date, folder_date)
+            months_difference = time_delta.years * 12 + time_delta.months
+            logger.debug("Дата из папки/файла: %s", folder_date)
+            logger.debug("Разница в месяцах: %s", months_difference)
+            return months_difference >= self.offset
+        if super().is_expired(folder_date, current_date):
+            return True
+        last_day_range = self._last_day_range(current_date)
+        return last_day_range is not None and last_day_range[0] < folder_date < last_day_range[1] and \
+            folder_date.time() <= current_date.time()
+
+    def expiry_delta(self):
+        # При нулевом смещении просрочены и даты в будущем в пределах месяца
+        return relativedelta(months=self.offset if self.offset else -1)
+
+    def expired_mask(self, folder_dates: Sequence, current_date: datetime.datetime):
+        if np is None or self.offset == 0:
+            return self.exact_mask(folder_dates, current_date)
+        dates = np.asarray(folder_dates, dtype="datetime64[us]")
+        mask = super().expired_mask(dates, current_date)
+        last_day_range = self._last_day_range(current_date)
+        if last_day_range is not None:
+            time_of_day = dates - dates.astype("datetime64[D]")
+            current_time_of_day = np.datetime64(current_date, "us") - np.datetime64(current_date.date(), "D")
+            mask |= ((dates > np.datetime64(last_day_range[0], "us")) & (dates < np.datetime64(last_day_range[1], "us"))
+                     & (time_of_day <= current_time_of_day))
+        return mask
 
 
 class CurrentDayWithOffset(StoragePeriodFunction):
     """Класс для обработки периода текущего дня с учетом смещения."""
 
-    def process(self, folder_contents: List[str], current_date: datetime) -> List[str]:
-        """ Обрабатывает папки на основе текущего дня с учетом смещения."""
-        result: List[str] = []
-        for elem_path in folder_contents:
-            try:
-                folder_date = self.date_source(elem_path).get_folder_date(self.datetime_date_format,
-                                                                          self.re_compile_date_format)
-                logger.debug("Дата из папки/файла: %s", folder_date)
-                logger.debug("Разница в днях: %s", (current_date - folder_date).days)
-                if (current_date - folder_date).days >= self.offset:
-                    result.append(elem_path)
-            except Exception as e:
-                logger.error("Ошибка : %s", e)
-        return result
+    EXPIRY_MARGIN = datetime.timedelta(0)  # Срок хранения истекает ровно через offset дней
+
+    def compute_cutoff(self, current_date: datetime.datetime) -> Optional[datetime.datetime]:
+        """(current_date - folder_date).days >= offset равносильно folder_date <= current_date - offset дней"""
+        try:
+            return current_date - datetime.timedelta(days=self.offset)
+        except OverflowError:
+            return None
+
+    def expiry_delta(self):
+        return datetime.timedelta(days=self.offset)
 
 
 class CurrentYearWithOffset(StoragePeriodFunction):
     """Класс для обработки периода текущего года с учетом смещения."""
 
-    def process(self, folder_contents: List[str], current_date: datetime) -> List[str]:
+    def compute_cutoff(self, current_date: datetime.datetime) -> Optional[datetime.datetime]:
+        """Дата + смещение в годах не позже текущей, если дата не позже текущей даты минус смещение в годах"""
+        year = current_date.year - self.offset
+        if year < datetime.MINYEAR:
+            return None
+        if current_date.month == 2 and current_date.day == 29 and not calendar.isleap(year):
+            # 29 февраля: просрочены все даты по 28 февраля включительно
+            return datetime.datetime(year, 3, 1) - datetime.timedelta(microseconds=1)
+        return current_date.replace(year=year)
+
+    def expiry_delta(self):
+        return relativedelta(years=self.offset)
+
+    def is_expired(self, folder_date: datetime.datetime, current_date: datetime.datetime) -> bool:
         """ Обрабатывает папки на основе текущего года с учетом смещения."""
-        result: List[str] = []
-        for elem_path in folder_contents:
-            try:
-                folder_date = self.date_source(elem_path).get_folder_date(self.datetime_date_format,
-                                                                          self.re_compile_date_format)
-                delete_after_date = folder_date.replace(year=folder_date.year + self.offset)
+        if folder_date.month == 2 and folder_date.day == 29:
+            # Для 29 февраля дата + смещение может не существовать (ValueError): проверка как для отдельной даты
+            delete_after_date = folder_date.replace(year=folder_date.year + self.offset)
+            logger.debug("Дата из папки/файла: %s", folder_date)
+            logger.debug("Дата папки/файла + смещение: %s", delete_after_date)
+            return current_date >= delete_after_date
+        return super().is_expired(folder_date, current_date)
 
-                logger.debug("Дата из папки/файла: %s", folder_date)
-                logger.debug("Дата папки/файла + смещение: %s", delete_after_date)
+    def expired_mask(self, folder_dates: Sequence, current_date: datetime.datetime):
+        if np is None:
+            return super().expired_mask(folder_dates, current_date)
+        dates = np.asarray(folder_dates, dtype="datetime64[us]")
+        mask = super().expired_mask(dates, current_date)
+        days = dates.astype("datetime64[D]")
+        months = dates.astype("datetime64[M]")
+        feb_29 = ((months.astype("int64") % 12) == 1) & ((days - months.astype("datetime64[D]")).astype("int64") == 28)
+        if feb_29.any():
+            mask[feb_29] = self.exact_mask(dates[feb_29], current_date)
+        return mask
 
-                if current_date >= delete_after_date:
-                    result.append(elem_path)
 
-            except Exception as e:
-                logger.error("Ошибка: %s", e)
-        return result
+class QuotaRetention(StoragePeriodFunction):
+    """
+    Хранение по объёму (квота): суммарный размер подходящих элементов папки не должен превышать offset байт.
+    При превышении удаляются самые старые элементы, пока объём не окажется в пределах квоты.
+    Самые старые элементы выбираются из кучи (heapq) по мере необходимости, без сортировки всех элементов.
+    """
+
+    def __init__(self, date_source, offset: int, datetime_date_format: str, re_compile_date_format):
+        super().__init__(date_source, offset, datetime_date_format, re_compile_date_format)
+        self.sizes: Dict[str, int] = {}  # Размеры выбранных на удаление элементов, байт
+
+    def compute_cutoff(self, current_date: datetime.datetime) -> Optional[datetime.datetime]:
+        return None
+
+    def is_expired(self, folder_date: datetime.datetime, current_date: datetime.datetime) -> bool:
+        """Возраст элемента сам по себе не определяет удаление"""
+        return False
+
+    def expiry_delta(self):
+        return None
+
+    def partition(self, folder_contents: Iterable, current_date: datetime) -> Tuple[List, List[Tuple]]:
+        """
+        Выбирает самые старые элементы, удаление которых возвращает объём в пределы квоты.
+        Элементы без даты учитываются в объёме, но не удаляются.
+
+        Returns:
+            Tuple: (элементы на удаление, []).
+        """
+        folder_contents = self._top_level(list(folder_contents))
+        sizes = [item_size(elem_path) for elem_path in folder_contents]
+        total = sum(sizes)
+        excess = total - self.offset
+        if excess <= 0:
+            logger.debug("Объём %s байт в пределах квоты %s байт", total, self.offset)
+            return [], []
+
+        heap = []
+        for position, elem_path in enumerate(folder_contents):
+            folder_date = self.get_date_or_none(elem_path)
+            if folder_date is not None:
+                heap.append((folder_date, position))
+        heapq.heapify(heap)
+        selected = []
+        while excess > 0 and heap:
+            _folder_date, position = heapq.heappop(heap)
+            selected.append(folder_contents[position])
+            self.sizes[os.fspath(folder_contents[position])] = sizes[position]
+            excess -= sizes[position]
+        logger.info("Объём %s байт превышает квоту %s байт: на удаление %s эл (%s байт)", total, self.offset,
+                    len(selected), sum(self.sizes.values()))
+        return selected, []
+
+    def iter_process(self, folder_contents: Iterable, current_date: datetime) -> Iterator:
+        """Для выбора по квоте нужен объём всех элементов, поэтому элементы собираются перед выбором"""
+        return iter(self.process(folder_contents, current_date))
+
+    @staticmethod
+    def _top_level(folder_contents: List) -> List:
+        """Исключает элементы, вложенные в другие подходящие папки (их объём учтён в объёме папки)"""
+        dirs = {os.path.normcase(os.path.normpath(os.fspath(elem_path))) for elem_path in folder_contents
+                if getattr(elem_path, "is_dir", False)}
+        if not dirs:
+            return folder_contents
+        top_level = []
+        for elem_path in folder_contents:
+            parent = os.path.dirname(os.path.normcase(os.path.normpath(os.fspath(elem_path))))
+            while parent not in dirs and os.path.dirname(parent) != parent:
+                parent = os.path.dirname(parent)
+            if parent not in dirs:
+                top_level.append(elem_path)
+        return top_level
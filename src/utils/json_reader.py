@@ -1,5 +1,5 @@
 import json
-from typing import NamedTuple, Dict, List
+from typing import NamedTuple, Dict, List, Optional
 from logging import getLogger
 
 logger = getLogger(__name__)
@@ -12,6 +12,42 @@ class ConfigParams(NamedTuple):
     message: str
     mail_recipients: List[str]
     mail_sender: str
+    max_workers: int = 4  # Размер пула потоков для обработки строк таблицы
+    max_rows_per_share: int = 2  # Максимум строк, одновременно обращающихся к одному серверу/диску
+    prune_traversal: bool = False  # Не обходить содержимое папок, которые будут удалены целиком
+    shared_traversal: bool = False  # Один обход дерева для строк с одинаковыми или вложенными путями
+    scan_catalog: bool = False  # Каталог сканирования (SQLite рядом с отчётами) для инкрементального обхода
+    streaming_pipeline: bool = False  # Потоковая обработка: поиск, отбор, удаление и результаты без общих списков
+    stream_buffer_size: int = 1000  # Размер буфера результатов в памяти при потоковой обработке
+    bulk_delete: bool = False  # Пакетное удаление относительно дескрипторов папок
+    delete_workers: int = 4  # Количество потоков пакетного удаления
+    streaming_report: bool = False  # Строки отчёта дописываются в журнал, xlsx собирается в режиме write-only
+    run_summary: bool = False  # Сохранять итоги запуска (показатели строк таблицы) в JSON рядом с отчётом
+    metrics_textfile: str = ""  # Путь к файлу показателей в формате Prometheus (node_exporter textfile collector)
+    metrics_folder_bytes: bool = False  # Учитывать в показателях объём удаляемых папок (повторный обход их содержимого)
+    async_logging: bool = False  # Запись журнала в файл фоновым потоком (через очередь)
+    log_level: str = "DEBUG"  # Уровень журнала
+    log_levels: Optional[Dict[str, str]] = None  # Уровни журнала для модулей ({"src.folders": "DEBUG"})
+    log_collection_limit: int = 20  # Количество первых элементов списков, выводимых в журнал
+    probe_folders: bool = False  # Параллельная проверка доступности всех папок до начала обработки
+    probe_timeout: float = 30.0  # Максимальное время проверки доступности папок, секунд
+    probe_backoff_hours: float = 20.0  # Недоступная папка не проверяется указанное время (удваивается при повторе)
+    probe_max_backoff_hours: float = 168.0  # Максимальный интервал до повторной проверки недоступной папки
+    probe_max_workers: int = 32  # Максимальное число потоков проверки доступности папок
+    validation_cache: bool = False  # Не проверять повторно строки таблицы, не изменившиеся с прошлого запуска
+    daemon_tick_seconds: float = 60.0  # Режим постоянной работы: интервал проверки расписания и таблицы, секунд
+    daemon_schedule_hours: Optional[Dict[str, float]] = None  # Период запуска по единице срока (None - 1/24/168 ч)
+    expiry_index: bool = False  # Между полными обходами проверять только элементы с подошедшим сроком хранения
+    expiry_full_scan_hours: float = 168.0  # Интервал полного обхода папок строки при индексе времени истечения, часов
+    shard_processes: int = 0  # Количество процессов для частей строк, разделённых по серверам/дискам (0 - без них)
+    shard_lock_dir: str = ""  # Общая папка для распределения частей строк между несколькими серверами запуска
+    shard_wait_seconds: float = 3600.0  # Максимальное время ожидания частей, выполняемых другими серверами, секунд
+    deletion_journal: bool = False  # Журнал удаления для продолжения прерванного запуска
+    journal_batch_size: int = 100  # Количество записей журнала удаления, после которого он сбрасывается на диск
+    io_max_ops_per_second: float = 0.0  # Максимум операций с одним сервером/диском в секунду (0 - без ограничения)
+    io_min_ops_per_second: float = 5.0  # Частота операций, ниже которой ограничение не снижает скорость
+    io_target_latency_ms: float = 50.0  # Целевая задержка операции: при превышении частота операций снижается
+    report_bytes_freed: bool = False  # Объём каждого удаляемого элемента в отчёте (для строк с квотой - всегда)
 
 
 def json_reader(config_file: str) -> ConfigParams:
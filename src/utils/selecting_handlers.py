@@ -8,11 +8,15 @@ def cls_definition(storage_period: str, date_source, datetime_date_format: str,
     Возвращает класс, соответствующий указанному периоду хранения.
 
     Args:
-        storage_period str: Интервал хранения (1 Год ), (2 Месяца ) и т.д
+        storage_period str: Интервал хранения (1 Год ), (2 Месяца ) и т.д или квота объёма (10 ГБ )
     Returns:
         Union[None, StoragePeriodFunction]: Класс, соответствующий периоду хранения, или None, если такого нет.
     """
     offset, period = storage_period.split()
+    if period.lower() in QUOTA_UNITS:  # Квота объёма ("10 ГБ")
+        return QuotaRetention(offset=int(offset) * QUOTA_UNITS[period.lower()], date_source=date_source,
+                              datetime_date_format=datetime_date_format,
+                              re_compile_date_format=re_compile_date_format)
     current_cls = {
         "г": CurrentYearWithOffset,  # Год
         "м": CurrentMonthWithOffset,  # Месяц
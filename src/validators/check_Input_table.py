@@ -1,11 +1,20 @@
+import os
 import re
-from typing import List, Dict, Tuple
+import json
+import hashlib
+from typing import List, Dict, Tuple, Optional
 from abc import ABC, abstractmethod
 from src.user_format_handlers.date_formats import USER_DATE_FORMAT_TO_RE_COMPILE
+from src.utils.StoragePeriodFunction import QUOTA_UNITS
+from src.logger.logger_settings import summarize
 from logging import getLogger
 
 logger = getLogger(__name__)
 
+# Версия правил проверки: входит в хэш строки, при изменении правил сохранённые результаты не используются
+VALIDATION_VERSION = "3"
+VALIDATION_CACHE_FILENAME = "validation_cache.json"
+
 
 class Validator(ABC):
     """ Абстрактный базовый класс для всех валидаторов. """
@@ -24,13 +33,12 @@ class Validator(ABC):
 class FolderPathValidator(Validator):
     """Валидатор для проверки пути к папке."""
 
+    PATH_PATTERN_1 = re.compile(r"[A-Za-z]:\\(?:[^\\/:*?'<>|\r\n]+\\)*[^\\/:*?'<>|\r\n]*")
+    PATH_PATTERN_2 = re.compile(r"\\\\[A-Za-z0-9._-]+\\(?:[^\\/:*?'<>|\r\n]+\\)*[^\\/:*?'<>|\r\n]*")
+
     def validate(self, value: str) -> bool:
-        regex_pattern_path_1 = r"[A-Za-z]:\\(?:[^\\/:*?'<>|\r\n]+\\)*[^\\/:*?'<>|\r\n]*"
-        regex_pattern_path_2 = r"\\\\[A-Za-z0-9._-]+\\(?:[^\\/:*?'<>|\r\n]+\\)*[^\\/:*?'<>|\r\n]*"
         try:
-            path_pattern_1 = re.compile(regex_pattern_path_1)
-            path_pattern_2 = re.compile(regex_pattern_path_2)
-            return bool(path_pattern_1.match(value) or path_pattern_2.match(value))
+            return bool(self.PATH_PATTERN_1.match(value) or self.PATH_PATTERN_2.match(value))
         except Exception as e:
             logger.error("Ошибка при проверки валидации пути к папке %s", e)
             return False
@@ -39,16 +47,18 @@ class FolderPathValidator(Validator):
 class UserFormatMaskValidator(Validator):
     """ Валидатор для проверки маски формата пользователя. """
 
+    WILDCARD_PATTERN = re.compile(r'^\*$|^\*\.[a-zA-Z0-9]+$')
+    DATE_FORMAT_PATTERN = re.compile(r'{(.*?)}')
+
     def validate(self, value: str) -> bool:
         try:
             if "*" in value:
-                pattern = re.compile(r'^\*$|^\*\.[a-zA-Z0-9]+$')
                 # Проверка, соответствует ли значение шаблону
-                if pattern.match(value):
+                if self.WILDCARD_PATTERN.match(value):
                     return True
 
             if "{" in value and "}" in value and len(value) > 2:
-                match = re.search(r'{(.*?)}', value)
+                match = self.DATE_FORMAT_PATTERN.search(value)
                 if match:
                     # Проверка, существует ли шаблон в словаре USER_DATE_FORMAT_TO_RE_COMPILE
                     return bool(USER_DATE_FORMAT_TO_RE_COMPILE.get(match.group(1), False))
@@ -59,12 +69,12 @@ class UserFormatMaskValidator(Validator):
 
 
 class IntervalValidator(Validator):
-    """ Валидатор для проверки интервала. """
+    """ Валидатор для проверки интервала (срок хранения или квота объёма). """
 
     def validate(self, value: str) -> bool:
         try:
             offset, period = value.split()
-            return offset.isdigit() and period[0].lower() in "гмд"
+            return offset.isdigit() and (period.lower() in QUOTA_UNITS or period[0].lower() in "гмд")
         except Exception as e:
             logger.error("Ошибка при проверки валидации интервала %s", e)
             return False
@@ -99,16 +109,69 @@ class CheckNonEmptyString(Validator):
         return bool(value)
 
 
+# План проверки: номер колонки -> валидатор. Валидаторы создаются один раз для всех строк
+VALIDATION_PLAN: Tuple[Tuple[int, Validator], ...] = (
+    (1, CheckNonEmptyString()),
+    (2, CheckNonEmptyString()),
+    (3, CheckNonEmptyString()),
+    (4, FolderPathValidator()),
+    (5, UserFormatMaskValidator()),
+    (6, IntervalValidator()),
+    (7, DateModificationValidator()),
+    (8, ActiveValidator()),
+)
+
+
+def validate_row(row: Tuple) -> List[int]:
+    """Проверяет одну строку таблицы и возвращает номера колонок с ошибками"""
+    problem_columns = []
+    if row[4] == "*" and row[6].lower() == "дата из имени":
+        problem_columns.extend([5, 7])
+    for column_number, validator in VALIDATION_PLAN:
+        if not validator.validate(row[column_number - 1]):
+            problem_columns.append(column_number)
+    return problem_columns
+
+
+def row_key(row: Tuple) -> str:
+    """Значения проверяемых колонок строки одной строкой"""
+    return "\x1f".join(map(str, row[:len(VALIDATION_PLAN)]))
+
+
+def _new_hash():
+    """Хэш с учётом версии правил проверки"""
+    return hashlib.blake2b(f"{VALIDATION_VERSION}|".encode("utf-8"), digest_size=16)
+
+
+def row_hash(row: Tuple) -> str:
+    """Хэш значений проверяемых колонок строки"""
+    row_hasher = _new_hash()
+    row_hasher.update(row_key(row).encode("utf-8"))
+    return row_hasher.hexdigest()
+
+
+def table_hash(rows: List[Tuple]) -> str:
+    """Хэш значений проверяемых колонок всех строк таблицы (с учётом порядка строк)"""
+    table_hasher = _new_hash()
+    table_hasher.update("\x1e".join(map(row_key, rows)).encode("utf-8"))
+    return table_hasher.hexdigest()
+
+
 class CheckInputTable:
     """ Класс для проверки валидации строк таблицы. """
 
-    def __init__(self, table_rows: List[Tuple[str, str, str, str, str, str, str, str]]):
+    def __init__(self, table_rows: List[Tuple[str, str, str, str, str, str, str, str]],
+                 cache_path: Optional[str] = None):
         """
         Инициализирует объект CheckInputTable.
 
         :param table_rows: Список строк таблицы, каждая строка - кортеж из 8 элементов.
+        :param cache_path: Файл с результатами проверки предыдущего запуска (хэш таблицы и хэши строк -> колонки
+                           с ошибками). Если таблица не изменилась, сохранённый результат используется целиком,
+                           иначе повторно проверяются только изменившиеся строки.
         """
         self.table_rows = table_rows
+        self.cache_path = cache_path
 
     def check_validation(self) -> Dict[int, List[int]]:
         """
@@ -116,24 +179,55 @@ class CheckInputTable:
 
         :return: Словарь, где ключи - номера строк (начиная с 2), а значения - списки номеров колонок с ошибками.
         """
+        if self.cache_path:
+            return self._check_with_cache()
         problematic_rows = {}
+        for row_number, row in enumerate(self.table_rows, start=2):
+            problem_columns = validate_row(row)
+            if problem_columns:
+                problematic_rows[row_number] = problem_columns
+        logger.debug("Проверка таблицы. Проблемные ячейки: %s", summarize(problematic_rows))
+        return problematic_rows
 
+    def _check_with_cache(self) -> Dict[int, List[int]]:
+        cache = self._load_cache()
+        current_table_hash = table_hash(self.table_rows)
+        if cache.get("table") == current_table_hash:
+            problematic_rows = {int(row_number): columns for row_number, columns in cache["problems"].items()}
+            logger.debug("Таблица не изменилась с прошлого запуска. Проблемные ячейки: %s",
+                         summarize(problematic_rows))
+            return problematic_rows
+
+        cached_rows: Dict[str, List[int]] = cache.get("rows", {})
+        checked: Dict[str, List[int]] = {}
+        problematic_rows = {}
         for row_number, row in enumerate(self.table_rows, start=2):
-            if row[4] == "*" and row[6].lower() == "дата из имени":
-                problematic_rows.setdefault(row_number, []).extend([5, 7])
-            validators_and_values = {
-                1: (CheckNonEmptyString(), row[0]),
-                2: (CheckNonEmptyString(), row[1]),
-                3: (CheckNonEmptyString(), row[2]),
-                4: (FolderPathValidator(), row[3]),
-                5: (UserFormatMaskValidator(), row[4]),
-                6: (IntervalValidator(), row[5]),
-                7: (DateModificationValidator(), row[6]),
-                8: (ActiveValidator(), row[7])
-            }
-
-            for column_number, (validator, value) in validators_and_values.items():
-                if not validator.validate(value):
-                    problematic_rows.setdefault(row_number, []).append(column_number)
-        logger.debug("Проверка таблицы. Проблемные ячейки: %s", problematic_rows)
+            key = row_hash(row)
+            if key not in checked:
+                checked[key] = cached_rows[key] if key in cached_rows else validate_row(row)
+            if checked[key]:
+                problematic_rows[row_number] = list(checked[key])
+        logger.debug("Проверка таблицы: строк %s, проверено заново %s, проблемные ячейки: %s", len(self.table_rows),
+                     len(set(checked) - set(cached_rows)), summarize(problematic_rows))
+        # Сохраняются только строки текущей таблицы
+        self._save_cache({"table": current_table_hash, "problems": problematic_rows, "rows": checked})
         return problematic_rows
+
+    def _load_cache(self) -> Dict:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as cache_file:
+                return json.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.error("Не удалось прочитать результаты проверки таблицы %s: %s", self.cache_path, e)
+            return {}
+
+    def _save_cache(self, cache: Dict) -> None:
+        temp_path = self.cache_path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as cache_file:
+                json.dump(cache, cache_file)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            logger.error("Не удалось сохранить результаты проверки таблицы %s: %s", self.cache_path, e)
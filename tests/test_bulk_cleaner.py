@@ -0,0 +1,30 @@
+import os
+import pytest
+from src.folders.BulkFolderCleaner import BulkFolderCleaner
+from src.folders.FolderOperations import FolderCleaner
+
+
+def build_tree(root):
+    os.makedirs(root / "a" / "b" / "c")
+    os.makedirs(root / "d")
+    for file_name in ["1.txt", os.path.join("a", "2.txt"), os.path.join("a", "b", "3.txt"),
+                      os.path.join("a", "b", "c", "4.txt"), os.path.join("d", "5.txt")]:
+        (root / file_name).write_text("")
+    return [str(root / path) for path in ["1.txt", "a", os.path.join("a", "b"), os.path.join("a", "b", "3.txt"),
+                                          os.path.join("d", "5.txt"), "d", "missing.txt"]]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 100])
+def test_bulk_cleaner_matches_folder_cleaner(tmp_path, chunk_size):
+    expected = FolderCleaner().clean(build_tree(tmp_path / "expected"))
+    result = BulkFolderCleaner(max_workers=4, chunk_size=chunk_size).clean(build_tree(tmp_path / "result"))
+
+    def relative(report, root):
+        return [(os.path.relpath(path, root), value) for path, value in report.items()]
+
+    assert relative(result, tmp_path / "result") == relative(expected, tmp_path / "expected")
+    assert not os.listdir(tmp_path / "result")
+
+
+def test_bulk_cleaner_empty_list():
+    assert BulkFolderCleaner().clean([]) == FolderCleaner().clean([])
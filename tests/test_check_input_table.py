@@ -0,0 +1,30 @@
+from src.validators import check_Input_table
+from src.validators.check_Input_table import CheckInputTable
+
+VALID_ROW = ("1", "Процесс", "Аналитик", "C:\\Temp\\Отчеты", "Отчет_{ДДММГГГГ}.xlsx", "10 д", "Дата из имени",
+             "Активен")
+INVALID_ROW = ("2", "", "Аналитик", "C:\\Temp", "*", "10", "Дата из имени", "Активен")
+
+
+def test_check_validation():
+    assert CheckInputTable([VALID_ROW, INVALID_ROW]).check_validation() == {3: [5, 7, 2, 6]}
+
+
+def test_unchanged_rows_are_not_validated_again(tmp_path, monkeypatch):
+    cache_path = str(tmp_path / "validation_cache.json")
+    rows = [VALID_ROW, INVALID_ROW, VALID_ROW]
+    assert CheckInputTable(rows, cache_path=cache_path).check_validation() == {3: [5, 7, 2, 6]}
+
+    validated = []
+    validate_row = check_Input_table.validate_row
+    monkeypatch.setattr(check_Input_table, "validate_row", lambda row: validated.append(row) or validate_row(row))
+    changed_row = VALID_ROW[:5] + ("1 х",) + VALID_ROW[6:]
+    assert CheckInputTable(rows + [changed_row], cache_path=cache_path).check_validation() == {3: [5, 7, 2, 6],
+                                                                                              5: [6]}
+    assert validated == [changed_row]
+
+    # Таблица не изменилась: результат берётся из сохранённых целиком
+    validated.clear()
+    assert CheckInputTable(rows + [changed_row], cache_path=cache_path).check_validation() == {3: [5, 7, 2, 6],
+                                                                                              5: [6]}
+    assert validated == []
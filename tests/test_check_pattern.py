@@ -120,3 +120,26 @@ def test_check_pattern(user_date_format, pattern, file_name, expected):
     pattern_replacer = PatternReplacer(user_date_format, re_date_format, pattern)
     validator = FileNameValidator(pattern_replacer)
     assert validator.check_pattern(file_name) == expected
+
+
+@pytest.mark.parametrize("pattern, result", [
+    ("Отчет_МП_*_{ДДММГГГГ}.xlsx", ("Отчет_МП_", ".xlsx", 14)),
+    ("{ДДММГГГГ}", ("", "", 0)),
+    ("Отчет.xlsx", ("Отчет.xlsx", "Отчет.xlsx", 10)),
+])
+def test_literal_affixes(pattern, result):
+    pattern_replacer = PatternReplacer("ДДММГГГГ", USER_DATE_FORMAT_TO_RE_COMPILE["ДДММГГГГ"], pattern)
+    assert (pattern_replacer.literal_prefix, pattern_replacer.literal_suffix, pattern_replacer.min_length) == result
+
+
+def test_name_matcher_combines_masks():
+    masks = [("ДДММГГГГ", "Отчет_МП_*_{ДДММГГГГ}.xlsx"), ("ГГГГ-ММ-ДД", "Report_*_{ГГГГ-ММ-ДД}.csv"),
+             (None, "*.log")]
+    matcher = NameMatcher([PatternReplacer(user_date_format, USER_DATE_FORMAT_TO_RE_COMPILE.get(user_date_format),
+                                           pattern) for user_date_format, pattern in masks])
+    assert matcher.match("Отчет_МП_Москва_01012024.xlsx")
+    assert matcher.match("Report_123_2024-01-01.csv")
+    assert matcher.match("service.log")
+    assert not matcher.match("Отчет_МП_Москва_01012024.csv")  # Начало одной маски, конец другой
+    assert not matcher.match("Черновик.docx")
+    assert not NameMatcher([]).match("service.log")
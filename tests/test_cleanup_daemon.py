@@ -0,0 +1,55 @@
+import os
+import datetime
+from openpyxl import Workbook
+from src.rules.CleanupDaemon import CleanupDaemon
+from src.validators import check_Input_table
+from src.utils.json_reader import ConfigParams
+
+
+def write_table(table_path, rows):
+    wb = Workbook()
+    wb.active.append(["Номер задачи в JIRA", "Название процесса", "Аналитик", "Путь", "Маска", "Интервал",
+                      "Источник даты", "Статус", "Комментарий", "Дата добавления"])
+    for row in rows:
+        wb.active.append(list(row) + ["", ""])
+    wb.save(table_path)
+
+
+class TmpFolderPathValidator(check_Input_table.FolderPathValidator):
+    """Папки теста находятся во временной папке: допускается любой абсолютный путь"""
+
+    def validate(self, value: str) -> bool:
+        return os.path.isabs(value) or super().validate(value)
+
+
+def test_rules_run_on_their_own_schedule(tmp_path, monkeypatch):
+    monkeypatch.setattr(check_Input_table, "VALIDATION_PLAN", tuple(
+        (column_number, TmpFolderPathValidator() if column_number == 4 else validator)
+        for column_number, validator in check_Input_table.VALIDATION_PLAN))
+    for folder in ["days", "years"]:
+        (tmp_path / folder).mkdir()
+    table_path = str(tmp_path / "settings.xlsx")
+    day_row = ("1", "Процесс", "Аналитик", str(tmp_path / "days"), "Отчет_{ДДММГГГГ}.txt", "10 д", "Дата из имени",
+               "Активен")
+    year_row = ("2", "Процесс", "Аналитик", str(tmp_path / "years"), "Отчет_{ДДММГГГГ}.txt", "1 г", "Дата из имени",
+                "Активен")
+    write_table(table_path, [day_row, year_row])
+    config_params = ConfigParams(table_path, str(tmp_path), "", "", [], "")
+    reports = []
+    daemon = CleanupDaemon(config_params, lambda reporter_list, _time, _metrics: reports.append(reporter_list))
+
+    current_time = datetime.datetime(2024, 5, 25, 1, 0)
+    assert [rule.task_number for _index, rule in daemon.run_once(current_time)] == ["1", "2"]
+    assert [row[0] for row in reports[0]] == ["1", "2"]
+
+    # Через 2 часа выполняется только строка со сроком в днях, таблица не перечитывается
+    assert daemon.reload_table() is False
+    assert [rule.task_number for _index, rule in daemon.run_once(current_time + datetime.timedelta(hours=2))] == ["1"]
+    assert daemon.run_once(current_time + datetime.timedelta(hours=2, minutes=30)) == []
+
+    # Изменённая таблица перечитывается: новая строка выполняется сразу, у остальных расписание сохраняется
+    new_row = ("3",) + year_row[1:]
+    write_table(table_path, [day_row, year_row, new_row])
+    os.utime(table_path, ns=(0, 10 ** 9))
+    assert [rule.task_number for _index, rule in daemon.run_once(current_time + datetime.timedelta(hours=3))] == \
+        ["1", "3"]
@@ -105,3 +105,32 @@ def test_current_year_with_offset(folder_contents, offset, current_date, date_so
         if current_date >= delete_after_date:
             result.append(elem_path)
     assert verdict == result
+
+
+EDGE_DATES = [datetime(2024, 2, 29, 12), datetime(2024, 3, 30, 9), datetime(2024, 3, 31, 11), datetime(2024, 3, 31, 9),
+              datetime(2023, 2, 28, 23), datetime(2023, 3, 1), datetime(2024, 4, 30, 10), datetime(2024, 5, 31), None]
+
+
+def legacy_is_expired(storage_period_cls, folder_date, current_date, offset):
+    try:
+        if storage_period_cls is CurrentMonthWithOffset:
+            time_delta = relativedelta(current_date, folder_date)
+            return time_delta.years * 12 + time_delta.months >= offset
+        if storage_period_cls is CurrentDayWithOffset:
+            return (current_date - folder_date).days >= offset
+        return current_date >= folder_date.replace(year=folder_date.year + offset)
+    except Exception:
+        return False
+
+
+@pytest.mark.parametrize("storage_period_cls", [CurrentMonthWithOffset, CurrentDayWithOffset, CurrentYearWithOffset])
+@pytest.mark.parametrize("offset", [0, 1, 13])
+@pytest.mark.parametrize("current_date", [datetime(2024, 4, 30, 10), datetime(2024, 3, 31), datetime(2025, 2, 28, 23),
+                                          datetime(2024, 2, 29, 12), datetime(2025, 5, 31, 10)])
+def test_cutoff_matches_per_item_check(storage_period_cls, offset, current_date):
+    handler = storage_period_cls(DateFromName, offset, "%Y-%m-%d", None)
+    expected = [folder_date is not None and legacy_is_expired(storage_period_cls, folder_date, current_date, offset)
+                for folder_date in EDGE_DATES]
+    assert [folder_date is not None and handler.is_date_expired(folder_date, current_date)
+            for folder_date in EDGE_DATES] == expected
+    assert [bool(expired) for expired in handler.expired_mask(EDGE_DATES, current_date)] == expected
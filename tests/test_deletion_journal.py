@@ -0,0 +1,71 @@
+import os
+import datetime
+import pytest
+from src.folders.DeletionJournal import DeletionJournal, journal_report_rows
+from src.folders.FolderOperations import FolderCleaner
+from src.rules.RuleExecutor import RuleExecutor
+from src.utils.json_reader import ConfigParams
+
+
+def test_interrupted_run_resumes_from_journal(tmp_path, monkeypatch):
+    root = tmp_path / "data"
+    root.mkdir()
+    for day in ["01052024", "02052024", "03052024", "24052024"]:
+        (root / f"Отчет_{day}.txt").write_text("")
+    rows = [("1", "Процесс", "Аналитик", str(root), "Отчет_{ДДММГГГГ}.txt", "10 д", "Дата из имени", "Активен")]
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "", deletion_journal=True)
+    journal_path = str(tmp_path / "deletion_journal.jsonl")
+    current_time = datetime.datetime(2024, 5, 25, 2, 0)
+
+    # Запуск прерывается после удаления первого элемента
+    delete = FolderCleaner.delete
+    deleted = []
+
+    def interrupted_delete(path):
+        if deleted:
+            raise KeyboardInterrupt
+        deleted.append(path)
+        return delete(path)
+
+    monkeypatch.setattr(FolderCleaner, "delete", staticmethod(interrupted_delete))
+    journal = DeletionJournal(journal_path, run_id="2024-05-25")
+    with pytest.raises(KeyboardInterrupt):
+        RuleExecutor(config_params, journal=journal).run(rows, current_time)
+    journal.close()
+    assert [list(row[4]) for row in journal_report_rows(journal_path)] == [deleted]
+
+    # Повторный запуск удаляет оставшиеся элементы без обхода папки, отчёт включает результаты до прерывания
+    monkeypatch.setattr(FolderCleaner, "delete", staticmethod(delete))
+    monkeypatch.setattr(os, "scandir", None)
+    journal = DeletionJournal(journal_path, run_id="2024-05-25")
+    reporter_list = RuleExecutor(config_params, journal=journal).run(rows, current_time)
+    assert sorted(reporter_list[0][4]) == [str(root / f"Отчет_{day}.txt") for day in ["01052024", "02052024",
+                                                                                       "03052024"]]
+    assert sorted(os.listdir(root)) == ["Отчет_24052024.txt"]
+    journal.finish()
+    journal = DeletionJournal(journal_path, run_id="2024-05-25")
+    assert journal.resumed == {}
+    journal.close()
+
+
+def test_stale_journal_from_earlier_date_is_discarded(tmp_path):
+    root = tmp_path / "data"
+    root.mkdir()
+    for day in ["01052024", "24052024"]:
+        (root / f"Отчет_{day}.txt").write_text("")
+    rows = [("1", "Процесс", "Аналитик", str(root), "Отчет_{ДДММГГГГ}.txt", "10 д", "Дата из имени", "Активен")]
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "", deletion_journal=True)
+    journal_path = str(tmp_path / "deletion_journal.jsonl")
+
+    # Запуск 25.05 завершил строку, но был прерван до отправки отчёта (run_end не записан)
+    journal = DeletionJournal(journal_path, run_id="2024-05-25")
+    RuleExecutor(config_params, journal=journal).run(rows, datetime.datetime(2024, 5, 25, 2, 0))
+    journal.close()
+
+    # Следующей ночью журнал не продолжается: строка выполняется заново и удаляет файл, срок которого истёк
+    journal = DeletionJournal(journal_path, run_id="2024-06-05")
+    assert journal.resumed == {}
+    reporter_list = RuleExecutor(config_params, journal=journal).run(rows, datetime.datetime(2024, 6, 5, 2, 0))
+    journal.close()
+    assert list(reporter_list[0][4]) == [str(root / "Отчет_24052024.txt")]
+    assert os.listdir(root) == []
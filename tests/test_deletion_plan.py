@@ -0,0 +1,86 @@
+import os
+import datetime
+from src.folders.DeletionPlan import DeletionPlanWriter, read_plan
+from src.rules import RuleExecutor as rule_executor_module
+from src.rules.RuleExecutor import RuleExecutor
+from src.utils.json_reader import ConfigParams
+
+
+def build_rows(root):
+    for folder in ["a", "b"]:
+        os.makedirs(root / folder)
+        for day in [1, 20]:
+            (root / folder / f"Отчет_{day:02d}052024.txt").write_text("12345")
+    return [("1", "Процесс", "Аналитик", str(root / "b"), "Отчет_{ДДММГГГГ}.txt", "10 д", "Дата из имени", "Активен"),
+            ("2", "Процесс", "Аналитик", str(root / "a"), "Отчет_{ДДММГГГГ}.txt", "10 д", "Дата из имени", "Активен")]
+
+
+def test_plan_then_apply(tmp_path):
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "")
+    current_time = datetime.datetime(2024, 5, 25)
+    rows = build_rows(tmp_path / "data")
+    plan_path = str(tmp_path / "plan.jsonl.gz")
+
+    plan_writer = DeletionPlanWriter(plan_path)
+    assert RuleExecutor(config_params, plan_writer=plan_writer).run(rows, current_time) == []
+    plan_writer.close()
+
+    # Формирование плана ничего не удаляет
+    assert len(os.listdir(tmp_path / "data" / "a")) == 2
+    planned = read_plan(plan_path)
+    assert [rule_info["task_number"] for rule_info, _paths in planned] == ["1", "2"]
+    assert [[item.path for item in items] for _rule_info, items in planned] == [
+        [str(tmp_path / "data" / "b" / "Отчет_01052024.txt")], [str(tmp_path / "data" / "a" / "Отчет_01052024.txt")]]
+
+    report = RuleExecutor(config_params).apply_plan(plan_path, current_time)
+    assert [row[0] for row in report] == ["1", "2"]
+    assert [list(row[4].values())[0].comment for row in report] == ["Файл удалён", "Файл удалён"]
+    assert os.listdir(tmp_path / "data" / "a") == ["Отчет_20052024.txt"]
+
+
+def test_apply_skips_changed_items_and_reports_failed_folder_checks(tmp_path):
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "")
+    current_time = datetime.datetime(2024, 5, 25)
+    rows = build_rows(tmp_path / "data")
+    os.makedirs(tmp_path / "data" / "a" / "Архив_01052024")
+    (tmp_path / "data" / "a" / "Архив_01052024" / "файл.txt").write_text("1234567")
+    rows.append(("3", "Процесс", "Аналитик", str(tmp_path / "data" / "a"), "Архив_{ДДММГГГГ}", "10 д",
+                 "Дата из имени", "Активен"))
+    rows.append(("4", "Процесс", "Аналитик", str(tmp_path / "missing"), "Отчет_{ДДММГГГГ}.txt", "10 д",
+                 "Дата из имени", "Активен"))
+    plan_path = str(tmp_path / "plan.jsonl.gz")
+    plan_writer = DeletionPlanWriter(plan_path)
+    RuleExecutor(config_params, plan_writer=plan_writer).run(rows, current_time)
+    plan_writer.close()
+
+    # Размер папки в плане - суммарный размер её файлов
+    planned = read_plan(plan_path)
+    assert [item.size for item in planned[2][1]] == [7]
+
+    # Файл создан заново по тому же пути после формирования плана
+    recreated = tmp_path / "data" / "b" / "Отчет_01052024.txt"
+    recreated.write_text("новое содержимое")
+    report = RuleExecutor(config_params).apply_plan(plan_path, current_time)
+    assert [row[0] for row in report] == ["1", "2", "3", "4"]
+    assert report[0][4][str(recreated)].comment == "Пропущено: изменён после формирования плана"
+    assert recreated.exists()
+    assert list(report[1][4].values())[0].comment == "Файл удалён"
+    assert list(report[3][4]) == ["Нет файлов на удаление"]
+    assert report[3][4]["Нет файлов на удаление"].status == "Не выполнено"
+
+
+def test_apply_reports_script_error_as_failed_row(tmp_path, monkeypatch):
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "")
+    current_time = datetime.datetime(2024, 5, 25)
+    plan_path = str(tmp_path / "plan.jsonl.gz")
+    plan_writer = DeletionPlanWriter(plan_path)
+    RuleExecutor(config_params, plan_writer=plan_writer).run(build_rows(tmp_path / "data"), current_time)
+    plan_writer.close()
+
+    def failing_cleaner(config_params, throttle):
+        raise RuntimeError("сбой")
+
+    monkeypatch.setattr(rule_executor_module, "make_cleaner", failing_cleaner)
+    report = RuleExecutor(config_params).apply_plan(plan_path, current_time)
+    assert [row[0] for row in report] == ["1", "2"]
+    assert [row[4]["Нет файлов на удаление"].comment for row in report] == ["Ошибка скрипта: сбой"] * 2
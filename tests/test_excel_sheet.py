@@ -0,0 +1,32 @@
+import os
+from openpyxl import Workbook, load_workbook
+from src.excel.ExcelSheet import ExcelSheet
+
+
+def create_table(filename):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Номер", "Процесс", "Аналитик", "Путь", "Маска", "Интервал", "Дата", "Статус", "", ""])
+    ws.append(["1", "Процесс", "Аналитик", "C:\\Папка", "*", "1 д", "Дата создания", "Активен", None, None])
+    ws.append(["2", "Процесс", "", "C:\\Папка", "*", "1 д", "Дата создания", "Активен", None, None])
+    wb.save(filename)
+
+
+def test_excel_sheet_rewrites_only_changed_highlight(tmp_path):
+    filename = str(tmp_path / "table.xlsx")
+    create_table(filename)
+
+    sheet = ExcelSheet(filename=filename, min_row=2)
+    assert sheet.get_data()[1][:3] == ("2", "Процесс", None)
+    sheet.highlight_cells({3: [3]})
+    assert load_workbook(filename).active.cell(row=3, column=3).fill.start_color.rgb == "00FF0000"
+
+    # Те же проблемные ячейки: файл не перезаписывается
+    modified = os.stat(filename).st_mtime_ns
+    os.utime(filename, ns=(modified - 10 ** 9, modified - 10 ** 9))
+    ExcelSheet(filename=filename, min_row=2).highlight_cells({3: [3]})
+    assert os.stat(filename).st_mtime_ns == modified - 10 ** 9
+
+    ExcelSheet(filename=filename, min_row=2).highlight_cells({})
+    assert os.stat(filename).st_mtime_ns != modified - 10 ** 9
+    assert not ExcelSheet.is_red(load_workbook(filename).active.cell(row=3, column=3))
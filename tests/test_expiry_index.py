@@ -0,0 +1,32 @@
+import os
+import datetime
+from src.folders.ExpiryIndex import ExpiryIndex
+from src.rules.Rule import rule_from_row
+from src.rules.RuleExecutor import execute_rule, expiry_rule_key
+from src.utils.json_reader import ConfigParams
+
+
+def test_runs_between_full_scans_check_only_due_items(tmp_path, monkeypatch):
+    root = tmp_path / "data"
+    root.mkdir()
+    for day in ["01052024", "20052024", "24052024"]:
+        (root / f"Отчет_{day}.txt").write_text("")
+    rule = rule_from_row(("1", "Процесс", "Аналитик", str(root), "Отчет_{ДДММГГГГ}.txt", "10 д", "Дата из имени",
+                          "Активен"))
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "", expiry_index=True, expiry_full_scan_hours=168.0)
+    index = ExpiryIndex(str(tmp_path / "expiry_index.sqlite"))
+    rule_key = expiry_rule_key(rule)
+    current_time = datetime.datetime(2024, 5, 25, 2, 0)
+
+    # Полный обход: просроченный файл удаляется, остальные попадают в индекс с оценкой времени истечения
+    report = execute_rule(rule, current_time, config_params, expiry_index=index)[4]
+    assert list(report) == [str(root / "Отчет_01052024.txt")]
+    assert index.due_items(rule_key, datetime.datetime(2024, 5, 30)) == [(str(root / "Отчет_20052024.txt"), False)]
+
+    # Следующий запуск не обходит папку: проверяется только элемент, срок которого подошёл
+    (root / "Отчет_02052024.txt").write_text("")  # Новый файл будет найден при следующем полном обходе
+    monkeypatch.setattr(os, "scandir", None)
+    report = execute_rule(rule, datetime.datetime(2024, 5, 30, 2, 0), config_params, expiry_index=index)[4]
+    assert list(report) == [str(root / "Отчет_20052024.txt")]
+    assert index.due_items(rule_key, datetime.datetime(2024, 6, 30)) == [(str(root / "Отчет_24052024.txt"), False)]
+    index.close()
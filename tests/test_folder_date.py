@@ -1,6 +1,6 @@
 import pytest
 from datetime import datetime
-from src.user_format_handlers.DateParser import DateParser
+from src.user_format_handlers.DateParser import DateParser, FAST_PARSERS, parse_date_string
 
 
 @pytest.mark.parametrize(
@@ -47,3 +47,16 @@ from src.user_format_handlers.DateParser import DateParser
 )
 def test_get_folder_date(date_format, date_regex_pattern, elem, result):
     assert DateParser().get_folder_date(date_format, date_regex_pattern, elem) == result
+
+
+@pytest.mark.parametrize("date_format, date_str", [
+    ("%d%m%Y", "31022024"), ("%d.%m.%Y", "29.02.2023"), ("%m.%y", "01.69"), ("%m.%y", "12.68"),
+    ("%Y-%m-%d %H-%M", "2024-04-17 23-59"), ("%Y", "+202"), ("%d%m%Y", "1704 024"),
+])
+def test_parse_date_string_matches_strptime(date_format, date_str):
+    assert date_format in FAST_PARSERS
+    try:
+        expected = datetime.strptime(date_str, date_format)
+    except ValueError:
+        expected = None
+    assert parse_date_string(date_format, date_str) == expected
@@ -0,0 +1,90 @@
+import os
+import time
+import errno
+import threading
+import datetime
+from src.folders import FolderProbe as folder_probe_module
+from src.folders.FolderProbe import FolderProbe
+
+
+def test_probe_timeout_and_backoff(tmp_path, monkeypatch):
+    available = tmp_path / "available"
+    available.mkdir()
+    dead = str(tmp_path / "dead")
+    missing = str(tmp_path / "missing")
+    real_checking_folder = folder_probe_module.checking_folder
+    calls = []
+
+    def slow_checking_folder(folder_path):
+        calls.append(folder_path)
+        if folder_path == dead:
+            time.sleep(1)  # Сервер не отвечает
+        return real_checking_folder(folder_path)
+
+    monkeypatch.setattr(folder_probe_module, "checking_folder", slow_checking_folder)
+    cache_path = str(tmp_path / "cache.json")
+    current_time = datetime.datetime(2024, 5, 25, 2, 0)
+
+    results = FolderProbe(cache_path, timeout=0.2).probe_all([str(available), dead, missing, dead], current_time)
+    assert results[str(available)] is None
+    assert "нет ответа" in results[dead]["Нет файлов на удаление"].comment
+    assert results[missing]["Нет файлов на удаление"].comment == "Не удалось подключиться к папке"
+
+    # Следующей ночью (через 24 ч > 20 ч) папки проверяются снова, после второй неудачи интервал - 40 ч
+    calls.clear()
+    next_night = current_time + datetime.timedelta(days=1)
+    FolderProbe(cache_path, timeout=0.2).probe_all([dead, missing], next_night)
+    assert sorted(calls) == sorted([dead, missing])
+
+    # Отсутствующая папка на отвечающем сервере в кэш не попадает и проверяется при каждом запуске
+    calls.clear()
+    probe = FolderProbe(cache_path, timeout=0.2)
+    results = probe.probe_all([dead, missing], next_night + datetime.timedelta(days=1))
+    assert calls == [missing]
+    assert "недоступна в предыдущих запусках" in results[dead]["Нет файлов на удаление"].comment
+    assert probe.cache[FolderProbe.key(dead)]["failures"] == 2
+    assert FolderProbe.key(missing) not in probe.cache
+
+    # Папка создана: проверка успешна
+    (tmp_path / "missing").mkdir()
+    probe = FolderProbe(cache_path, timeout=0.2)
+    assert probe.probe_all([missing], next_night + datetime.timedelta(days=2)) == {missing: None}
+
+
+def test_connection_error_is_cached(tmp_path, monkeypatch):
+    offline = str(tmp_path / "offline")
+    real_stat = os.stat
+
+    def stat(path, *args, **kwargs):
+        if path == offline:
+            raise OSError(errno.EHOSTUNREACH, "No route to host", path)
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "stat", stat)
+    probe = FolderProbe(str(tmp_path / "cache.json"), timeout=1.0)
+    results = probe.probe_all([offline], datetime.datetime(2024, 5, 25, 2, 0))
+    assert results[offline]["Нет файлов на удаление"].comment == "Не удалось подключиться к папке"
+    assert probe.cache[FolderProbe.key(offline)]["failures"] == 1
+
+
+def test_probe_threads_are_bounded(tmp_path, monkeypatch):
+    hung = threading.Event()
+    calls = []
+
+    def hanging_checking_folder(folder_path):
+        calls.append(folder_path)
+        hung.wait(2)  # Сервер не отвечает
+
+    monkeypatch.setattr(folder_probe_module, "checking_folder", hanging_checking_folder)
+    folders = [str(tmp_path / f"dead{number}") for number in range(50)]
+    threads_before = threading.active_count()
+    probe = FolderProbe(str(tmp_path / "cache.json"), timeout=0.2, max_workers=3)
+    results = probe.probe_all(folders, datetime.datetime(2024, 5, 25, 2, 0))
+    try:
+        assert threading.active_count() - threads_before <= 3
+        assert len(calls) == 3
+        # Папки, до которых очередь не дошла, не считаются недоступными и не попадают в кэш
+        assert sorted(results) == sorted(calls)
+        assert len(probe.cache) == 3
+    finally:
+        hung.set()
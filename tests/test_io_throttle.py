@@ -0,0 +1,27 @@
+import time
+from src.folders import IoThrottle as io_throttle_module
+from src.folders.IoThrottle import IoThrottle
+
+
+def test_token_bucket_limits_rate():
+    throttle = IoThrottle(max_rate=100)
+    started = time.monotonic()
+    for _ in range(30):
+        throttle.acquire()
+    # Запас корзины - 10 операций (0.1 с), остальные 20 выполняются с частотой 100 в секунду
+    assert time.monotonic() - started >= 0.19
+
+
+def test_rate_backs_off_on_high_latency_and_recovers(monkeypatch):
+    monkeypatch.setattr(io_throttle_module, "ADJUST_INTERVAL", 0)
+    throttle = IoThrottle(max_rate=100, min_rate=10, target_latency=0.05)
+    rates = []
+    for _ in range(4):
+        throttle.record(1.0)
+        rates.append(throttle.rate)
+    assert rates == [50, 25, 12.5, 10]
+
+    # Сервер освободился: частота растёт до максимальной по мере снижения сглаженной задержки
+    for _ in range(30):
+        throttle.record(0.001)
+    assert throttle.rate == 100
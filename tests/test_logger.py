@@ -0,0 +1,31 @@
+import logging
+from src.logger.logger_settings import setup_logger, stop_logger, summarize
+from src.utils.json_reader import ConfigParams
+
+
+def test_summarize():
+    assert str(summarize(["a", "b", "c"], limit=2)) == "3 эл: [a, b, ... (ещё 1)]"
+    assert str(summarize({"a": 1}, limit=2)) == "1 эл: [a: 1]"
+    assert str(summarize([], limit=2)) == "0 эл: []"
+
+
+def test_async_logger_with_module_levels(tmp_path):
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "", log_level="INFO",
+                                 log_levels={"tests.debug_module": "DEBUG"})
+    root = setup_logger(config_params)
+    try:
+        logging.getLogger("tests.debug_module").debug("Сообщение модуля")
+        logging.getLogger("tests.other_module").debug("Скрытое сообщение")
+        logging.getLogger("tests.other_module").info("Сообщение %s", summarize(list(range(100)), limit=3))
+        stop_logger()
+        log_text = next(tmp_path.glob("Logger_*.log")).read_text()
+    finally:
+        stop_logger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.setLevel(logging.WARNING)
+        logging.getLogger("tests.debug_module").setLevel(logging.NOTSET)
+
+    assert "Сообщение модуля" in log_text
+    assert "Скрытое сообщение" not in log_text
+    assert "tests.other_module : INFO : Сообщение 100 эл: [0, 1, 2, ... (ещё 97)]" in log_text
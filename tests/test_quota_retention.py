@@ -0,0 +1,41 @@
+import os
+import datetime
+import pytest
+from src.excel.ExelReporter import Reporter
+from src.rules.Rule import rule_from_row
+from src.rules.RuleExecutor import execute_rule
+from src.utils.json_reader import ConfigParams
+from src.validators.check_Input_table import IntervalValidator
+
+
+@pytest.mark.parametrize("streaming_pipeline", [False, True])
+def test_oldest_entries_removed_until_folder_fits_quota(tmp_path, streaming_pipeline):
+    days = ["03052024", "01052024", "24052024", "02052024"]
+    for day in days:
+        (tmp_path / f"Отчет_{day}.txt").write_bytes(b"0" * 600)
+    rule = rule_from_row(("1", "Процесс", "Аналитик", str(tmp_path), "Отчет_{ДДММГГГГ}.txt", "1 КБ", "Дата из имени",
+                          "Активен"))
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "", streaming_pipeline=streaming_pipeline)
+    report_row = execute_rule(rule, datetime.datetime(2024, 5, 25, 2, 0), config_params)
+
+    # 2400 байт при квоте 1024: удаляются три самых старых файла, возраст сам по себе значения не имеет
+    assert os.listdir(tmp_path) == ["Отчет_24052024.txt"]
+    assert sorted(report_row[4]) == [str(tmp_path / f"Отчет_{day}.txt") for day in ["01052024", "02052024",
+                                                                                    "03052024"]]
+    rows = list(Reporter.iter_rows([report_row]))
+    assert rows[0][-1] == 1800
+    assert [row[-1] for row in rows[1:]] == [600, 600, 600]
+
+
+def test_folder_within_quota_is_kept(tmp_path):
+    (tmp_path / "Отчет_01052020.txt").write_bytes(b"0" * 600)
+    rule = rule_from_row(("1", "Процесс", "Аналитик", str(tmp_path), "Отчет_{ДДММГГГГ}.txt", "1 КБ", "Дата из имени",
+                          "Активен"))
+    report_row = execute_rule(rule, datetime.datetime(2024, 5, 25, 2, 0), ConfigParams("", "", "", "", [], ""))
+    assert list(report_row[4]) == ["Нет файлов на удаление"]
+    assert os.listdir(tmp_path) == ["Отчет_01052020.txt"]
+
+
+@pytest.mark.parametrize("value, expected", [("10 ГБ", True), ("500 мб", True), ("1 кб", True), ("1 ПБ", False)])
+def test_interval_validator_accepts_quota(value, expected):
+    assert IntervalValidator().validate(value) is expected
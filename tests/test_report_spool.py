@@ -0,0 +1,25 @@
+from src.excel.ReportSpool import ReportSpool
+from src.folders.FolderOperations import FolderCleaner
+
+
+def test_spool_matches_clean_result(tmp_path):
+    paths = []
+    for index in range(5):
+        (tmp_path / f"file_{index}.txt").write_text("")
+        paths.append(str(tmp_path / f"file_{index}.txt"))
+    paths.append(str(tmp_path / "missing.txt"))
+
+    spool = ReportSpool(buffer_size=2).extend(FolderCleaner().iter_clean(paths))
+    assert len(spool) == 6
+    assert "Нет файлов на удаление" not in spool
+    assert list(spool.keys()) == paths
+    assert spool[paths[0]].comment == "Файл удалён"
+    assert spool[paths[-1]].status == "Не выполнено"
+    spool.close()
+
+
+def test_empty_spool_matches_empty_clean_result():
+    spool = ReportSpool()
+    assert dict(spool.items()) == FolderCleaner().clean([])
+    assert len(spool) == 1 and "Нет файлов на удаление" in spool
+    spool.close()
@@ -0,0 +1,72 @@
+import os
+import time
+import datetime
+import threading
+import pytest
+from src.rules import RuleExecutor as rule_executor_module
+from src.rules.RuleExecutor import RuleExecutor, share_key
+from src.utils.json_reader import ConfigParams
+
+
+@pytest.mark.parametrize("folder_path, expected", [
+    ("\\\\Server01\\share\\Отчеты", "server01"),
+    ("//Server01/share/Отчеты", "server01"),
+    ("data/Отчеты", "data"),
+    ("/mnt/share/Отчеты", "mnt"),
+])
+def test_share_key(folder_path, expected):
+    assert share_key(folder_path) == expected
+
+
+@pytest.mark.skipif(os.name != "nt", reason="буквы дисков выделяются только в Windows")
+def test_share_key_drive():
+    assert share_key("C:\\Отчеты\\2024") == share_key("c:\\Архив") == "c:"
+
+
+def test_rows_of_busy_share_do_not_block_other_shares():
+    executor = RuleExecutor(ConfigParams("", "", "", "", [], "", max_workers=2, max_rows_per_share=1))
+    lock = threading.Lock()
+    active = {"busy": 0, "idle": 0}
+    peak = {"busy": 0, "idle": 0}
+    finished = []
+
+    def task(key: str, position: int):
+        with lock:
+            active[key] += 1
+            peak[key] = max(peak[key], active[key])
+        time.sleep(0.05 if key == "busy" else 0.01)
+        with lock:
+            active[key] -= 1
+            finished.append(key)
+        return position
+
+    tasks = [("\\\\busy\\share\\%d" % position, lambda position=position: task("busy", position))
+             for position in range(3)]
+    tasks.append(("\\\\idle\\share", lambda: task("idle", 3)))
+
+    assert executor._run_per_share(tasks) == [0, 1, 2, 3]
+    assert peak == {"busy": 1, "idle": 1}
+    # Второй поток не ждёт освобождения занятого сервера, а сразу берёт строку свободного
+    assert finished[0] == "idle"
+
+
+@pytest.mark.parametrize("failing", ["execute_rule", "check_rule_folder"])
+def test_script_error_is_reported_as_failed_row(tmp_path, monkeypatch, failing):
+    for name in ["a", "b"]:
+        (tmp_path / name).mkdir()
+    rows = [(str(number), "Процесс", "Аналитик", str(tmp_path / name), "Отчет_{ДДММГГГГ}.txt", "10 д",
+             "Дата из имени", "Активен") for number, name in enumerate(["a", "b"], start=1)]
+    original = getattr(rule_executor_module, failing)
+
+    def fail_first_row(rule, *args, **kwargs):
+        if rule.task_number == "1":
+            raise RuntimeError("сбой")
+        return original(rule, *args, **kwargs)
+
+    monkeypatch.setattr(rule_executor_module, failing, fail_first_row)
+    reporter_list = RuleExecutor(ConfigParams("", str(tmp_path), "", "", [], "")).run(
+        rows, datetime.datetime(2024, 5, 25, 2, 0))
+
+    assert [row[0] for row in reporter_list] == ["1", "2"]
+    result = reporter_list[0][4]["Нет файлов на удаление"]
+    assert (result.status, result.comment) == ("Не выполнено", "Ошибка скрипта: сбой")
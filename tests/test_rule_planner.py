@@ -0,0 +1,85 @@
+import datetime
+import os
+import pytest
+from src.folders.FolderOperations import ScandirFolderContentLoader
+from src.rules.Rule import rule_from_row
+from src.rules.RulePlanner import RulePlanner, SharedTraversal
+from src.excel.ReportSpool import close_report_spools
+from src.rules.RuleExecutor import RuleExecutor
+from src.utils.json_reader import ConfigParams
+
+
+@pytest.fixture
+def folder_tree(tmp_path):
+    for sub_dir in ["2024-01-01", os.path.join("Архив", "2022-02-02"), os.path.join("Архив", "Старое")]:
+        os.makedirs(tmp_path / sub_dir)
+    for file_name in ["Отчет_01012024.xlsx", os.path.join("Архив", "Отчет_02022022.xlsx"),
+                      os.path.join("Архив", "Старое", "Отчет_03032023.xlsx"), "Отчет_03032023.csv"]:
+        (tmp_path / file_name).write_text("")
+    return tmp_path
+
+
+def make_rule(folder_path, mask):
+    return rule_from_row(("1", "Процесс", "Аналитик", str(folder_path), mask, "1 д", "Дата из имени", "Активен"))
+
+
+def test_plan_groups_same_and_nested_roots(tmp_path):
+    rules = [(0, make_rule(tmp_path / "a", "*.csv")), (1, make_rule(tmp_path / "b", "*")),
+             (2, make_rule(tmp_path / "a" / "x", "*")), (3, make_rule(tmp_path / "a", "*.txt")),
+             (4, make_rule(tmp_path / "ab", "*"))]
+    groups = RulePlanner.plan(rules)
+    assert [[index for index, _rule in group.rules] for group in groups] == [[0, 2, 3], [1], [4]]
+
+
+def test_shared_traversal_matches_separate_walks(folder_tree):
+    rules = [(0, make_rule(folder_tree, "Отчет_{ДДММГГГГ}.xlsx")), (1, make_rule(folder_tree, "{ГГГГ-ММ-ДД}")),
+             (2, make_rule(folder_tree / "Архив", "Отчет_{ДДММГГГГ}.xlsx")), (3, make_rule(folder_tree, "*.csv"))]
+    contents = SharedTraversal(rules).load_contents()
+    for index, rule in rules:
+        expected = ScandirFolderContentLoader(rule.folder_path, rule.regex_pattern, rule.user_date_format,
+                                              rule.re_compile_date_format, rule.is_file).load_contents()
+        assert [entry.path for entry in contents[index]] == [entry.path for entry in expected]
+
+
+@pytest.mark.parametrize("shared_traversal", [False, True])
+def test_nested_root_deleted_by_outer_rule(tmp_path, shared_traversal):
+    nested_root = tmp_path / "Архив_01012020"
+    nested_root.mkdir()
+    for day in ["01012020", "02012020"]:
+        (nested_root / f"Отчет_{day}.txt").write_text("")
+    rows = [("1", "Процесс", "Аналитик", str(tmp_path), "Архив_{ДДММГГГГ}", "1 д", "Дата из имени", "Активен"),
+            ("2", "Процесс", "Аналитик", str(nested_root), "Отчет_{ДДММГГГГ}.txt", "1 д", "Дата из имени", "Активен")]
+    # Строки одного диска выполняются по очереди, в порядке таблицы
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "", shared_traversal=shared_traversal,
+                                 max_rows_per_share=1)
+    reporter_list = RuleExecutor(config_params).run(rows, datetime.datetime(2024, 5, 25, 2, 0))
+
+    # Корень второй строки удалён первой строкой. При общем обходе в отчёте указана строка, удалившая папку
+    assert list(reporter_list[0][4]) == [str(nested_root)]
+    assert [(result.status, result.comment) for result in reporter_list[1][4].values()] == [
+        ("Не выполнено", "Уже удалено строкой 1" if shared_traversal else "Не удалось подключиться к папке")]
+
+
+def test_entries_deleted_by_earlier_row_are_reported(tmp_path):
+    nested = tmp_path / "Архив_01012020"
+    nested.mkdir()
+    (nested / "Отчет_01012020.txt").write_text("")
+    (tmp_path / "Отчет_02012020.txt").write_text("")
+    rows = [("1", "Процесс", "Аналитик", str(tmp_path), "Архив_{ДДММГГГГ}", "1 д", "Дата из имени", "Активен"),
+            ("2", "Процесс", "Аналитик", str(tmp_path), "Отчет_{ДДММГГГГ}.txt", "1 д", "Дата из имени", "Активен")]
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "", shared_traversal=True)
+    reporter_list = RuleExecutor(config_params).run(rows, datetime.datetime(2024, 5, 25, 2, 0))
+
+    assert {path: (result.status, result.comment) for path, result in reporter_list[1][4].items()} == {
+        str(tmp_path / "Отчет_02012020.txt"): ("Выполнено", "Файл удалён"),
+        str(nested / "Отчет_01012020.txt"): ("Не выполнено", "Уже удалено строкой 1")}
+
+
+def test_streaming_rows_walk_separately(folder_tree, monkeypatch):
+    monkeypatch.setattr(SharedTraversal, "load_contents", None)  # Общий обход собрал бы полные списки элементов
+    rows = [("1", "Процесс", "Аналитик", str(folder_tree), "Отчет_{ДДММГГГГ}.xlsx", "1 д", "Дата из имени", "Активен"),
+            ("2", "Процесс", "Аналитик", str(folder_tree), "*.csv", "1 д", "Дата создания", "Активен")]
+    config_params = ConfigParams("", str(folder_tree), "", "", [], "", shared_traversal=True, streaming_pipeline=True)
+    reporter_list = RuleExecutor(config_params).run(rows, datetime.datetime(2024, 5, 25, 2, 0))
+    assert len(list(reporter_list[0][4])) == 3
+    close_report_spools(reporter_list)
@@ -0,0 +1,93 @@
+import json
+import datetime
+import pytest
+from src.rules.RuleExecutor import RuleExecutor
+from src.utils import RunMetrics as run_metrics_module
+from src.utils.RunMetrics import RunMetrics, RuleMetrics
+from src.utils.json_reader import ConfigParams
+
+
+def build_rows(root):
+    (root / "a").mkdir(parents=True)
+    for day in [1, 2, 20]:
+        (root / "a" / f"Отчет_{day:02d}052024.txt").write_text("x" * day)
+    (root / "a" / "Прочее.txt").write_text("")
+    return [("1", "Процесс", "Аналитик", str(root / "a"), "Отчет_{ДДММГГГГ}.txt", "10 д", "Дата из имени", "Активен")]
+
+
+def test_nested_phases_are_exclusive():
+    metrics = RuleMetrics()
+    with metrics.phase("walk"):
+        with metrics.phase("parse_dates"):
+            pass
+    assert metrics.durations["walk"] > 0 and metrics.durations["parse_dates"] > 0
+    disabled = RuleMetrics(enabled=False)
+    items = [1, 2]
+    assert disabled.timed(items, "walk", "matched") is items
+    assert disabled.counters["matched"] == 0
+
+
+@pytest.mark.parametrize("streaming_pipeline", [False, True])
+def test_rule_metrics(tmp_path, streaming_pipeline):
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "", streaming_pipeline=streaming_pipeline)
+    run_metrics = RunMetrics(datetime.datetime(2024, 5, 25))
+    executor = RuleExecutor(config_params, run_metrics=run_metrics)
+    report = executor.run(build_rows(tmp_path), datetime.datetime(2024, 5, 25))
+    assert len(report) == 1
+    run_metrics.success = True
+
+    summary = run_metrics.summary()
+    rule = summary["rules"][0]
+    assert rule["task"] == "1"
+    assert rule["counters"] == {"visited": 4, "matched": 3, "expired": 2, "deleted": 2, "failed": 0,
+                                "date_errors": 0}
+    assert rule["bytes_reclaimed"] == 3
+    assert summary["totals"]["bytes_reclaimed"] == 3
+
+    run_metrics.write_summary(str(tmp_path / "summary.json"))
+    assert json.loads((tmp_path / "summary.json").read_text(encoding="utf-8"))["success"] is True
+    run_metrics.write_textfile(str(tmp_path / "metrics.prom"))
+    text = (tmp_path / "metrics.prom").read_text(encoding="utf-8")
+    folder = str(tmp_path / "a").replace("\\", "\\\\")
+    assert f'cleanup_rule_entries{{row="0",task="1",folder="{folder}",kind="deleted"}} 2' in text
+    assert "cleanup_run_success 1" in text
+
+
+@pytest.mark.parametrize("metrics_folder_bytes, expected", [(False, 0), (True, 7)])
+def test_folder_bytes_are_opt_in(tmp_path, monkeypatch, metrics_folder_bytes, expected):
+    folder = tmp_path / "a" / "Архив_01052024"
+    folder.mkdir(parents=True)
+    (folder / "отчет.txt").write_text("x" * 7)
+    rows = [("1", "Процесс", "Аналитик", str(tmp_path / "a"), "Архив_{ДДММГГГГ}", "10 д", "Дата из имени", "Активен")]
+    walked = []
+    monkeypatch.setattr(run_metrics_module, "tree_size", lambda path: walked.append(path) or 7)
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "", metrics_folder_bytes=metrics_folder_bytes)
+    run_metrics = RunMetrics(datetime.datetime(2024, 5, 25))
+    RuleExecutor(config_params, run_metrics=run_metrics).run(rows, datetime.datetime(2024, 5, 25))
+
+    rule = run_metrics.summary()["rules"][0]
+    assert rule["counters"]["deleted"] == 1
+    assert rule["bytes_reclaimed"] == expected
+    # Без metrics_folder_bytes содержимое удаляемой папки не обходится повторно
+    assert walked == ([str(folder)] if metrics_folder_bytes else [])
+
+
+def test_known_sizes_are_reused(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_metrics_module, "item_size", lambda item, walk_folders=True: pytest.fail("stat"))
+    metrics = RuleMetrics(folder_bytes=True)
+    path = str(tmp_path / "Архив")
+    assert list(metrics.sized([path], {path: 42})) == [path]
+    assert metrics._sizes == {path: 42}
+
+
+def test_rows_with_same_task_and_folder_have_distinct_series(tmp_path):
+    rows = build_rows(tmp_path)
+    rows.append(rows[0][:4] + ("Прочее.txt",) + rows[0][5:])
+    run_metrics = RunMetrics(datetime.datetime(2024, 5, 25))
+    RuleExecutor(ConfigParams("", str(tmp_path), "", "", [], ""), run_metrics=run_metrics).run(
+        rows, datetime.datetime(2024, 5, 25))
+
+    series = [line.rsplit(" ", 1)[0] for line in run_metrics.prometheus_text().splitlines()
+              if not line.startswith("#")]
+    assert len(series) == len(set(series))
+    assert sum(line.startswith("cleanup_rule_bytes_reclaimed") for line in series) == 2
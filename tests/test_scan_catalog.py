@@ -0,0 +1,102 @@
+import os
+import time
+import sqlite3
+import pytest
+from datetime import datetime
+from src.folders import ScanCatalog as scan_catalog_module
+from src.folders import sqlite_store
+from src.folders.ScanCatalog import ScanCatalog, CatalogFolderContentLoader
+from src.rules.Rule import rule_from_row
+from src.rules.RuleExecutor import RuleExecutor, uses_catalog
+from src.user_format_handlers.date_formats import USER_DATE_FORMAT_TO_RE_COMPILE
+from src.utils.DateSource import DateFromName
+from src.utils.StoragePeriodFunction import CurrentDayWithOffset
+from src.utils.json_reader import ConfigParams
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(scan_catalog_module, "MTIME_SAFETY_SECONDS", 0)
+    catalog = ScanCatalog(str(tmp_path / "catalog.sqlite"))
+    yield catalog
+    catalog.close()
+
+
+def make_loader(root, catalog):
+    re_compile_date_format = USER_DATE_FORMAT_TO_RE_COMPILE.get("ДДММГГГГ")
+    handler = CurrentDayWithOffset(date_source=DateFromName, offset=1, datetime_date_format="%d%m%Y",
+                                   re_compile_date_format=re_compile_date_format)
+    rule_key = ScanCatalog.rule_key(str(root), "Отчет_{ДДММГГГГ}.xlsx", "Дата из имени", True)
+    return CatalogFolderContentLoader(str(root), "Отчет_{ДДММГГГГ}.xlsx", "ДДММГГГГ", re_compile_date_format, True,
+                                      catalog=catalog, rule_key=rule_key, storage_period_handler=handler)
+
+
+def test_catalog_reuses_unchanged_folders(tmp_path, catalog, monkeypatch):
+    root = tmp_path / "data"
+    os.makedirs(root / "sub")
+    (root / "Отчет_01012024.xlsx").write_text("")
+    (root / "sub" / "Отчет_02012024.xlsx").write_text("")
+    past = time.time() - 60
+    for folder in [root, root / "sub"]:
+        os.utime(folder, (past, past))
+
+    first = make_loader(root, catalog).load_contents()
+    assert sorted((entry.name, entry.date) for entry in first) == [
+        ("Отчет_01012024.xlsx", datetime(2024, 1, 1)), ("Отчет_02012024.xlsx", datetime(2024, 1, 2))]
+
+    scanned = []
+    original_scan_dir = CatalogFolderContentLoader._scan_dir
+    monkeypatch.setattr(CatalogFolderContentLoader, "_scan_dir",
+                        lambda self, path, *args: scanned.append(path) or original_scan_dir(self, path, *args))
+
+    (root / "sub" / "Отчет_03012024.xlsx").write_text("")
+    os.utime(root / "sub", (past + 1, past + 1))
+    second = make_loader(root, catalog).load_contents()
+    assert scanned == [str(root / "sub")]
+    assert sorted(entry.name for entry in second) == ["Отчет_01012024.xlsx", "Отчет_02012024.xlsx",
+                                                      "Отчет_03012024.xlsx"]
+
+
+def test_catalog_drops_rules_missing_from_table(tmp_path, catalog):
+    root = tmp_path / "data"
+    os.makedirs(root)
+    (root / "Отчет_01012024.xlsx").write_text("")
+    loader = make_loader(root, catalog)
+    loader.load_contents()
+    assert catalog.load_rule(loader.rule_key)
+
+    catalog.retain_rules([ScanCatalog.rule_key(str(root), "Отчет_{ДДММГГГГ}.csv", "Дата из имени", True)])
+    assert catalog.load_rule(loader.rule_key) == {}
+
+
+def test_catalog_locked_by_other_process_does_not_fail_walk(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite_store, "BUSY_TIMEOUT_SECONDS", 0.1)
+    root = tmp_path / "data"
+    os.makedirs(root)
+    (root / "Отчет_01012024.xlsx").write_text("")
+    catalog = ScanCatalog(str(tmp_path / "catalog.sqlite"))
+    other = sqlite3.connect(str(tmp_path / "catalog.sqlite"))
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        # Изменения не сохраняются, обход выполняется
+        assert [entry.name for entry in make_loader(root, catalog).load_contents()] == ["Отчет_01012024.xlsx"]
+    finally:
+        other.rollback()
+        other.close()
+    assert catalog.load_rule(make_loader(root, catalog).rule_key) == {}
+    catalog.close()
+
+
+@pytest.mark.parametrize("mask, expected", [("Отчет_{ДДММГГГГ}.txt", True), ("Отчет_{ММ.Месяц}.txt", False)])
+def test_catalog_skips_masks_without_year(mask, expected):
+    rule = rule_from_row(("1", "Процесс", "Аналитик", "/data", mask, "10 д", "Дата из имени", "Активен"))
+    assert uses_catalog(rule, ConfigParams("", "", "", "", [], "", scan_catalog=True)) is expected
+
+
+def test_executor_close_closes_catalog_and_index(tmp_path):
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "", scan_catalog=True, expiry_index=True)
+    executor = RuleExecutor(config_params)
+    executor.close()
+    for store in (executor.catalog, executor.expiry_index):
+        with pytest.raises(sqlite3.ProgrammingError):
+            store._connection.execute("SELECT 1")
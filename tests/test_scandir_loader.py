@@ -0,0 +1,53 @@
+import os
+import pytest
+from datetime import datetime
+from src.folders.FolderOperations import RecursiveFolderContentLoader, ScandirFolderContentLoader, \
+    PruningFolderContentLoader
+from src.user_format_handlers.date_formats import USER_DATE_FORMAT_TO_RE_COMPILE
+from src.utils.DateSource import DateFromName, DateChange
+from src.utils.StoragePeriodFunction import CurrentYearWithOffset
+
+
+@pytest.fixture
+def folder_tree(tmp_path):
+    for sub_dir in ["2024-01-01", os.path.join("2024-01-01", "2023-05-05"), os.path.join("Архив", "2022-02-02")]:
+        os.makedirs(tmp_path / sub_dir)
+    for file_name in ["Отчет_01012024.xlsx", os.path.join("Архив", "Отчет_02022022.xlsx"),
+                      os.path.join("2024-01-01", "Отчет_03032023.xlsx"), "Отчет_03032023.csv"]:
+        (tmp_path / file_name).write_text("")
+    return tmp_path
+
+
+@pytest.mark.parametrize("regex_pattern, user_date_format, is_file", [
+    ("Отчет_{ДДММГГГГ}.xlsx", "ДДММГГГГ", True),
+    ("{ГГГГ-ММ-ДД}", "ГГГГ-ММ-ДД", False),
+])
+def test_scandir_loader_matches_os_walk(folder_tree, regex_pattern, user_date_format, is_file):
+    re_compile_date_format = USER_DATE_FORMAT_TO_RE_COMPILE.get(user_date_format)
+    args = (str(folder_tree), regex_pattern, user_date_format, re_compile_date_format, is_file)
+    expected = RecursiveFolderContentLoader(*args).load_contents()
+    result = ScandirFolderContentLoader(*args).load_contents()
+    assert sorted(os.fspath(entry) for entry in result) == sorted(expected)
+
+
+def test_date_source_uses_cached_stat(folder_tree):
+    re_compile_date_format = USER_DATE_FORMAT_TO_RE_COMPILE.get("ДДММГГГГ")
+    entries = ScandirFolderContentLoader(str(folder_tree), "Отчет_{ДДММГГГГ}.xlsx", "ДДММГГГГ",
+                                         re_compile_date_format, True).load_contents()
+    entry = next(entry for entry in entries if entry.name == "Отчет_01012024.xlsx")
+    assert DateFromName(entry).get_folder_date("%d%m%Y", re_compile_date_format) == datetime(2024, 1, 1)
+
+    modification_time = DateChange(entry).get_folder_date(None, None)
+    os.remove(entry.path)  # stat уже закэширован, повторного обращения к файлу нет
+    assert DateChange(entry).get_folder_date(None, None) == modification_time
+
+
+def test_pruning_loader_skips_contents_of_expired_folders(folder_tree):
+    re_compile_date_format = USER_DATE_FORMAT_TO_RE_COMPILE.get("ГГГГ-ММ-ДД")
+    handler = CurrentYearWithOffset(date_source=DateFromName, offset=1, datetime_date_format="%Y-%m-%d",
+                                    re_compile_date_format=re_compile_date_format)
+    loader = PruningFolderContentLoader(str(folder_tree), "{ГГГГ-ММ-ДД}", "ГГГГ-ММ-ДД", re_compile_date_format,
+                                        False, storage_period_handler=handler, current_date=datetime(2025, 6, 1))
+    result = sorted(os.path.relpath(entry.path, folder_tree) for entry in loader.load_contents())
+    # 2024-01-01/2023-05-05 удаляется вместе с родителем и в список не попадает
+    assert result == ["2024-01-01", os.path.join("Архив", "2022-02-02")]
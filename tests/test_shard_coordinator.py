@@ -0,0 +1,87 @@
+import os
+import time
+import datetime
+import pytest
+from src.excel.ReportSpool import close_report_spools
+from src.rules import ShardCoordinator as shard_coordinator_module
+from src.rules.Rule import rule_from_row
+from src.rules.ShardCoordinator import ShardCoordinator, shard_rules
+from src.utils.json_reader import ConfigParams
+from src.utils.RunMetrics import RunMetrics
+
+
+def make_rules(tmp_path):
+    indexed_rules = []
+    for index, server in enumerate(["server1", "server2", "server1"]):
+        folder = tmp_path / server / str(index)
+        folder.mkdir(parents=True)
+        for day in ["01052024", "24052024"]:
+            (folder / f"Отчет_{day}.txt").write_text("")
+        indexed_rules.append((index, rule_from_row((str(index), "Процесс", "Аналитик", str(folder),
+                                                    "Отчет_{ДДММГГГГ}.txt", "10 д", "Дата из имени", "Активен"))))
+    return indexed_rules
+
+
+@pytest.mark.parametrize("streaming_pipeline", [False, True])
+def test_shards_run_in_processes_and_merge_in_table_order(tmp_path, monkeypatch, streaming_pipeline):
+    monkeypatch.setattr(shard_coordinator_module, "share_key", lambda path: path.split(os.sep)[-2])
+    indexed_rules = make_rules(tmp_path)
+    assert [[index for index, _rule in rules] for rules in shard_rules(indexed_rules).values()] == [[0, 2], [1]]
+
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "", shard_processes=2,
+                                 streaming_pipeline=streaming_pipeline)
+    current_time = datetime.datetime(2024, 5, 25, 2, 0)
+    run_metrics = RunMetrics(current_time)
+    reporter_list = ShardCoordinator(config_params, run_metrics).run(indexed_rules, current_time)
+    assert [row[0] for row in reporter_list] == ["0", "1", "2"]
+    assert [list(row[4]) for row in reporter_list] == [[os.path.join(rule.folder_path, "Отчет_01052024.txt")]
+                                                       for _index, rule in indexed_rules]
+    assert run_metrics.summary()["totals"]["deleted"] == 3
+    close_report_spools(reporter_list)
+
+
+def test_hosts_share_parts_through_lock_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(shard_coordinator_module, "share_key", lambda path: path.split(os.sep)[-2])
+    indexed_rules = make_rules(tmp_path)
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "", shard_lock_dir=str(tmp_path / "locks"),
+                                 shard_wait_seconds=0.0)
+    current_time = datetime.datetime(2024, 5, 25, 2, 0)
+    run_dir = tmp_path / "locks" / "night"
+    server1, _server2 = shard_rules(indexed_rules)
+
+    # Отчёт уже формирует другой сервер
+    run_dir.mkdir(parents=True)
+    (run_dir / "report.lock").write_text("host 1")
+    assert ShardCoordinator(config_params).run(indexed_rules, current_time, run_id="night") is None
+    assert os.listdir(run_dir) == ["report.lock"]
+
+    # Часть выполняется другим сервером: выполняется только свободная часть, отчёт - без результатов занятой
+    (run_dir / "report.lock").unlink()
+    (run_dir / f"{server1}.lock").write_text("host 1")
+    assert [row[0] for row in ShardCoordinator(config_params).run(indexed_rules, current_time, run_id="night")] == ["1"]
+    assert (run_dir / "done").exists()
+
+    # Сервер, запущенный позже (или повторный запуск с тем же идентификатором), строки не выполняет
+    assert ShardCoordinator(config_params).run(indexed_rules, current_time, run_id="night") is None
+
+    # Папки старых запусков удаляются при следующих запусках
+    old_time = time.time() - shard_coordinator_module.RUN_RETENTION_SECONDS - 1
+    os.utime(run_dir, (old_time, old_time))
+    assert len(ShardCoordinator(config_params).run(indexed_rules, current_time, run_id="next")) == 3
+    assert sorted(os.listdir(tmp_path / "locks")) == ["next"]
+
+
+def test_abandoned_lock_is_reclaimed(tmp_path, monkeypatch):
+    monkeypatch.setattr(shard_coordinator_module, "share_key", lambda path: path.split(os.sep)[-2])
+    indexed_rules = make_rules(tmp_path)
+    config_params = ConfigParams("", str(tmp_path), "", "", [], "", shard_lock_dir=str(tmp_path / "locks"),
+                                 shard_wait_seconds=0.0)
+    run_dir = tmp_path / "locks" / "2024-05-25"
+    run_dir.mkdir(parents=True)
+    lock_path = run_dir / f"{next(iter(shard_rules(indexed_rules)))}.lock"
+    lock_path.write_text("host 1")
+    stale_time = time.time() - shard_coordinator_module.LOCK_STALE_SECONDS - 1
+    os.utime(lock_path, (stale_time, stale_time))
+
+    reporter_list = ShardCoordinator(config_params).run(indexed_rules, datetime.datetime(2024, 5, 25, 2, 0))
+    assert [row[0] for row in reporter_list] == ["0", "1", "2"]
@@ -0,0 +1,52 @@
+import os
+from openpyxl import load_workbook
+from src.excel.ExelReporter import Reporter
+from src.excel.StreamingReporter import StreamingReporter
+from src.folders.FolderOperations import CleanResult
+
+
+def read_rows(filename):
+    wb = load_workbook(filename, read_only=True)
+    rows = [["" if value is None else value for value in row] for row in wb.active.iter_rows(values_only=True)]
+    wb.close()
+    return rows
+
+
+REPORTS = [
+    [["1", "Процесс", "Аналитик", "C:\\Папка", {"C:\\Папка\\1.txt": CleanResult("Выполнено", "Файл удалён"),
+                                               "C:\\Папка\\2": CleanResult("Выполнено", "Папка удалена")},
+      "01-05-2024 10:00:00", "01-05-2024 10:00:01"]],
+    [["2", "Процесс", "Аналитик", "C:\\Другая",
+      {"Нет файлов на удаление": CleanResult("Выполнено", "Список файлов на удаление пуст")},
+      "01-05-2024 11:00:00", "01-05-2024 11:00:00"]],
+]
+
+
+def test_streaming_reporter_matches_reporter(tmp_path):
+    (tmp_path / "expected").mkdir()
+    (tmp_path / "result").mkdir()
+    for reporter_list in REPORTS:
+        Reporter(str(tmp_path / "expected")).generate_report(reporter_list)
+        StreamingReporter(str(tmp_path / "result")).generate_report(reporter_list)
+
+    expected = read_rows(Reporter(str(tmp_path / "expected")).filename)
+    assert len(expected) == 5
+    assert read_rows(StreamingReporter(str(tmp_path / "result")).filename) == expected
+
+
+def test_streaming_reporter_continues_existing_report(tmp_path):
+    Reporter(str(tmp_path)).generate_report(REPORTS[0])
+    StreamingReporter(str(tmp_path)).generate_report(REPORTS[1])
+
+    rows = read_rows(Reporter(str(tmp_path)).filename)
+    assert [row[0] for row in rows[1:]] == ["1", "", "", "2"]
+
+
+def test_rows_are_journaled_until_workbook_is_built(tmp_path):
+    for reporter_list in REPORTS:
+        StreamingReporter(str(tmp_path)).generate_report(reporter_list, build=False)
+    reporter = StreamingReporter(str(tmp_path))
+    assert not os.path.exists(reporter.filename)
+
+    StreamingReporter(str(tmp_path), filename=reporter.filename).build_workbook()
+    assert [row[0] for row in read_rows(reporter.filename)[1:]] == ["1", "", "", "2"]